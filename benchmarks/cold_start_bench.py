@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compare hook cold start from source against the precompiled zipapp bundle.
+
+Usage:
+    python3 benchmarks/cold_start_bench.py [iterations] [plugin] [entry]
+
+Defaults to the per-command PreToolUse hook (command-safety validate_command).
+The plugin is copied to a temporary directory first, like the plugin cache
+Claude Code installs into, and bytecode writing is disabled, so the source
+variant compiles on every run the way it does from a read-only cache.
+Both variants run interleaved with the same payload, using the interpreter
+running this script; run it with the Python version the bundles were built
+with, as other versions fall back to the bundled source.
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+PAYLOAD = json.dumps({
+    "hook_event_name": "PreToolUse",
+    "tool_name": "Bash",
+    "tool_input": {"command": "git status"},
+})
+
+
+def measure(command: list[str], env: dict, cwd: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, input=PAYLOAD, capture_output=True, text=True, env=env, cwd=cwd)
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> int:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    plugin = sys.argv[2] if len(sys.argv) > 2 else "command-safety"
+    entry = sys.argv[3] if len(sys.argv) > 3 else "hooks/validate_command.py"
+
+    with tempfile.TemporaryDirectory(prefix="cold-start-") as tmp:
+        plugin_root = Path(tmp) / plugin
+        shutil.copytree(REPO_ROOT / "plugins" / plugin, plugin_root, symlinks=False,
+                        ignore=shutil.ignore_patterns("__pycache__"))
+        bundle = plugin_root / "dist" / f"{Path(entry).stem}.pyz"
+        if not bundle.exists():
+            print(f"No bundle at {bundle}; run scripts/build_bundles.py", file=sys.stderr)
+            return 1
+        env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1", "CLAUDE_PROJECT_DIR": tmp}
+        variants = {
+            "source": [sys.executable, str(plugin_root / entry)],
+            "bundle (-S -E)": [sys.executable, "-S", "-E", str(bundle)],
+        }
+        samples: dict[str, list[float]] = {name: [] for name in variants}
+        for _ in range(iterations):
+            for name, command in variants.items():
+                samples[name].append(measure(command, env, tmp))
+
+    print(f"{plugin}/{entry}, {iterations} runs each")
+    for name, values in samples.items():
+        print(f"  {name:<16} mean {statistics.fmean(values):7.2f} ms   p50 {statistics.median(values):7.2f} ms")
+    source, bundled = (statistics.median(values) for values in samples.values())
+    print(f"  p50 reduction: {source - bundled:.2f} ms ({(source - bundled) / source * 100:.0f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
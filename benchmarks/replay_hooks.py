@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Replay a session's hook events through the marketplace's hooks and report latency.
+
+Usage:
+    python3 benchmarks/replay_hooks.py [--session events.jsonl] [--bash-events N]
+                                       [--plugin NAME ...] [--env KEY=VALUE ...]
+                                       [--json out.json] [--baseline base.json]
+
+Hooks are invoked exactly as each plugin's hooks/hooks.json declares them:
+the command runs through `sh -c` with ${CLAUDE_PLUGIN_ROOT} substituted, the
+event payload on stdin, and every hook matching an event runs in parallel.
+Stub binaries for notify-send, paplay and the linter are put first on PATH,
+and the session bus is hidden, so only the hooks' own overhead is measured.
+
+A session file holds one hook input payload per line, as Claude Code sends it
+on stdin (each needs a hook_event_name). Without one, a synthetic session is
+replayed: Bash PreToolUse events followed by a permission Notification and Stop.
+
+--env sets variables for the hooks (e.g. CLAUDE_LINT_SHARDS=1) to compare
+configurations; --json saves the report and --baseline compares against a saved
+one, exiting 1 when any hook's median regresses by more than --threshold percent.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PLUGINS_DIR = REPO_ROOT / "plugins"
+
+# Events whose matcher is tested against a payload field, and which field
+MATCHER_FIELDS = {
+    "PreToolUse": "tool_name",
+    "PostToolUse": "tool_name",
+    "PermissionRequest": "tool_name",
+    "Notification": "notification_type",
+    "PreCompact": "trigger",
+    "SessionStart": "source",
+}
+
+# Commands the hooks shell out to; each stub just exits successfully
+STUB_BINARIES = ["notify-send", "paplay", "aplay", "terminal-notifier", "powershell", "gdbus", "fake-lint"]
+
+# The desktop backend, so notifications reach the stubs rather than the terminal
+DEFAULT_ENV = {"CLAUDE_LINT_COMMAND": "fake-lint", "CLAUDE_NOTIFY_BACKEND": "desktop"}
+
+BASH_COMMANDS = [
+    "ls -la",
+    "git status",
+    "git diff --stat",
+    "python -m pytest -q tests/",
+    "grep -rn TODO src/",
+    "cat README.md",
+    "npm run build",
+    "rm -rf build/",
+    "find . -name '*.py' | xargs wc -l",
+    "docker compose up -d",
+]
+
+
+def script_name(command: str) -> str:
+    """File name of the script or bundle a hook command launches."""
+    match = re.search(r"\$\{CLAUDE_PLUGIN_ROOT\}/(\S+)", command)
+    return Path(match.group(1) if match else command.split()[-1]).name
+
+
+def load_hooks(plugin_dirs: list[Path]) -> list[dict]:
+    """Flatten the plugins' hooks.json into one entry per registered command."""
+    hooks = []
+    for plugin_dir in plugin_dirs:
+        manifest = plugin_dir / "hooks" / "hooks.json"
+        if not manifest.exists():
+            continue
+        config = json.loads(manifest.read_text())
+        for event, groups in config.get("hooks", {}).items():
+            for group in groups:
+                for hook in group.get("hooks", []):
+                    if hook.get("type") != "command":
+                        continue
+                    hooks.append({
+                        "plugin": plugin_dir.name,
+                        "plugin_root": str(plugin_dir),
+                        "event": event,
+                        "matcher": group.get("matcher", ""),
+                        "command": hook["command"].replace("${CLAUDE_PLUGIN_ROOT}", str(plugin_dir)),
+                        "timeout": hook.get("timeout", 60),
+                        "name": f"{plugin_dir.name}:{event}:{script_name(hook['command'])}",
+                    })
+    return hooks
+
+
+def matches(hook: dict, payload: dict) -> bool:
+    """Whether `hook` fires for `payload`, following Claude Code's matcher rules."""
+    if hook["event"] != payload.get("hook_event_name"):
+        return False
+    matcher = hook["matcher"]
+    field = MATCHER_FIELDS.get(hook["event"])
+    if not matcher or matcher == "*" or field is None:
+        return True
+    return re.fullmatch(matcher, payload.get(field, "")) is not None
+
+
+def synthetic_session(bash_events: int, session_id: str = "replay") -> list[dict]:
+    """Bash PreToolUse events, then a permission prompt and a Stop."""
+    events = [
+        {
+            "session_id": session_id,
+            "hook_event_name": "PreToolUse",
+            "tool_name": "Bash",
+            "tool_input": {"command": BASH_COMMANDS[i % len(BASH_COMMANDS)]},
+        }
+        for i in range(bash_events)
+    ]
+    events.append({
+        "session_id": session_id,
+        "hook_event_name": "Notification",
+        "notification_type": "permission_prompt",
+        "message": "Claude needs your permission to use Bash",
+    })
+    events.append({"session_id": session_id, "hook_event_name": "Stop", "stop_hook_active": False})
+    return events
+
+
+def load_session(path: Path) -> list[dict]:
+    """Read a recorded session: one hook payload per line."""
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def make_stubs(stub_dir: Path):
+    """Write do-nothing executables for the tools hooks shell out to."""
+    for name in STUB_BINARIES:
+        stub = stub_dir / name
+        stub.write_text("#!/bin/sh\nexit 0\n")
+        stub.chmod(0o755)
+
+
+def make_project(project_dir: Path):
+    """A small git repository for the hooks to run in."""
+    (project_dir / "src").mkdir()
+    (project_dir / "src" / "app.py").write_text("print('hello')\n")
+    git = ["git", "-c", "user.name=replay", "-c", "user.email=replay@example.com"]
+    subprocess.run(git + ["init", "-q"], cwd=project_dir, check=True)
+    subprocess.run(git + ["add", "."], cwd=project_dir, check=True)
+    subprocess.run(git + ["commit", "-qm", "init"], cwd=project_dir, check=True)
+
+
+def run_hook(hook: dict, payload: dict, env: dict) -> tuple[float, int]:
+    """Run one hook command; returns (milliseconds, exit code)."""
+    hook_env = {**env, "CLAUDE_PLUGIN_ROOT": hook["plugin_root"]}
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(
+            ["sh", "-c", hook["command"]],
+            input=json.dumps(payload),
+            capture_output=True,
+            text=True,
+            env=hook_env,
+            cwd=env["CLAUDE_PROJECT_DIR"],
+            timeout=hook["timeout"],
+        )
+        code = result.returncode
+    except subprocess.TimeoutExpired:
+        code = -1
+    return (time.perf_counter() - start) * 1000, code
+
+
+def replay(events: list[dict], hooks: list[dict], env: dict) -> dict:
+    """Replay `events` in order; returns per-event and per-hook samples."""
+    by_event: dict[str, list[float]] = {}
+    by_hook: dict[str, list[float]] = {}
+    exit_codes: dict[str, dict[int, int]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(hooks))) as pool:
+        for payload in events:
+            matched = [hook for hook in hooks if matches(hook, payload)]
+            if not matched:
+                continue
+            start = time.perf_counter()
+            results = list(pool.map(lambda hook: run_hook(hook, payload, env), matched))
+            by_event.setdefault(payload["hook_event_name"], []).append((time.perf_counter() - start) * 1000)
+            for hook, (elapsed, code) in zip(matched, results):
+                by_hook.setdefault(hook["name"], []).append(elapsed)
+                codes = exit_codes.setdefault(hook["name"], {})
+                codes[code] = codes.get(code, 0) + 1
+    return {"events": by_event, "hooks": by_hook, "exit_codes": exit_codes}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples: list[float]) -> dict:
+    """Latency distribution of `samples` in milliseconds."""
+    return {
+        "count": len(samples),
+        "total_ms": round(sum(samples), 2),
+        "mean_ms": round(statistics.fmean(samples), 2),
+        "p50_ms": round(percentile(samples, 50), 2),
+        "p90_ms": round(percentile(samples, 90), 2),
+        "p99_ms": round(percentile(samples, 99), 2),
+        "max_ms": round(max(samples), 2),
+    }
+
+
+def build_report(samples: dict, env_overrides: dict) -> dict:
+    every_event = [ms for values in samples["events"].values() for ms in values]
+    return {
+        "env": env_overrides,
+        "total": summarize(every_event) if every_event else None,
+        "events": {name: summarize(values) for name, values in sorted(samples["events"].items())},
+        "hooks": {name: summarize(values) for name, values in sorted(samples["hooks"].items())},
+        "exit_codes": {name: {str(k): v for k, v in codes.items()} for name, codes in samples["exit_codes"].items()},
+    }
+
+
+def format_table(title: str, rows: dict) -> list[str]:
+    lines = [
+        "",
+        f"{title:<52} {'count':>6} {'total':>10} {'mean':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}",
+    ]
+    for name, stats in rows.items():
+        lines.append(
+            f"{name:<52} {stats['count']:>6} {stats['total_ms']:>10.1f} {stats['mean_ms']:>8.1f} "
+            f"{stats['p50_ms']:>8.1f} {stats['p90_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}"
+        )
+    return lines
+
+
+def format_report(report: dict) -> str:
+    """Human-readable report; all times in milliseconds."""
+    lines = format_table("event (all matching hooks, ms)", report["events"])
+    lines += format_table("hook (ms)", report["hooks"])
+    if report["total"]:
+        total = report["total"]
+        lines += ["", f"cumulative hook overhead: {total['total_ms']:.1f} ms over {total['count']} events"]
+    return "\n".join(lines)
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> tuple[list[str], bool]:
+    """Median change per hook against `baseline`; flags regressions beyond `threshold` percent."""
+    lines = ["", f"{'hook p50 vs baseline':<52} {'base':>8} {'now':>8} {'change':>8}"]
+    regressed = False
+    for name, stats in report["hooks"].items():
+        base = baseline.get("hooks", {}).get(name)
+        if not base:
+            continue
+        change = (stats["p50_ms"] - base["p50_ms"]) / base["p50_ms"] * 100 if base["p50_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressed, flag = True, "  REGRESSION"
+        lines.append(f"{name:<52} {base['p50_ms']:>8.1f} {stats['p50_ms']:>8.1f} {change:>+7.1f}%{flag}")
+    return lines, regressed
+
+
+def parse_env(pairs: list[str]) -> dict:
+    env = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"--env expects KEY=VALUE, got {pair!r}")
+        env[key] = value
+    return env
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--session", type=Path, help="recorded hook payloads, one JSON object per line")
+    parser.add_argument("--bash-events", type=int, default=300, help="Bash PreToolUse events in the synthetic session")
+    parser.add_argument("--plugin", action="append", default=[], help="only replay this plugin's hooks (repeatable)")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE passed to the hooks (repeatable)")
+    parser.add_argument("--json", type=Path, help="write the report as JSON")
+    parser.add_argument("--baseline", type=Path, help="report JSON to compare medians against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed p50 regression in percent")
+    args = parser.parse_args(argv)
+
+    plugin_dirs = [PLUGINS_DIR / name for name in args.plugin] or sorted(PLUGINS_DIR.iterdir())
+    hooks = load_hooks(plugin_dirs)
+    if not hooks:
+        print("No command hooks found", file=sys.stderr)
+        return 1
+    events = load_session(args.session) if args.session else synthetic_session(args.bash_events)
+    env_overrides = parse_env(args.env)
+
+    with tempfile.TemporaryDirectory(prefix="hook-replay-") as tmp:
+        tmp_path = Path(tmp)
+        stub_dir, project_dir, home_dir = tmp_path / "bin", tmp_path / "project", tmp_path / "home"
+        for path in (stub_dir, project_dir, home_dir):
+            path.mkdir()
+        make_stubs(stub_dir)
+        make_project(project_dir)
+        env = {
+            **os.environ,
+            "PATH": f"{stub_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+            "HOME": str(home_dir),
+            "CLAUDE_PROJECT_DIR": str(project_dir),
+            # No session bus: notifications go to the notify-send stub
+            "DBUS_SESSION_BUS_ADDRESS": "",
+            "XDG_RUNTIME_DIR": str(home_dir),
+            **DEFAULT_ENV,
+            **env_overrides,
+        }
+        report = build_report(replay(events, hooks, env), env_overrides)
+
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.baseline:
+        lines, regressed = compare(report, json.loads(args.baseline.read_text()), args.threshold)
+        print("\n".join(lines))
+        if regressed:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+#!/bin/bash
+# Measure statusline render cost.
+#
+# Usage: benchmarks/statusline_bench.sh [iterations] [script]
+#
+# Renders the statusline repeatedly with a sample payload and reports the mean
+# wall time per render, plus how many jq/git processes a single render forks.
+set -uo pipefail
+
+ITERATIONS=${1:-200}
+REPO_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+SCRIPT=${2:-"$REPO_ROOT/plugins/statusline/scripts/statusline.sh"}
+
+INPUT=$(printf '{"workspace":{"current_dir":"%s","project_dir":"%s"},"session_id":"bench","context_window":{"used_percentage":42,"context_window_size":200000}}' \
+    "$REPO_ROOT" "$REPO_ROOT")
+
+# Count forks of the tools the statusline shells out to with logging wrappers
+SHIM_DIR=$(mktemp -d)
+trap 'rm -rf "$SHIM_DIR"' EXIT
+for tool in jq git gh; do
+    real=$(command -v "$tool") || continue
+    printf '#!/bin/bash\necho %s >> "%s/calls"\nexec "%s" "$@"\n' "$tool" "$SHIM_DIR" "$real" > "$SHIM_DIR/$tool"
+    chmod +x "$SHIM_DIR/$tool"
+done
+
+# Warm caches, then count forks of one steady-state render
+bash "$SCRIPT" <<<"$INPUT" >/dev/null
+rm -f "$SHIM_DIR/calls"
+PATH="$SHIM_DIR:$PATH" bash "$SCRIPT" <<<"$INPUT" >/dev/null
+for tool in jq git gh; do
+    printf '%-4s forks per render: %d\n' "$tool" "$(grep -cx "$tool" "$SHIM_DIR/calls" 2>/dev/null)"
+done
+
+TIMEFORMAT=%R
+ELAPSED=$( { time for ((i = 0; i < ITERATIONS; i++)); do bash "$SCRIPT" <<<"$INPUT" >/dev/null; done; } 2>&1 )
+awk -v total="$ELAPSED" -v n="$ITERATIONS" 'BEGIN { printf "mean render time: %.2f ms over %d renders\n", total * 1000 / n, n }'
@@ -0,0 +1,381 @@
+"""
+Hook outcome metrics, spooled locally and shipped in batches over OTLP/HTTP.
+
+Hooks call `counter` and `histogram`; each call appends one JSON line to a
+spool file (a single O_APPEND write, no locks, no network). Recording is on
+when CLAUDE_CODE_ENABLE_TELEMETRY=1 and an OTLP endpoint is configured, as
+/sdui-telemetry:setup does.
+
+When the last flush is older than CLAUDE_HOOK_METRICS_INTERVAL seconds
+(default 60), the recording hook starts a detached flusher. The flusher aggregates the
+spool into OTLP delta sums and histograms and POSTs them to
+OTEL_EXPORTER_OTLP_ENDPOINT/v1/metrics with OTEL_EXPORTER_OTLP_HEADERS.
+Batches that fail to send are retried by the next flush.
+
+The payload is encoded as OTEL_EXPORTER_OTLP_METRICS_PROTOCOL (or
+OTEL_EXPORTER_OTLP_PROTOCOL) says: http/protobuf, the OTLP default, or
+http/json. With grpc, which needs a gRPC client, nothing is recorded.
+
+    python3 lib/hook_metrics.py flush    # flush now, in the foreground
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+
+SPOOL_FILE = "spool.jsonl"
+STAMP_FILE = "last-flush"
+LOCK_FILE = "flush.lock"
+BATCH_SUFFIX = ".batch"
+DEFAULT_INTERVAL = 60
+MAX_BATCHES = 100
+
+# Histogram bucket bounds in seconds, for hook and lint durations
+DEFAULT_BOUNDS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+
+DEFAULT_PROTOCOL = "http/protobuf"
+CONTENT_TYPES = {"http/protobuf": "application/x-protobuf", "http/json": "application/json"}
+
+# OTLP protobuf schema of the messages build_request produces:
+# message -> {JSON field: (field number, type, nested message)}
+PROTO_SCHEMA = {
+    "request": {"resourceMetrics": (1, "message", "resource_metrics")},
+    "resource_metrics": {"resource": (1, "message", "resource"), "scopeMetrics": (2, "message", "scope_metrics")},
+    "resource": {"attributes": (1, "message", "key_value")},
+    "scope_metrics": {"scope": (1, "message", "scope"), "metrics": (2, "message", "metric")},
+    "scope": {"name": (1, "string", None), "version": (2, "string", None)},
+    "metric": {
+        "name": (1, "string", None), "description": (2, "string", None), "unit": (3, "string", None),
+        "sum": (7, "message", "sum"), "histogram": (9, "message", "histogram"),
+    },
+    "sum": {
+        "dataPoints": (1, "message", "number_point"),
+        "aggregationTemporality": (2, "varint", None), "isMonotonic": (3, "varint", None),
+    },
+    "histogram": {"dataPoints": (1, "message", "histogram_point"), "aggregationTemporality": (2, "varint", None)},
+    "number_point": {
+        "startTimeUnixNano": (2, "fixed64", None), "timeUnixNano": (3, "fixed64", None),
+        "asDouble": (4, "double", None), "asInt": (6, "sfixed64", None), "attributes": (7, "message", "key_value"),
+    },
+    "histogram_point": {
+        "startTimeUnixNano": (2, "fixed64", None), "timeUnixNano": (3, "fixed64", None),
+        "count": (4, "fixed64", None), "sum": (5, "double", None), "bucketCounts": (6, "fixed64", None),
+        "explicitBounds": (7, "double", None), "attributes": (9, "message", "key_value"),
+        "min": (11, "double", None), "max": (12, "double", None),
+    },
+    "key_value": {"key": (1, "string", None), "value": (2, "message", "any_value")},
+    "any_value": {
+        "stringValue": (1, "string", None), "boolValue": (2, "varint", None),
+        "intValue": (3, "varint", None), "doubleValue": (4, "double", None),
+    },
+}
+
+
+def is_enabled() -> bool:
+    """Telemetry is on and there is an OTLP endpoint to ship to, over a protocol we speak."""
+    return (
+        os.environ.get("CLAUDE_CODE_ENABLE_TELEMETRY") == "1"
+        and get_metrics_url() is not None
+        and get_protocol() in CONTENT_TYPES
+    )
+
+
+def get_protocol() -> str:
+    """OTLP protocol for metrics, following the OTEL_EXPORTER_OTLP_* conventions."""
+    protocol = os.environ.get("OTEL_EXPORTER_OTLP_METRICS_PROTOCOL") or os.environ.get("OTEL_EXPORTER_OTLP_PROTOCOL")
+    return (protocol or DEFAULT_PROTOCOL).strip().lower()
+
+
+def get_spool_dir() -> str:
+    """Per-user spool directory, shared by every project's hooks."""
+    return os.environ.get("CLAUDE_HOOK_METRICS_DIR") or os.path.join(
+        os.path.expanduser("~"), ".claude", "hook-metrics"
+    )
+
+
+def get_interval() -> float:
+    try:
+        return float(os.environ.get("CLAUDE_HOOK_METRICS_INTERVAL", DEFAULT_INTERVAL))
+    except ValueError:
+        return DEFAULT_INTERVAL
+
+
+def record(kind: str, name: str, value: float, unit: str, attributes: dict):
+    """Append one measurement to the spool; never raises."""
+    if not is_enabled():
+        return
+    entry = {"t": time.time_ns(), "k": kind, "n": name, "v": value, "u": unit, "a": attributes}
+    spool_dir = get_spool_dir()
+    try:
+        os.makedirs(spool_dir, exist_ok=True)
+        fd = os.open(os.path.join(spool_dir, SPOOL_FILE), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, (json.dumps(entry, separators=(",", ":")) + "\n").encode())
+        finally:
+            os.close(fd)
+        maybe_flush(spool_dir)
+    except OSError:
+        pass
+
+
+def counter(name: str, value: int = 1, unit: str = "1", **attributes):
+    """Add `value` to counter `name`."""
+    record("c", name, value, unit, attributes)
+
+
+def histogram(name: str, value: float, unit: str = "s", **attributes):
+    """Record `value` in histogram `name`."""
+    record("h", name, value, unit, attributes)
+
+
+def maybe_flush(spool_dir: str):
+    """Start a detached flusher when the last flush is older than the interval."""
+    stamp = os.path.join(spool_dir, STAMP_FILE)
+    try:
+        due = time.time() - os.stat(stamp).st_mtime >= get_interval()
+    except FileNotFoundError:
+        due = None  # first measurement starts the interval
+    if due is False:
+        return
+    # Claim the interval before spawning so concurrent hooks don't all flush
+    with open(stamp, "w"):
+        pass
+    if due is None:
+        return
+    import subprocess
+
+    code = f"import sys; sys.path.insert(0, {os.path.dirname(__file__)!r}); import hook_metrics; hook_metrics.flush()"
+    subprocess.Popen(
+        [sys.executable, "-S", "-E", "-c", code],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True, env=os.environ.copy(),
+    )
+
+
+def parse_headers(value: str) -> dict:
+    """OTEL_EXPORTER_OTLP_HEADERS ("k1=v1,k2=v2", values URL-encoded) as a dict."""
+    from urllib.parse import unquote
+
+    headers = {}
+    for pair in value.split(","):
+        key, sep, val = pair.partition("=")
+        if sep and key.strip():
+            headers[key.strip()] = unquote(val.strip())
+    return headers
+
+
+def get_metrics_url() -> str | None:
+    """OTLP/HTTP metrics endpoint, following the OTEL_EXPORTER_OTLP_* conventions."""
+    url = os.environ.get("OTEL_EXPORTER_OTLP_METRICS_ENDPOINT")
+    if url:
+        return url
+    endpoint = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT")
+    return endpoint.rstrip("/") + "/v1/metrics" if endpoint else None
+
+
+def attributes_list(attributes: dict) -> list[dict]:
+    result = []
+    for key, value in sorted(attributes.items()):
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        result.append({"key": key, "value": typed})
+    return result
+
+
+def resource_attributes() -> dict:
+    """OTEL_RESOURCE_ATTRIBUTES, with the hooks as the reporting service."""
+    attributes = {}
+    for pair in os.environ.get("OTEL_RESOURCE_ATTRIBUTES", "").split(","):
+        key, sep, value = pair.partition("=")
+        if sep and key.strip():
+            attributes[key.strip()] = value.strip()
+    attributes["service.name"] = "claude-code-hooks"
+    return attributes
+
+
+def build_request(entries: list[dict], bounds: list[float] = DEFAULT_BOUNDS) -> dict:
+    """Aggregate spooled entries into an OTLP/JSON ExportMetricsServiceRequest."""
+    sums: dict = {}
+    histograms: dict = {}
+    units: dict = {}
+    for entry in entries:
+        key = (entry["n"], json.dumps(entry.get("a", {}), sort_keys=True))
+        units[entry["n"]] = entry.get("u", "1")
+        if entry["k"] == "c":
+            point = sums.setdefault(key, {"start": entry["t"], "end": entry["t"], "value": 0})
+            point["value"] += entry["v"]
+        else:
+            point = histograms.setdefault(key, {
+                "start": entry["t"], "end": entry["t"], "values": [],
+            })
+            point["values"].append(entry["v"])
+        point["start"], point["end"] = min(point["start"], entry["t"]), max(point["end"], entry["t"])
+
+    metrics: dict = {}
+    for (name, attrs), point in sorted(sums.items()):
+        metric = metrics.setdefault(name, {
+            "name": name,
+            "unit": units[name],
+            "sum": {"aggregationTemporality": 1, "isMonotonic": True, "dataPoints": []},
+        })
+        value = point["value"]
+        metric["sum"]["dataPoints"].append({
+            "attributes": attributes_list(json.loads(attrs)),
+            "startTimeUnixNano": str(point["start"]),
+            "timeUnixNano": str(point["end"]),
+            **({"asInt": str(value)} if isinstance(value, int) else {"asDouble": value}),
+        })
+    for (name, attrs), point in sorted(histograms.items()):
+        metric = metrics.setdefault(name, {
+            "name": name,
+            "unit": units[name],
+            "histogram": {"aggregationTemporality": 1, "dataPoints": []},
+        })
+        values = point["values"]
+        buckets = [0] * (len(bounds) + 1)
+        for value in values:
+            buckets[next((i for i, bound in enumerate(bounds) if value <= bound), len(bounds))] += 1
+        metric["histogram"]["dataPoints"].append({
+            "attributes": attributes_list(json.loads(attrs)),
+            "startTimeUnixNano": str(point["start"]),
+            "timeUnixNano": str(point["end"]),
+            "count": str(len(values)),
+            "sum": sum(values),
+            "min": min(values),
+            "max": max(values),
+            "bucketCounts": [str(count) for count in buckets],
+            "explicitBounds": bounds,
+        })
+
+    return {"resourceMetrics": [{
+        "resource": {"attributes": attributes_list(resource_attributes())},
+        "scopeMetrics": [{"scope": {"name": "hook_metrics"}, "metrics": list(metrics.values())}],
+    }]}
+
+
+def encode_varint(value: int) -> bytes:
+    value &= (1 << 64) - 1  # negative int64 as two's complement
+    out = bytearray()
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def encode_scalar(kind: str, value) -> bytes:
+    if kind == "varint":
+        return encode_varint(int(value))
+    if kind == "fixed64":
+        return struct.pack("<Q", int(value))
+    if kind == "sfixed64":
+        return struct.pack("<q", int(value))
+    return struct.pack("<d", float(value))
+
+
+def encode_proto(message: dict, kind: str = "request") -> bytes:
+    """Encode an OTLP/JSON message from build_request as OTLP protobuf (see PROTO_SCHEMA)."""
+    out = bytearray()
+    for name, value in message.items():
+        number, field_type, nested = PROTO_SCHEMA[kind][name]
+        if field_type in ("message", "string"):
+            for item in value if isinstance(value, list) else [value]:
+                data = encode_proto(item, nested) if nested else item.encode()
+                out += encode_varint(number << 3 | 2) + encode_varint(len(data)) + data
+        elif isinstance(value, list):  # packed repeated scalars
+            data = b"".join(encode_scalar(field_type, item) for item in value)
+            out += encode_varint(number << 3 | 2) + encode_varint(len(data)) + data
+        else:
+            out += encode_varint(number << 3 | (0 if field_type == "varint" else 1)) + encode_scalar(field_type, value)
+    return bytes(out)
+
+
+def read_batch(path: str) -> list[dict]:
+    entries = []
+    with open(path) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # a torn write from a killed hook
+    return entries
+
+
+def send(url: str, request: dict, headers: dict, timeout: float = 10, protocol: str = "http/json") -> bool:
+    """POST an OTLP request encoded for `protocol`; True when the collector accepted it."""
+    import urllib.error
+    import urllib.request
+
+    data = encode_proto(request) if protocol == "http/protobuf" else json.dumps(request).encode()
+    req = urllib.request.Request(
+        url,
+        data=data,
+        headers={**headers, "Content-Type": CONTENT_TYPES[protocol]},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return 200 <= response.status < 300
+    except (urllib.error.URLError, OSError, ValueError):
+        return False
+
+
+def flush(spool_dir: str | None = None) -> int:
+    """
+    Ship the spool to the collector; returns the number of entries sent.
+
+    The spool is renamed to a batch file first, so hooks keep appending to a
+    fresh spool while this runs. Only one flusher runs at a time.
+    """
+    spool_dir = spool_dir or get_spool_dir()
+    url = get_metrics_url()
+    protocol = get_protocol()
+    if url is None or protocol not in CONTENT_TYPES or not os.path.isdir(spool_dir):
+        return 0
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+
+    with open(os.path.join(spool_dir, LOCK_FILE), "w") as lock:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return 0  # another flusher is running
+
+        spool = os.path.join(spool_dir, SPOOL_FILE)
+        if os.path.exists(spool):
+            os.replace(spool, os.path.join(spool_dir, f"{time.time_ns()}{BATCH_SUFFIX}"))
+
+        batches = sorted(name for name in os.listdir(spool_dir) if name.endswith(BATCH_SUFFIX))
+        # Drop the oldest batches if the collector has been unreachable for long
+        for name in batches[:-MAX_BATCHES]:
+            os.unlink(os.path.join(spool_dir, name))
+        batches = [os.path.join(spool_dir, name) for name in batches[-MAX_BATCHES:]]
+        if not batches:
+            return 0
+
+        entries = [entry for path in batches for entry in read_batch(path)]
+        headers = parse_headers(os.environ.get("OTEL_EXPORTER_OTLP_HEADERS", ""))
+        if entries and not send(url, build_request(entries), headers, protocol=protocol):
+            return 0
+        for path in batches:
+            os.unlink(path)
+        return len(entries)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["flush"]:
+        sys.exit("usage: hook_metrics.py flush")
+    if get_protocol() not in CONTENT_TYPES:
+        sys.exit(f"unsupported OTLP protocol {get_protocol()!r}: use http/protobuf or http/json")
+    print(f"flushed {flush()} entries")
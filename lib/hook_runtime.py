@@ -0,0 +1,76 @@
+"""
+Shared runtime for the marketplace's hook scripts.
+
+Hooks start a fresh interpreter for every event, so this module only imports
+what every hook needs (os, sys, json) and offers lazy imports for the rest.
+Opt-in latency tracing lives next to it in hook_trace.
+Plugins reach it through their `lib` directory, a symlink to this one.
+"""
+
+import json
+import os
+import sys
+
+from hook_trace import span
+
+_ensured_dirs: set[str] = set()
+
+
+def lazy_import(name: str):
+    """Return module `name`, deferring its execution until an attribute is first used."""
+    if name in sys.modules:
+        return sys.modules[name]
+
+    import importlib.util
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def read_stdin() -> dict | None:
+    """Read and parse the hook's JSON payload from stdin, None if empty or invalid."""
+    with span("read_stdin") as current:
+        try:
+            data = sys.stdin.read()
+            current.args["bytes"] = len(data)
+            if not data.strip():
+                return None
+            payload = json.loads(data)
+        except json.JSONDecodeError:
+            return None
+        if isinstance(payload, dict) and "hook_event_name" in payload:
+            current.args["event"] = payload["hook_event_name"]
+        return payload
+
+
+def get_project_dir() -> str:
+    """Get project directory from env or cwd."""
+    return os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd())
+
+
+def ensure_dir(path: str) -> str:
+    """Create directory `path` once per process and return it."""
+    if path not in _ensured_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ensured_dirs.add(path)
+    return path
+
+
+def get_log_dir() -> str:
+    """Get the project's .claude/logs directory, creating it if needed."""
+    return ensure_dir(os.path.join(get_project_dir(), ".claude", "logs"))
+
+
+def emit(response: dict, exit_code: int = 0, stream=None):
+    """Write a hook response as a single JSON line and exit."""
+    stream = stream or sys.stdout
+    stream.write(json.dumps(response) + "\n")
+    stream.flush()
+    sys.exit(exit_code)
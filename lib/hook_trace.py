@@ -0,0 +1,322 @@
+"""
+Opt-in latency tracing for hook entry points.
+
+Set CLAUDE_HOOK_TRACE to enable it for every hook decorated with `traced`:
+
+- `1` / `chrome`: Chrome trace events appended to .claude/logs/hooks.trace.json,
+  loadable in Perfetto (ui.perfetto.dev) or chrome://tracing
+- `otlp`: one OTLP/JSON ExportTraceServiceRequest per hook run appended to
+  .claude/logs/hooks.trace.jsonl
+
+Each run records a root span for the hook, a startup span (process start to
+entry point, Linux only), stdin read, the hook's decision and every subprocess
+it spawns. With the variable unset, `traced` and `span` do no work and import nothing.
+"""
+
+import _thread
+import json
+import os
+import time
+
+TRACE_ENV = "CLAUDE_HOOK_TRACE"
+CHROME_TRACE_FILE = "hooks.trace.json"
+OTLP_TRACE_FILE = "hooks.trace.jsonl"
+
+_tracer = None
+
+
+def now_us() -> int:
+    """Wall clock in microseconds, comparable across hook processes."""
+    return time.time_ns() // 1000
+
+
+def new_id(size: int = 8) -> str:
+    return os.urandom(size).hex()
+
+
+def get_trace_format() -> str | None:
+    """Configured trace format ("chrome" or "otlp"), None when tracing is off."""
+    value = os.environ.get(TRACE_ENV, "").strip().lower()
+    if value in ("", "0", "false", "no", "off"):
+        return None
+    return "otlp" if value == "otlp" else "chrome"
+
+
+def process_start_us() -> int | None:
+    """Start time of this process (10ms resolution), None where /proc is unavailable."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesized command name; starttime is field 22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        age = max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+    return now_us() - int(age * 1_000_000)
+
+
+class Span:
+    """A timed region, recorded on the running hook's tracer when it closes."""
+
+    def __init__(self, name: str, args: dict):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        if _tracer is not None:
+            _tracer.open(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if _tracer is not None and hasattr(self, "span_id"):
+            if exc_type is not None and not issubclass(exc_type, SystemExit):
+                self.args["error"] = exc_type.__name__
+            _tracer.close(self)
+        return False
+
+
+def span(name: str, **args) -> Span:
+    """Context manager timing `name`; a no-op unless a traced hook is running."""
+    return Span(name, args)
+
+
+class Tracer:
+    """Collects the spans of one hook run and appends them to the trace file."""
+
+    def __init__(self, hook: str, trace_format: str):
+        self.hook = hook
+        self.format = trace_format
+        self.pid = os.getpid()
+        self.trace_id = new_id(16)
+        self.root_id = new_id()
+        self.events: list[dict] = []
+        self.stacks: dict[int, list[str]] = {}
+        self.pending: list = []
+
+    def parent(self) -> str:
+        """Innermost open span on the calling thread, else the root span."""
+        stack = self.stacks.get(_thread.get_ident())
+        return stack[-1] if stack else self.root_id
+
+    def open(self, current: Span):
+        current.span_id, current.parent_id = new_id(), self.parent()
+        current.start = now_us()
+        self.stacks.setdefault(_thread.get_ident(), []).append(current.span_id)
+
+    def close(self, current: Span):
+        stack = self.stacks.get(_thread.get_ident())
+        if stack and stack[-1] == current.span_id:
+            stack.pop()
+        self.add(current.name, current.start, now_us(), current.args, current.span_id, current.parent_id)
+
+    def add(self, name: str, start: int, end: int, args: dict, span_id: str = "", parent_id: str = ""):
+        self.events.append({
+            "name": name,
+            "start": start,
+            "end": end,
+            "tid": _thread.get_ident(),
+            "args": args,
+            "id": span_id or new_id(),
+            "parent": parent_id or self.parent(),
+        })
+
+    def chrome_events(self) -> list[dict]:
+        events = [{"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": self.hook}}]
+        for event in self.events:
+            events.append({
+                "name": event["name"],
+                "cat": "hook",
+                "ph": "X",
+                "ts": event["start"],
+                "dur": max(0, event["end"] - event["start"]),
+                "pid": self.pid,
+                "tid": event["tid"],
+                "args": event["args"],
+            })
+        return events
+
+    def otlp_request(self) -> dict:
+        spans = []
+        for event in self.events:
+            otlp_span = {
+                "traceId": self.trace_id,
+                "spanId": event["id"],
+                "name": event["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(event["start"] * 1000),
+                "endTimeUnixNano": str(event["end"] * 1000),
+                "attributes": [otlp_attribute(key, value) for key, value in event["args"].items()],
+            }
+            if event["id"] != self.root_id:
+                otlp_span["parentSpanId"] = event["parent"]
+            spans.append(otlp_span)
+        resource = [
+            otlp_attribute("service.name", "claude-code-hooks"),
+            otlp_attribute("hook.name", self.hook),
+            otlp_attribute("process.pid", self.pid),
+        ]
+        return {"resourceSpans": [{
+            "resource": {"attributes": resource},
+            "scopeSpans": [{"scope": {"name": "hook_trace"}, "spans": spans}],
+        }]}
+
+    def write(self):
+        """Append this run's spans to the trace file. Span args that aren't JSON are written as strings."""
+        import hook_runtime
+
+        log_dir = hook_runtime.get_log_dir()
+        if self.format == "otlp":
+            append(os.path.join(log_dir, OTLP_TRACE_FILE), json.dumps(self.otlp_request(), default=str) + "\n")
+        else:
+            path = os.path.join(log_dir, CHROME_TRACE_FILE)
+            ensure_chrome_header(path)
+            append(path, "".join(json.dumps(event, default=str) + ",\n" for event in self.chrome_events()))
+
+
+def otlp_attribute(key: str, value) -> dict:
+    """OTLP/JSON key-value attribute."""
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def append(path: str, content: str):
+    """Append `content` in a single O_APPEND write so concurrent hooks don't interleave."""
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, content.encode())
+    finally:
+        os.close(fd)
+
+
+def ensure_chrome_header(path: str):
+    """
+    Start a Chrome trace file with "[" if it doesn't exist yet.
+
+    The JSON array format allows the closing bracket to be omitted, so events
+    are appended forever. The header is written to a temp file and hard-linked
+    into place, so a concurrent hook never sees the file without it.
+    """
+    if os.path.exists(path):
+        return
+    tmp = f"{path}.{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write("[\n")
+    try:
+        os.link(tmp, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(tmp)
+
+
+def span_name(command: str) -> str:
+    """Span name for a subprocess: "subprocess <program>"."""
+    words = command.split()
+    return f"subprocess {os.path.basename(words[0])}" if words else "subprocess"
+
+
+def trace_subprocesses():
+    """Record a span per subprocess, from spawn until it is waited for (or the hook exits)."""
+    import subprocess
+
+    if getattr(subprocess.Popen, "traced", False):
+        return
+
+    class TracedPopen(subprocess.Popen):
+        traced = True
+
+        def __init__(self, args, *rest, **kwargs):
+            self.trace_start = now_us()
+            self.trace_parent = _tracer.parent() if _tracer else ""
+            self.trace_done = False
+            try:
+                super().__init__(args, *rest, **kwargs)
+            except OSError as exc:
+                if _tracer is not None:
+                    command = args if isinstance(args, str) else " ".join(map(str, args))
+                    failed = {"command": command[:200], "error": type(exc).__name__}
+                    _tracer.add(span_name(command), self.trace_start, now_us(), failed, parent_id=self.trace_parent)
+                raise
+            self.trace_spawned = now_us()
+            if _tracer is not None:
+                _tracer.pending.append(self)
+
+        def wait(self, timeout=None):
+            returncode = super().wait(timeout)
+            self.trace_finish(waited=True)
+            return returncode
+
+        def trace_finish(self, waited: bool):
+            if self.trace_done or _tracer is None:
+                return
+            self.trace_done = True
+            command = self.args if isinstance(self.args, str) else " ".join(map(str, self.args))
+            args = {
+                "command": command[:200],
+                "spawn_us": self.trace_spawned - self.trace_start,
+                "waited": waited,
+            }
+            if waited:
+                args["returncode"] = self.returncode
+            end = now_us() if waited else self.trace_spawned
+            _tracer.add(span_name(command), self.trace_start, end, args, parent_id=self.trace_parent)
+
+    subprocess.Popen = TracedPopen
+
+
+def traced(hook: str):
+    """
+    Decorate a hook's main() so its runs are traced when CLAUDE_HOOK_TRACE is set.
+
+    `hook` names the process in the trace, e.g. "command-safety/validate_command".
+    """
+    def decorator(main):
+        def wrapper(*args, **kwargs):
+            global _tracer
+            trace_format = get_trace_format()
+            if trace_format is None or _tracer is not None:
+                return main(*args, **kwargs)
+
+            entry = now_us()
+            started = process_start_us()
+            tracer = _tracer = Tracer(hook, trace_format)
+            trace_subprocesses()
+            tracer.stacks[_thread.get_ident()] = [tracer.root_id]
+            if started is not None:
+                tracer.add("startup", started, entry, {"source": "/proc"}, parent_id=tracer.root_id)
+            outcome = {}
+            try:
+                result = main(*args, **kwargs)
+                outcome["return"] = result
+                return result
+            except SystemExit as exc:
+                outcome["exit_code"] = exc.code if isinstance(exc.code, int) else 0
+                raise
+            except BaseException as exc:
+                outcome["error"] = type(exc).__name__
+                raise
+            finally:
+                for process in tracer.pending:
+                    process.trace_finish(waited=False)
+                outcome = {key: value for key, value in outcome.items() if value is not None}
+                tracer.add(hook, started or entry, now_us(), outcome, tracer.root_id, tracer.root_id)
+                _tracer = None
+                try:
+                    tracer.write()
+                except (OSError, TypeError, ValueError):
+                    pass  # tracing never fails the hook
+
+        wrapper.__name__ = main.__name__
+        wrapper.__doc__ = main.__doc__
+        wrapper.__wrapped__ = main
+        return wrapper
+
+    return decorator
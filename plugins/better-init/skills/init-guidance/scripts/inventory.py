@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Compact JSON inventory of a repository, for writing CLAUDE.md.
+
+Usage:
+    python3 inventory.py [--root DIR] [--top N] [--history N] [--no-cache]
+
+Reports languages by bytes, manifest files (and the sub-projects they
+mark), likely entry points, the largest and most frequently changed
+directories, and the test layout.
+
+In a git repository the file list comes from git, so .gitignore is honored
+exactly: tracked files with their blob sizes from `git ls-tree`, untracked
+files from `git ls-files --others --exclude-standard`. These and the
+history scan run concurrently. The result is cached per HEAD commit and set
+of untracked files under the git directory, so repeated runs on the same
+commit are instant.
+Outside git the tree is walked in parallel with a basic .gitignore matcher.
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# Bump when the inventory format changes, so stale caches are not reused
+CACHE_VERSION = 1
+CACHE_KEEP = 5
+
+LANGUAGES = {
+    ".py": "Python", ".pyi": "Python", ".ipynb": "Jupyter Notebook",
+    ".js": "JavaScript", ".mjs": "JavaScript", ".cjs": "JavaScript", ".jsx": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript", ".mts": "TypeScript", ".cts": "TypeScript",
+    ".go": "Go", ".rs": "Rust", ".java": "Java", ".kt": "Kotlin", ".kts": "Kotlin", ".scala": "Scala",
+    ".c": "C", ".h": "C", ".cc": "C++", ".cpp": "C++", ".cxx": "C++", ".hpp": "C++", ".m": "Objective-C",
+    ".cs": "C#", ".fs": "F#", ".swift": "Swift", ".rb": "Ruby", ".php": "PHP", ".pl": "Perl",
+    ".ex": "Elixir", ".exs": "Elixir", ".erl": "Erlang", ".hs": "Haskell", ".clj": "Clojure",
+    ".dart": "Dart", ".lua": "Lua", ".r": "R", ".jl": "Julia", ".zig": "Zig",
+    ".sh": "Shell", ".bash": "Shell", ".zsh": "Shell", ".ps1": "PowerShell",
+    ".sql": "SQL", ".html": "HTML", ".css": "CSS", ".scss": "SCSS", ".vue": "Vue", ".svelte": "Svelte",
+    ".tf": "HCL", ".proto": "Protocol Buffers", ".graphql": "GraphQL",
+}
+
+MANIFESTS = {
+    "package.json", "pyproject.toml", "setup.py", "setup.cfg", "requirements.txt", "Pipfile",
+    "go.mod", "Cargo.toml", "pom.xml", "build.gradle", "build.gradle.kts", "settings.gradle",
+    "Gemfile", "composer.json", "mix.exs", "pubspec.yaml", "Package.swift", "deno.json",
+    "CMakeLists.txt", "Makefile", "Dockerfile", "docker-compose.yml", "compose.yaml",
+    "pnpm-workspace.yaml", "lerna.json", "nx.json", "turbo.json",
+}
+MANIFEST_SUFFIXES = (".csproj", ".fsproj", ".sln")
+
+# Manifests that don't make their directory a sub-project on their own
+NON_PROJECT_MANIFESTS = {"Makefile", "Dockerfile", "docker-compose.yml", "compose.yaml", "requirements.txt"}
+
+ENTRY_POINT_NAMES = {
+    "main.py", "__main__.py", "app.py", "manage.py", "wsgi.py", "asgi.py", "cli.py",
+    "main.go", "main.rs", "lib.rs", "main.ts", "main.js", "index.ts", "index.js", "index.tsx",
+    "server.ts", "server.js", "app.ts", "app.js", "Main.java", "Program.cs", "main.c", "main.cpp",
+}
+
+TEST_DIRS = {"test", "tests", "__tests__", "spec", "specs", "e2e", "testing"}
+TEST_PATTERNS = ("test_*.py", "*_test.py", "*_test.go", "*.test.*", "*.spec.*", "*Test.java", "*Tests.cs", "*_spec.rb")
+TEST_CONFIGS = {
+    "conftest.py": "pytest", "pytest.ini": "pytest", "tox.ini": "tox",
+    "jest.config.js": "jest", "jest.config.ts": "jest", "vitest.config.ts": "vitest", "vitest.config.js": "vitest",
+    "playwright.config.ts": "playwright", "cypress.config.ts": "cypress", ".mocharc.json": "mocha",
+    "karma.conf.js": "karma", "phpunit.xml": "phpunit", ".rspec": "rspec",
+}
+
+# Never worth walking outside git
+SKIP_DIRS = {".git", "node_modules", ".venv", "venv", "__pycache__", ".tox", ".mypy_cache", "dist", "build", "target"}
+
+
+def git(root: str, *args: str) -> Optional[str]:
+    """Output of a git command in root, None if it fails."""
+    try:
+        result = subprocess.run(["git", *args], capture_output=True, text=True, cwd=root)
+    except OSError:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def list_untracked(root: str) -> Optional[str]:
+    """NUL-separated untracked files, honoring .gitignore."""
+    return git(root, "ls-files", "-z", "--others", "--exclude-standard", "--full-name")
+
+
+def list_git_files(root: str, history: int, untracked_out: Optional[str] = None) -> tuple[dict[str, int], Counter]:
+    """
+    (path -> size, path -> commit count) from git, running the git commands
+    concurrently. untracked_out is list_untracked's output if already taken.
+    """
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        tracked = pool.submit(git, root, "ls-tree", "-r", "-l", "-z", "--full-tree", "HEAD")
+        untracked = pool.submit(list_untracked, root) if untracked_out is None else None
+        log = pool.submit(git, root, "log", "--no-merges", "--format=", "--name-only", f"--max-count={history}")
+        tracked_out, log_out = tracked.result(), log.result()
+        if untracked is not None:
+            untracked_out = untracked.result()
+
+    sizes = {}
+    for record in (tracked_out or "").split("\0"):
+        meta, _, path = record.partition("\t")
+        fields = meta.split()
+        if len(fields) == 4 and fields[1] == "blob" and fields[3].isdigit():
+            sizes[path] = int(fields[3])
+    extra = [path for path in (untracked_out or "").split("\0") if path]
+    with ThreadPoolExecutor() as pool:
+        for path, size in zip(extra, pool.map(lambda p: file_size(os.path.join(root, p)), extra)):
+            sizes[path] = size
+    changes = Counter(line for line in (log_out or "").splitlines() if line)
+    return sizes, changes
+
+
+def file_size(path: str) -> int:
+    try:
+        return os.lstat(path).st_size
+    except OSError:
+        return 0
+
+
+def read_gitignore(directory: str) -> list[tuple[str, bool, bool]]:
+    """(pattern, anchored, directory only) for each rule of a .gitignore; negations are not supported."""
+    rules = []
+    try:
+        with open(os.path.join(directory, ".gitignore")) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith(("#", "!")):
+            continue
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        anchored = "/" in line
+        rules.append((line.lstrip("/"), anchored, dir_only))
+    return rules
+
+
+def ignored(relpath: str, name: str, is_dir: bool, rules: list[tuple[str, str, bool, bool]]) -> bool:
+    """Whether any inherited (base, pattern, anchored, dir only) rule ignores relpath."""
+    for base, pattern, anchored, dir_only in rules:
+        if dir_only and not is_dir:
+            continue
+        if anchored:
+            local = os.path.relpath(relpath, base) if base else relpath
+            # fnmatch's "*" crosses "/", so require the same depth unless the pattern has "**"
+            if ("**" in pattern or local.count("/") == pattern.count("/")) and fnmatch.fnmatch(local, pattern):
+                return True
+        elif fnmatch.fnmatch(name, pattern):
+            return True
+    return False
+
+
+def walk_files(root: str) -> dict[str, int]:
+    """path -> size for every file under root, walking directories in parallel."""
+    sizes: dict[str, int] = {}
+
+    def scan(relpath: str, rules: list) -> list[tuple[str, list]]:
+        directory = os.path.join(root, relpath)
+        rules = rules + [(relpath, *rule) for rule in read_gitignore(directory)]
+        subdirs = []
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return subdirs
+        for entry in entries:
+            child = os.path.join(relpath, entry.name) if relpath else entry.name
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if (is_dir and entry.name in SKIP_DIRS) or ignored(child, entry.name, is_dir, rules):
+                continue
+            if is_dir:
+                subdirs.append((child, rules))
+            elif entry.is_file(follow_symlinks=False):
+                sizes[child] = entry.stat(follow_symlinks=False).st_size
+        return subdirs
+
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+        pending = [pool.submit(scan, "", [])]
+        while pending:
+            future = pending.pop()
+            pending.extend(pool.submit(scan, *args) for args in future.result())
+    return sizes
+
+
+def directory_of(path: str, depth: int) -> str:
+    """The first `depth` components of path's directory, "." for top-level files."""
+    parts = path.split("/")[:-1][:depth]
+    return "/".join(parts) or "."
+
+
+def is_test_file(path: str) -> bool:
+    name = path.rsplit("/", 1)[-1]
+    return any(part in TEST_DIRS for part in path.split("/")[:-1]) or any(
+        fnmatch.fnmatch(name, pattern) for pattern in TEST_PATTERNS
+    )
+
+
+def package_entry_points(root: str, manifest: str) -> list[str]:
+    """Entry points declared by a package.json (main, bin) or pyproject.toml ([project.scripts])."""
+    directory = os.path.dirname(manifest)
+    entries = []
+    try:
+        if manifest.endswith("package.json"):
+            with open(os.path.join(root, manifest)) as f:
+                package = json.load(f)
+            bins = package.get("bin", {})
+            targets = [package.get("main")] + (list(bins.values()) if isinstance(bins, dict) else [bins])
+            entries = [os.path.normpath(os.path.join(directory, t)) for t in targets if isinstance(t, str)]
+        elif manifest.endswith("pyproject.toml"):
+            import tomllib
+
+            with open(os.path.join(root, manifest), "rb") as f:
+                scripts = tomllib.load(f).get("project", {}).get("scripts", {})
+            entries = [f"{name} = {target}" for name, target in scripts.items()]
+    except (OSError, ValueError, ImportError, AttributeError):
+        pass
+    return entries
+
+
+def build_inventory(root: str, sizes: dict[str, int], changes: Counter, top: int) -> dict:
+    """Summarize a file list (path -> size) and per-path change counts."""
+    languages: Counter = Counter()
+    dir_bytes: Counter = Counter()
+    dir_files: Counter = Counter()
+    manifests, entry_points, test_files = [], [], []
+    test_dirs: Counter = Counter()
+    frameworks = set()
+    for path, size in sizes.items():
+        name = path.rsplit("/", 1)[-1]
+        language = LANGUAGES.get(os.path.splitext(name)[1].lower())
+        if language:
+            languages[language] += size
+        directory = directory_of(path, 2)
+        dir_bytes[directory] += size
+        dir_files[directory] += 1
+        if name in MANIFESTS or name.endswith(MANIFEST_SUFFIXES):
+            manifests.append(path)
+        if name in ENTRY_POINT_NAMES and path.count("/") <= 3 and not is_test_file(path):
+            entry_points.append(path)
+        if name in TEST_CONFIGS:
+            frameworks.add(TEST_CONFIGS[name])
+        if language and is_test_file(path):
+            test_files.append(path)
+            test_dirs[directory] += 1
+        if name.endswith("_test.go"):
+            frameworks.add("go test")
+
+    manifests.sort(key=lambda p: (p.count("/"), p))
+    subprojects = sorted({
+        os.path.dirname(p) or "." for p in manifests if p.rsplit("/", 1)[-1] not in NON_PROJECT_MANIFESTS
+    })
+    for manifest in manifests[:50]:
+        entry_points.extend(package_entry_points(root, manifest))
+
+    changed_dirs: Counter = Counter()
+    for path, count in changes.items():
+        changed_dirs[directory_of(path, 2)] += count
+
+    total = sum(languages.values()) or 1
+    return {
+        "files": len(sizes),
+        "bytes": sum(sizes.values()),
+        "languages": {lang: round(n / total * 100, 1) for lang, n in languages.most_common(top)},
+        "manifests": manifests[:top * 5],
+        "subprojects": subprojects[:top * 5],
+        "entry_points": sorted(set(entry_points), key=lambda p: (p.count("/"), p))[:top * 2],
+        "largest_dirs": [
+            {"dir": d, "bytes": n, "files": dir_files[d]} for d, n in dir_bytes.most_common(top)
+        ],
+        "most_changed_dirs": [{"dir": d, "changes": n} for d, n in changed_dirs.most_common(top)],
+        "tests": {
+            "files": len(test_files),
+            "frameworks": sorted(frameworks),
+            "dirs": [{"dir": d, "files": n} for d, n in test_dirs.most_common(top)],
+        },
+    }
+
+
+def get_cache_path(root: str, top: int, history: int, untracked_out: str) -> Optional[str]:
+    """
+    Cache file for the current HEAD commit and untracked files (their paths
+    and sizes), None outside git or without commits.
+    """
+    output = git(root, "rev-parse", "--path-format=absolute", "--git-common-dir", "HEAD")
+    if output is None or len(output.split()) != 2:
+        return None
+    git_dir, head = output.split()
+    options = hashlib.sha1(f"{CACHE_VERSION}:{top}:{history}".encode())
+    for path in untracked_out.split("\0"):
+        if path:
+            options.update(f"{path}\0{file_size(os.path.join(root, path))}\0".encode())
+    return os.path.join(git_dir, "claude-inventory", f"{head}-{options.hexdigest()[:16]}.json")
+
+
+def save_cache(path: str, inventory: dict):
+    """Write the cache atomically and keep only the most recent few."""
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(inventory, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        cached = sorted(
+            (os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json")),
+            key=os.path.getmtime,
+        )
+        for old in cached[:-CACHE_KEEP]:
+            os.unlink(old)
+    except OSError:
+        pass
+
+
+def inventory(root: str, top: int = 10, history: int = 1000, use_cache: bool = True) -> dict:
+    """Inventory of the repository at root, from the cache when possible."""
+    root = os.path.abspath(root)
+    toplevel = git(root, "rev-parse", "--show-toplevel")
+    if toplevel is None:
+        return build_inventory(root, walk_files(root), Counter(), top)
+
+    root = toplevel.strip()
+    untracked_out = list_untracked(root) if use_cache else None
+    cache_path = get_cache_path(root, top, history, untracked_out) if untracked_out is not None else None
+    if cache_path:
+        try:
+            with open(cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    sizes, changes = list_git_files(root, history, untracked_out)
+    result = build_inventory(root, sizes, changes, top)
+    if cache_path:
+        save_cache(cache_path, result)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compact JSON inventory of a repository")
+    parser.add_argument("--root", default=".", help="repository directory (default: current directory)")
+    parser.add_argument("--top", type=int, default=10, help="entries per ranked list (default: 10)")
+    parser.add_argument("--history", type=int, default=1000, help="commits scanned for churn (default: 1000)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and don't write the per-HEAD cache")
+    args = parser.parse_args(argv)
+
+    result = inventory(args.root, args.top, args.history, use_cache=not args.no_cache)
+    print(json.dumps(result, separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
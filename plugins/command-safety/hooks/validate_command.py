@@ -9,7 +9,16 @@ import os
 import re
 import shlex
 import sys
-from datetime import datetime, timezone
+import time
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lib"))
+
+import hook_metrics  # noqa: E402
+from hook_runtime import emit, get_log_dir, lazy_import, read_stdin  # noqa: E402
+from hook_trace import span, traced  # noqa: E402
+
+datetime = lazy_import("datetime")
 
 
 def tokenize_command(command: str) -> list[str]:
@@ -162,18 +171,259 @@ DANGEROUS_PATTERNS = {
 }
 
 
+# Candidate patterns under evaluation (same syntax, plus a "name" per rule).
+# Shadow rules run on a sample of live commands but never deny: would-be
+# blocks and periodic per-rule cost summaries go to command-safety-shadow.log.
+# Promote a rule by moving it to DANGEROUS_PATTERNS once its log shows no
+# false positives.
+SHADOW_PATTERNS = {
+    "file_destruction": [
+        # find deleting from the filesystem or home root
+        {
+            "name": "find_delete_root",
+            "type": "regex",
+            "pattern": r"\bfind\s+(/|~)/?\s.*-delete\b",
+            "why": "find's path and -delete are separated by arbitrary predicates",
+        },
+    ],
+    "permission_change": [
+        # Recursive permission or owner change from the filesystem or home root
+        {
+            "name": "chmod_recursive_root",
+            "type": "command_flags_target",
+            "command": "chmod",
+            "requires_flags": ["R"],
+            "targets": ["/", "~"],
+        },
+        {
+            "name": "chown_recursive_root",
+            "type": "command_flags_target",
+            "command": "chown",
+            "requires_flags": ["R"],
+            "targets": ["/", "~"],
+        },
+    ],
+    "history_rewrite": [
+        # Force push to the main branch
+        {
+            "name": "git_force_push_main",
+            "type": "regex",
+            "pattern": r"\bgit\s+push\b(?=.*\s(-f|--force)\b)(?=.*\b(main|master)\b)",
+            "why": "Flag and branch may appear in either order",
+        },
+    ],
+}
+
+
+DEFAULT_SHADOW_SAMPLE = 0.1
+
+# Evaluation costs are aggregated in a stats file and summarized to the log this often
+SHADOW_SUMMARY_SECONDS = 3600
+
+# The shadow log is rotated to a single .1 file beyond this size
+SHADOW_LOG_MAX_BYTES = 1024 * 1024
+
+# Upper bounds (microseconds) of the evaluation cost histogram buckets
+SHADOW_BOUNDS_US = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 10000]
+
+
 def get_log_path():
     """Get the log file path, creating directory if needed."""
-    cwd = os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd())
-    log_dir = os.path.join(cwd, ".claude", "logs")
-    os.makedirs(log_dir, exist_ok=True)
-    return os.path.join(log_dir, "command-safety.log")
+    return os.path.join(get_log_dir(), "command-safety.log")
+
+
+def get_shadow_log_path():
+    """Get the shadow evaluation log path, creating directory if needed."""
+    return os.path.join(get_log_dir(), "command-safety-shadow.log")
+
+
+def get_shadow_stats_path():
+    """Get the pending shadow cost stats path, creating directory if needed."""
+    return os.path.join(get_log_dir(), "command-safety-shadow-stats.json")
+
+
+def get_shadow_sample_rate() -> float:
+    """Fraction of commands shadow rules are evaluated on, from CLAUDE_SAFETY_SHADOW_SAMPLE (default 0.1)."""
+    try:
+        return min(max(float(os.environ.get("CLAUDE_SAFETY_SHADOW_SAMPLE", DEFAULT_SHADOW_SAMPLE)), 0.0), 1.0)
+    except ValueError:
+        return DEFAULT_SHADOW_SAMPLE
+
+
+def sampled(rate: float) -> bool:
+    if rate >= 1:
+        return True
+    return int.from_bytes(os.urandom(4), "little") < rate * 2 ** 32
+
+
+def append_shadow_log(entry: dict):
+    """Append an entry to the shadow log, rotating it once it exceeds SHADOW_LOG_MAX_BYTES."""
+    path = get_shadow_log_path()
+    try:
+        if os.path.getsize(path) > SHADOW_LOG_MAX_BYTES:
+            os.replace(path, path + ".1")
+    except OSError:
+        pass
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def load_shadow_stats() -> Optional[dict]:
+    """Evaluation counts and cost buckets per rule since the last summary, None if there are none."""
+    try:
+        with open(get_shadow_stats_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def record_shadow_stats(rules: dict[str, dict]) -> Optional[dict]:
+    """
+    Add one evaluation's per-rule costs to the pending stats.
+
+    Returns the stats (and starts a new period) once they cover
+    SHADOW_SUMMARY_SECONDS. Concurrent hooks may lose an update; the stats
+    are for cost estimates, would-be denials are logged individually.
+    """
+    now = time.time()
+    stats = load_shadow_stats() or {"since": now, "rules": {}}
+    for name, result in rules.items():
+        rule = stats["rules"].setdefault(name, {"evaluated": 0, "buckets": [0] * (len(SHADOW_BOUNDS_US) + 1)})
+        rule["evaluated"] += 1
+        rule["buckets"][next((i for i, bound in enumerate(SHADOW_BOUNDS_US) if result["us"] <= bound),
+                             len(SHADOW_BOUNDS_US))] += 1
+    path = get_shadow_stats_path()
+    if now - stats["since"] >= SHADOW_SUMMARY_SECONDS:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        return stats
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stats, f)
+    os.replace(tmp_path, path)
+    return None
+
+
+def evaluate_shadow(command: str, enforced: str) -> list[dict]:
+    """
+    Run every shadow rule against a command and log the outcome.
+
+    A command is logged, with each rule's evaluation time, only when a rule
+    would have denied it. Costs of all evaluations are aggregated and logged
+    as one summary per SHADOW_SUMMARY_SECONDS. `enforced` is the category the
+    command was actually denied for ("" if allowed). Returns the rules that
+    matched.
+    """
+    rules = {}
+    matched = []
+    for category, patterns in SHADOW_PATTERNS.items():
+        for pattern in patterns:
+            start = time.perf_counter_ns()
+            match = match_pattern(pattern, command)
+            rules[pattern["name"]] = {"us": round((time.perf_counter_ns() - start) / 1000, 1), "match": match}
+            if match:
+                matched.append({"name": pattern["name"], "category": category})
+
+    # time.strftime rather than datetime, which would be imported for every command
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+    try:
+        if matched:
+            append_shadow_log({
+                "timestamp": timestamp,
+                "rules": rules,
+                "command": command[:500],
+                "action": "would_deny",
+                "enforced": enforced or None,
+            })
+        summary = record_shadow_stats(rules)
+        if summary:
+            since = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(summary["since"]))
+            append_shadow_log({
+                "timestamp": timestamp,
+                "action": "summary",
+                "since": since,
+                "bounds_us": SHADOW_BOUNDS_US,
+                "rules": summary["rules"],
+            })
+    except Exception:
+        pass
+    for rule in matched:
+        hook_metrics.counter("hook.command_safety.shadow_matches", rule=rule["name"])
+    return matched
+
+
+def bucket_percentile(buckets: list[int], fraction: float) -> Optional[float]:
+    """Upper bound (microseconds) of the bucket holding the given fraction of evaluations."""
+    target = fraction * sum(buckets)
+    seen = 0
+    for i, count in enumerate(buckets):
+        seen += count
+        if count and seen >= target:
+            return SHADOW_BOUNDS_US[i] if i < len(SHADOW_BOUNDS_US) else None
+    return None
+
+
+def shadow_report(lines, pending: Optional[dict] = None) -> dict:
+    """
+    Per-rule evaluations, would-be denials (overlapping enforced ones or not)
+    and cost from the shadow log, plus the `pending` stats not summarized yet.
+
+    p50_us and p99_us are histogram bucket upper bounds; None means beyond
+    the last bound.
+    """
+    report: dict = {}
+
+    def rule_stats(name):
+        return report.setdefault(name, {
+            "evaluated": 0, "would_deny": 0, "already_denied": 0, "buckets": [0] * (len(SHADOW_BOUNDS_US) + 1),
+        })
+
+    def add_summary(summary):
+        for name, counts in summary.get("rules", {}).items():
+            stats = rule_stats(name)
+            stats["evaluated"] += counts["evaluated"]
+            stats["buckets"] = [a + b for a, b in zip(stats["buckets"], counts["buckets"])]
+
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if entry.get("action") == "summary":
+            add_summary(entry)
+        elif entry.get("action") == "would_deny":
+            for name, result in entry.get("rules", {}).items():
+                if result["match"]:
+                    rule_stats(name)["would_deny"] += 1
+                    rule_stats(name)["already_denied"] += bool(entry.get("enforced"))
+    if pending:
+        add_summary(pending)
+    for stats in report.values():
+        buckets = stats.pop("buckets")
+        stats["p50_us"] = bucket_percentile(buckets, 0.5)
+        stats["p99_us"] = bucket_percentile(buckets, 0.99)
+    return report
+
+
+def read_shadow_report() -> dict:
+    """shadow_report over the rotated and current shadow logs and the pending stats."""
+    path = get_shadow_log_path()
+    lines = []
+    for log_path in (path + ".1", path):
+        try:
+            with open(log_path) as f:
+                lines.extend(f)
+        except OSError:
+            pass
+    return shadow_report(lines, load_shadow_stats())
 
 
 def log_blocked_command(command: str, pattern_category: str):
     """Log a blocked command attempt to the log file."""
     log_entry = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
         "command": command[:500],  # Truncate very long commands
         "pattern": pattern_category,
         "action": "denied",
@@ -199,47 +449,72 @@ def check_dangerous(command: str) -> tuple[bool, str]:
     return False, ""
 
 
-def deny(command: str, category: str, message: str):
-    """Output deny response and exit."""
-    log_blocked_command(command, category)
-    response = {
+def deny_response(message: str) -> dict:
+    """Deny response for a blocked command."""
+    return {
         "hookSpecificOutput": {"permissionDecision": "deny"},
         "systemMessage": message,
     }
-    print(json.dumps(response), file=sys.stderr)
-    sys.exit(2)
-
 
-def main():
-    # Read input from stdin
-    try:
-        input_data = json.loads(sys.stdin.read())
-    except json.JSONDecodeError:
-        # Can't parse input, allow by default
-        sys.exit(0)
 
+def handle(input_data: dict) -> Optional[dict]:
+    """
+    Check a PreToolUse payload; returns the deny response for a dangerous
+    command (after logging it), None to allow. Also run in-process by hook-dispatcher.
+    """
     # Extract command
     tool_input = input_data.get("tool_input", {})
     command = tool_input.get("command", "")
 
     if not command:
-        sys.exit(0)
+        return None
+
+    with span("decision") as decision:
+        # Check for dangerous patterns
+        is_dangerous, category = check_dangerous(command)
+        decision.args["denied"] = is_dangerous
+
+        if SHADOW_PATTERNS and sampled(get_shadow_sample_rate()):
+            with span("shadow") as shadow:
+                try:
+                    shadow.args["matched"] = len(evaluate_shadow(command, category))
+                except Exception:
+                    pass  # a broken candidate rule must not affect the decision
 
-    # Check for dangerous patterns
-    is_dangerous, category = check_dangerous(command)
+        if not is_dangerous:
+            hook_metrics.counter("hook.command_safety.checks", decision="allow")
+            return None
 
-    if is_dangerous:
         friendly_names = {
             "file_destruction": "Destructive file operation",
             "disk_overwrite": "Disk overwrite operation",
             "fork_bomb": "Fork bomb / resource exhaustion",
         }
         message = f"BLOCKED: {friendly_names.get(category, category)} detected. Command: {command[:100]}"
-        deny(command, category, message)
+        decision.args["category"] = category
+        log_blocked_command(command, category)
+        hook_metrics.counter("hook.command_safety.checks", decision="deny", category=category)
+        return deny_response(message)
+
+
+@traced("command-safety/validate_command")
+def main():
+    # Read input from stdin
+    input_data = read_stdin()
+    if input_data is None:
+        # Can't parse input, allow by default
+        sys.exit(0)
+
+    response = handle(input_data)
+    if response is not None:
+        emit(response, exit_code=2, stream=sys.stderr)
 
     # Command is safe, allow it
     sys.exit(0)
 
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:] == ["--shadow-report"]:
+        print(json.dumps(read_shadow_report(), indent=2))
+    else:
+        main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+hook-dispatcher: run every marketplace hook for an event in one process.
+
+Plugins listed in CLAUDE_HOOK_DISPATCH skip their own hook commands; this
+hook reads the event payload once, runs those plugins' in-process handlers
+(declared in their hooks/handlers.json) concurrently and merges the results.
+"""
+
+import importlib
+import json
+import os
+import re
+import sys
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lib"))
+
+import hook_runtime  # noqa: E402
+from hook_trace import span, traced  # noqa: E402
+
+futures = hook_runtime.lazy_import("concurrent.futures")
+
+DISPATCH_ENV = "CLAUDE_HOOK_DISPATCH"
+
+# Payload field each event's matcher is tested against
+MATCHER_FIELDS = {
+    "PreToolUse": "tool_name",
+    "PostToolUse": "tool_name",
+    "PermissionRequest": "tool_name",
+    "Notification": "notification_type",
+    "PreCompact": "trigger",
+    "SessionStart": "source",
+}
+
+# Strongest first
+PERMISSION_PRECEDENCE = ["deny", "ask", "allow"]
+
+# Shared lib/ modules every plugin bundles a copy of; handlers get the dispatcher's
+SHARED_MODULES = ("hook_metrics", "hook_runtime", "hook_trace")
+
+
+def get_dispatched_plugins() -> list[str]:
+    """Plugin names from CLAUDE_HOOK_DISPATCH (comma-separated)."""
+    return [name.strip() for name in os.environ.get(DISPATCH_ENV, "").split(",") if name.strip()]
+
+
+def get_plugin_root() -> str:
+    """This plugin's root: CLAUDE_PLUGIN_ROOT, else the first parent with .claude-plugin."""
+    root = os.environ.get("CLAUDE_PLUGIN_ROOT")
+    if root:
+        return root
+    path = os.path.dirname(os.path.abspath(__file__))
+    while not os.path.isdir(os.path.join(path, ".claude-plugin")) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    return path
+
+
+def find_plugin_root(name: str, dispatcher_root: str) -> Optional[str]:
+    """
+    Locate plugin `name` next to this one.
+
+    In a marketplace checkout plugins are siblings (plugins/<name>); in the
+    plugin cache each has versioned directories (<marketplace>/<name>/<version>),
+    of which the most recently installed one wins.
+    """
+    parent = os.path.dirname(os.path.normpath(dispatcher_root))
+    sibling = os.path.join(parent, name)
+    if os.path.isfile(os.path.join(sibling, "hooks", "handlers.json")):
+        return sibling
+    versions_dir = os.path.join(os.path.dirname(parent), name)
+    try:
+        versions = [os.path.join(versions_dir, entry) for entry in os.listdir(versions_dir)]
+    except OSError:
+        return None
+    versions = [path for path in versions if os.path.isfile(os.path.join(path, "hooks", "handlers.json"))]
+    return max(versions, key=os.path.getmtime, default=None)
+
+
+def matches(matcher: str, event: str, data: dict) -> bool:
+    """Whether a handler's matcher accepts the payload."""
+    field = MATCHER_FIELDS.get(event)
+    if not matcher or matcher == "*" or field is None:
+        return True
+    return re.fullmatch(matcher, data.get(field, "")) is not None
+
+
+def collect_handlers(data: dict) -> list[tuple[str, str, str]]:
+    """(plugin, import path, module) for each dispatched handler matching the event."""
+    event = data.get("hook_event_name", "")
+    dispatcher_root = get_plugin_root()
+    handlers = []
+    for name in get_dispatched_plugins():
+        plugin_root = find_plugin_root(name, dispatcher_root)
+        if plugin_root is None:
+            print(f"hook-dispatcher: plugin {name!r} not found", file=sys.stderr)
+            continue
+        with open(os.path.join(plugin_root, "hooks", "handlers.json")) as f:
+            registrations = json.load(f).get("handlers", {}).get(event, [])
+        for registration in registrations:
+            if matches(registration.get("matcher", ""), event, data):
+                path = os.path.join(plugin_root, registration["path"])
+                handlers.append((name, path, registration["module"]))
+    return handlers
+
+
+def load_handler(path: str, module: str):
+    """
+    Import `module` from `path` (a directory or bundle) and return its handle().
+
+    The shared lib modules are imported from the dispatcher's own lib first,
+    so every handler uses that one copy rather than whichever plugin's copy
+    happened to be imported first.
+    """
+    for name in SHARED_MODULES:
+        importlib.import_module(name)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(module).handle
+
+
+def run_handler(plugin: str, handler, data: dict) -> Optional[dict]:
+    """Run one handler; a failing handler is reported and treated as having no opinion."""
+    with span(f"handler {plugin}") as current:
+        try:
+            return handler(data)
+        except (Exception, SystemExit) as exc:
+            current.args["error"] = type(exc).__name__
+            print(f"hook-dispatcher: {plugin} handler failed: {exc!r}", file=sys.stderr)
+            return None
+
+
+def merge_responses(responses: list[Optional[dict]]) -> Optional[dict]:
+    """
+    Merge handler responses into one hook response.
+
+    A "block" decision beats "approve" (reasons are concatenated), a "deny"
+    permission beats "ask" beats "allow", and system messages and additional
+    context from every handler are kept.
+    """
+    responses = [response for response in responses if response]
+    if not responses:
+        return None
+    merged: dict = {}
+
+    decisions = [response.get("decision") for response in responses]
+    if "block" in decisions:
+        merged["decision"] = "block"
+        reasons = [r["reason"] for r in responses if r.get("decision") == "block" and r.get("reason")]
+        if reasons:
+            merged["reason"] = "\n\n".join(reasons)
+    elif "approve" in decisions:
+        merged["decision"] = "approve"
+
+    outputs = [response["hookSpecificOutput"] for response in responses if response.get("hookSpecificOutput")]
+    permissions = [o for o in outputs if o.get("permissionDecision") in PERMISSION_PRECEDENCE]
+    specific = {}
+    if permissions:
+        specific = dict(min(permissions, key=lambda o: PERMISSION_PRECEDENCE.index(o["permissionDecision"])))
+    contexts = [o["additionalContext"] for o in outputs if o.get("additionalContext")]
+    if contexts:
+        specific["additionalContext"] = "\n\n".join(contexts)
+    for output in outputs:
+        if "hookEventName" in output:
+            specific.setdefault("hookEventName", output["hookEventName"])
+    if specific:
+        merged["hookSpecificOutput"] = specific
+
+    messages = [response["systemMessage"] for response in responses if response.get("systemMessage")]
+    if messages:
+        merged["systemMessage"] = "\n".join(messages)
+    return merged or None
+
+
+@traced("hook-dispatcher/dispatch")
+def main():
+    data = hook_runtime.read_stdin()
+    if data is None:
+        sys.exit(0)
+
+    handlers = [(plugin, load_handler(path, module)) for plugin, path, module in collect_handlers(data)]
+    if len(handlers) == 1:
+        responses = [run_handler(handlers[0][0], handlers[0][1], data)]
+    elif handlers:
+        with futures.ThreadPoolExecutor(max_workers=len(handlers)) as pool:
+            responses = list(pool.map(lambda item: run_handler(item[0], item[1], data), handlers))
+    else:
+        responses = []
+
+    with span("decision") as decision:
+        response = merge_responses(responses)
+        decision.args["handlers"] = len(handlers)
+    if response is None:
+        sys.exit(0)
+    if response.get("hookSpecificOutput", {}).get("permissionDecision") == "deny":
+        # Same channel command-safety uses on its own: exit 2 blocks the tool call
+        hook_runtime.emit(response, exit_code=2, stream=sys.stderr)
+    hook_runtime.emit(response)
+
+
+if __name__ == "__main__":
+    main()
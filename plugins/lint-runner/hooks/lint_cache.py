@@ -0,0 +1,225 @@
+"""
+Content-addressed store of files that linted clean, shared across git worktrees.
+
+A file's key hashes its content (as a git blob id), its path, the full lint
+command, the linter's version and the lint configuration files. A marker
+file per clean key lives under the repository's common git directory, so
+every worktree of a repository sees the others' results. Markers are
+immutable and created idempotently: a lookup is a single utime() on the
+marker and concurrent writers need no locks. Each of the 256 marker buckets is capped,
+evicting the least recently used markers.
+
+A clean marker only holds for linters that check each file on its own, so
+the cache stays off for commands running a known cross-file checker.
+"""
+
+import functools
+import hashlib
+import os
+import shlex
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Iterable, Optional
+
+# Files whose content changes lint results: linter configuration and the
+# lockfiles pinning linter versions. Looked up in the lint directory and
+# every parent up to the project root.
+CONFIG_FILES = (
+    "pyproject.toml", "setup.cfg", "tox.ini", ".flake8", "ruff.toml", ".ruff.toml", ".pylintrc", "mypy.ini",
+    "uv.lock", "poetry.lock", "package.json", "package-lock.json", "pnpm-lock.yaml", "yarn.lock",
+    ".eslintrc", ".eslintrc.js", ".eslintrc.cjs", ".eslintrc.json", ".eslintrc.yml", ".eslintrc.yaml",
+    "eslint.config.js", "eslint.config.mjs", "eslint.config.cjs", "eslint.config.ts",
+)
+
+# Launchers and their subcommands that run the linter named after them
+WRAPPERS = {
+    "env", "exec", "npx", "bunx", "pnpx", "uvx", "pnpm", "yarn", "uv", "poetry", "pipx", "pdm", "hatch",
+    "run", "dlx", "python", "python3", "-m",
+}
+
+# Checkers whose result for a file depends on the files it imports
+CROSS_FILE_LINTERS = {"mypy", "dmypy", "pyright", "basedpyright", "pytype", "tsc", "vue-tsc", "flow"}
+
+DEFAULT_MAX_ENTRIES = 256_000
+BUCKETS = 256
+VERSION_TIMEOUT_SECONDS = 10
+
+
+def is_enabled(command: str = "") -> bool:
+    """CLAUDE_LINT_CACHE=1, unless `command` runs a cross-file checker."""
+    if os.environ.get("CLAUDE_LINT_CACHE") != "1":
+        return False
+    words = linter_words(command)
+    return not words or os.path.basename(words[-1]) not in CROSS_FILE_LINTERS
+
+
+def get_max_entries() -> int:
+    try:
+        return max(int(os.environ.get("CLAUDE_LINT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)), BUCKETS)
+    except ValueError:
+        return DEFAULT_MAX_ENTRIES
+
+
+def get_store_dir(project_dir: Path) -> Path:
+    """CLAUDE_LINT_CACHE_DIR, else lint-cache in the common git directory, else the project's logs."""
+    configured = os.environ.get("CLAUDE_LINT_CACHE_DIR")
+    if configured:
+        return Path(configured)
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--git-common-dir"], capture_output=True, text=True, cwd=project_dir,
+        )
+    except OSError:
+        result = None
+    if result is not None and result.returncode == 0 and result.stdout.strip():
+        return (project_dir / result.stdout.strip()).resolve() / "lint-cache"
+    return project_dir / ".claude" / "logs" / "lint-cache"
+
+
+def blob_id(data: bytes) -> str:
+    """Git blob id of file content."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def linter_words(command: str) -> list[str]:
+    """
+    Words of `command` up to and including the linter, past variable
+    assignments, options and launchers (`npx eslint`, `uv run ruff`, `env X=1 ruff`).
+    """
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        words = command.split()
+    for i, word in enumerate(words):
+        if word in ("&&", "||", ";", "|"):
+            break
+        if "=" in word.split("/")[0] or word.startswith("-") or os.path.basename(word) in WRAPPERS:
+            continue
+        return words[:i + 1]
+    return []
+
+
+@functools.lru_cache(maxsize=None)
+def linter_version(words: tuple[str, ...], cwd: Path) -> str:
+    """The linter's `--version` output, run the way the command runs it. Empty when it can't be told."""
+    try:
+        result = subprocess.run(
+            [*words, "--version"], capture_output=True, text=True, cwd=cwd, timeout=VERSION_TIMEOUT_SECONDS,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    return result.stdout.strip() if result.returncode == 0 else ""
+
+
+def executable_identity(program: str) -> str:
+    """Resolved path, size and mtime of a program on PATH."""
+    path = shutil.which(program)
+    if path is None:
+        return program
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path
+    return f"{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def linter_identity(command: str, cwd: Path) -> str:
+    """The linter's version, else its executable, so linter upgrades change keys."""
+    words = linter_words(command)
+    if not words:
+        return ""
+    return linter_version(tuple(words), cwd) or executable_identity(words[-1])
+
+
+def scope_key(command: str, cwd: Path, project_dir: Path) -> str:
+    """Hash of everything but the file itself: command, linter and configuration."""
+    digest = hashlib.sha256(f"{command}\0{linter_identity(command, cwd)}\0".encode())
+    digest.update(os.path.relpath(cwd, project_dir).encode() + b"\0")
+    directory = cwd
+    while True:
+        for name in CONFIG_FILES:
+            try:
+                content = (directory / name).read_bytes()
+            except OSError:
+                continue
+            digest.update(f"{os.path.relpath(directory / name, project_dir)}\0{blob_id(content)}\0".encode())
+        if directory == project_dir or directory.parent == directory:
+            break
+        directory = directory.parent
+    return digest.hexdigest()
+
+
+def file_key(scope: str, cwd: Path, path: str) -> Optional[str]:
+    try:
+        content = (cwd / path).read_bytes()
+    except OSError:
+        return None
+    return hashlib.sha256(f"{scope}\0{path}\0{blob_id(content)}".encode()).hexdigest()
+
+
+def marker_path(store: Path, key: str) -> Path:
+    return store / key[:2] / key
+
+
+class LintCache:
+    """Clean-file markers for one lint command in one directory."""
+
+    def __init__(self, command: str, cwd: Path, project_dir: Path):
+        self.cwd = cwd
+        self.store = get_store_dir(project_dir)
+        self.scope = scope_key(command, cwd, project_dir)
+
+    def key(self, path: str) -> Optional[str]:
+        return file_key(self.scope, self.cwd, path)
+
+    def is_clean(self, path: str) -> bool:
+        """Whether this exact content of `path` linted clean before; marks the entry as used."""
+        key = self.key(path)
+        if key is None:
+            return False
+        try:
+            os.utime(marker_path(self.store, key))
+            return True
+        except OSError:
+            return False
+
+    def mark_clean(self, paths: Iterable[str]):
+        """Record the current content of `paths` as clean and keep the touched buckets within bounds."""
+        buckets = set()
+        for path in paths:
+            key = self.key(path)
+            if key is None:
+                continue
+            marker = marker_path(self.store, key)
+            try:
+                marker.parent.mkdir(parents=True, exist_ok=True)
+                os.close(os.open(marker, os.O_WRONLY | os.O_CREAT, 0o644))
+            except OSError:
+                continue
+            buckets.add(marker.parent)
+        for bucket in buckets:
+            evict(bucket, get_max_entries() // BUCKETS)
+
+
+def last_used(entry: os.DirEntry) -> int:
+    try:
+        return entry.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def evict(bucket: Path, limit: int):
+    """Remove the least recently used markers of a bucket beyond `limit`, down to 90% of it."""
+    try:
+        entries = list(os.scandir(bucket))
+    except OSError:
+        return
+    if len(entries) <= limit:
+        return
+    entries.sort(key=last_used)
+    for entry in entries[:len(entries) - limit * 9 // 10]:
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            pass  # removed by a concurrent eviction
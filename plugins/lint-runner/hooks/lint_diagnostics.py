@@ -0,0 +1,185 @@
+"""Parse lint output into diagnostics and diff them between runs."""
+
+import bisect
+import hashlib
+import re
+from collections import Counter
+from typing import Callable, Optional
+
+# path:line[:col]: message - flake8, ruff, pylint, mypy, eslint (unix), gcc-style tools
+LOCATION_RE = re.compile(r"^(?P<file>[^\s:][^:]*?):(?P<line>\d+)(?::(?P<col>\d+))?:\s*(?P<message>.+)$")
+
+# eslint "stylish": a file header line followed by indented "line:col  severity  message  rule"
+STYLISH_RE = re.compile(r"^\s+(?P<line>\d+):(?P<col>\d+)\s+(?:error|warning)\s+(?P<message>.+?)\s{2,}(?P<rule>\S+)$")
+
+# Rule codes: leading "E501"/"C0114:", trailing "[attr-defined]" or "[Error/no-unused-vars]"
+LEADING_RULE_RE = re.compile(r"^(?P<rule>[A-Z]+[0-9]+)\b:?")
+TRAILING_RULE_RE = re.compile(r"\[(?:\w+/)?(?P<rule>[\w@/.-]+)\]\s*$")
+
+# Header lint-runner puts above the output of a lint unit outside the project root
+SECTION_RE = re.compile(r"^--- (?P<dir>.+) \(exit code -?\d+\) ---$")
+
+# Line references inside messages ("redefinition of unused 'x' from line 3")
+LINE_REF_RE = re.compile(r"\bline \d+")
+
+# New-file side of a unified diff hunk header
+HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(?P<start>\d+)(?:,(?P<count>\d+))? @@")
+
+
+def extract_rule(message: str) -> str:
+    """Rule code of a diagnostic message, or "" if none is recognizable."""
+    match = LEADING_RULE_RE.match(message) or TRAILING_RULE_RE.search(message)
+    return match.group("rule") if match else ""
+
+
+def fingerprint(file: str, rule: str, message: str) -> str:
+    """Line-insensitive identity of a diagnostic: file, rule and normalized message."""
+    normalized = LINE_REF_RE.sub("line N", " ".join(message.split()))
+    return hashlib.sha1(f"{file}\0{rule}\0{normalized}".encode()).hexdigest()[:16]
+
+
+def parse_diagnostics(output: str) -> list[dict]:
+    """
+    Extract diagnostics from lint output.
+
+    Each diagnostic is a dict with file, line, rule, message, the original
+    text and a fingerprint. Identical fingerprints are numbered by occurrence
+    so repeated diagnostics in one file stay distinct.
+    """
+    return parse_output(output)[0]
+
+
+def parse_output(output: str, resolve: Optional[Callable[[str, str], str]] = None) -> tuple[list[dict], list[str]]:
+    """
+    Split lint output into diagnostics (see parse_diagnostics) and the other
+    non-blank lines, in order: summaries, section headers, unparseable output.
+
+    With `resolve`, each diagnostic's file is replaced by resolve(section,
+    file), where section is the directory of the enclosing SECTION_RE header
+    ("" before any), and its text and fingerprint use the resolved path.
+    """
+    diagnostics = []
+    other: list[str] = []
+    section = ""
+    current_file: Optional[str] = None
+    header: Optional[int] = None  # index in `other` of a possible stylish file header
+    for raw in output.splitlines():
+        location = LOCATION_RE.match(raw)
+        stylish = STYLISH_RE.match(raw) if current_file else None
+        if location:
+            file, line, message = location.group("file"), location.group("line"), location.group("message")
+            rule, text = extract_rule(message), raw.strip()
+        elif stylish:
+            file, line, message = current_file, stylish.group("line"), stylish.group("message")
+            rule, text = stylish.group("rule"), f"{current_file}:{raw.strip()}"
+            if header is not None:
+                other[header] = None
+                header = None
+        else:
+            # A non-indented single token may be a stylish file header
+            stripped = raw.strip()
+            current_file = stripped if stripped and not raw[0].isspace() and " " not in stripped else None
+            header = len(other) if current_file else None
+            section_match = SECTION_RE.match(stripped)
+            if section_match:
+                section = section_match.group("dir")
+            if stripped:
+                other.append(raw.rstrip())
+            continue
+        if resolve is not None:
+            resolved = resolve(section, file)
+            if text.startswith(file):
+                text = resolved + text[len(file):]
+            file = resolved
+        diagnostics.append({
+            "file": file,
+            "line": int(line),
+            "rule": rule,
+            "message": message.strip(),
+            "text": text,
+            "fingerprint": fingerprint(file, rule, message),
+        })
+
+    seen: Counter = Counter()
+    for diagnostic in diagnostics:
+        seen[diagnostic["fingerprint"]] += 1
+        diagnostic["fingerprint"] = f"{diagnostic['fingerprint']}:{seen[diagnostic['fingerprint']]}"
+    return diagnostics, [line for line in other if line is not None]
+
+
+def diff_diagnostics(previous: list[dict], current: list[dict]) -> tuple[list[dict], list[dict], list[dict]]:
+    """Split diagnostics into (new, still_present, fixed) by fingerprint."""
+    previous_keys = {d["fingerprint"] for d in previous}
+    current_keys = {d["fingerprint"] for d in current}
+    new = [d for d in current if d["fingerprint"] not in previous_keys]
+    still_present = [d for d in current if d["fingerprint"] in previous_keys]
+    fixed = [d for d in previous if d["fingerprint"] not in current_keys]
+    return new, still_present, fixed
+
+
+def format_delta(new: list[dict], still_present: list[dict], fixed: list[dict], other: list[str] = ()) -> str:
+    """
+    Render a delta report: new and remaining diagnostics in full, fixed ones
+    counted per file, and the output lines that aren't diagnostics as is.
+    """
+    lines = [f"DIAGNOSTICS: {len(new)} new, {len(still_present)} still present, {len(fixed)} fixed since last run"]
+    if new:
+        lines += ["", "New:"] + [f"  {d['text']}" for d in new]
+    if still_present:
+        lines += ["", "Still present (already reported):"] + [f"  {d['text']}" for d in still_present]
+    if fixed:
+        lines += ["", "Fixed:"]
+        for file, count in sorted(Counter(d["file"] for d in fixed).items()):
+            lines.append(f"  {file}: {count}")
+    if other:
+        lines += ["", "Other output:"] + [f"  {line}" for line in other]
+    return "\n".join(lines)
+
+
+def merge_ranges(ranges: list[tuple[int, int]]) -> tuple[list[int], list[int]]:
+    """Sort and merge overlapping or adjacent (first, last) line ranges into (starts, ends)."""
+    starts: list[int] = []
+    ends: list[int] = []
+    for first, last in sorted(ranges):
+        if ends and first <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], last)
+        else:
+            starts.append(first)
+            ends.append(last)
+    return starts, ends
+
+
+def parse_changed_lines(diff: str) -> dict[str, tuple[list[int], list[int]]]:
+    """
+    Index the changed lines of a unified diff (`git diff -U0`) by file.
+
+    Each file maps to sorted, merged (starts, ends) lists of new-file line
+    ranges, so a line is looked up with one bisect. A pure deletion marks
+    the lines on both sides of it. Deleted files are left out.
+    """
+    ranges: dict[str, list[tuple[int, int]]] = {}
+    current: Optional[list[tuple[int, int]]] = None
+    in_header = False
+    for line in diff.splitlines():
+        if line.startswith("diff --git "):
+            in_header, current = True, None
+        elif in_header and line.startswith("+++ "):
+            path = line[4:]
+            current = ranges.setdefault(path[2:], []) if path.startswith("b/") else None
+        elif line.startswith("@@"):
+            in_header = False
+            match = HUNK_RE.match(line)
+            if match and current is not None:
+                start, count = int(match.group("start")), int(match.group("count") or 1)
+                current.append((start, start + count - 1) if count else (max(start, 1), start + 1))
+    return {path: merge_ranges(file_ranges) for path, file_ranges in ranges.items() if file_ranges}
+
+
+def in_changed_lines(index: dict[str, tuple[list[int], list[int]]], file: str, line: int) -> bool:
+    """Whether `line` of `file` falls in a changed range of a parse_changed_lines index."""
+    ranges = index.get(file)
+    if ranges is None:
+        return False
+    starts, ends = ranges
+    i = bisect.bisect_right(starts, line) - 1
+    return i >= 0 and line <= ends[i]
@@ -1,81 +1,1036 @@
 #!/usr/bin/env python3
 """lint-runner: Stop hook that runs linting and blocks until clean."""
 
+import fnmatch
+import heapq
 import json
 import os
-import subprocess
+import shlex
 import sys
-from datetime import datetime, timezone
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lib"))
+
+import hook_metrics  # noqa: E402
+import hook_runtime  # noqa: E402
+from hook_trace import span, traced  # noqa: E402
+
+# Only needed once a lint command is configured
+datetime = hook_runtime.lazy_import("datetime")
+futures = hook_runtime.lazy_import("concurrent.futures")
+hashlib = hook_runtime.lazy_import("hashlib")
+lint_cache = hook_runtime.lazy_import("lint_cache")
+lint_diagnostics = hook_runtime.lazy_import("lint_diagnostics")
+shutil = hook_runtime.lazy_import("shutil")
+subprocess = hook_runtime.lazy_import("subprocess")
+
+try:
+    import fcntl
+except ImportError:  # Windows: lint runs are not coordinated
+    fcntl = None
+
+try:
+    import resource
+except ImportError:  # Windows: resource usage is not reported
+    resource = None
 
 TIMEOUT_SECONDS = 60
 
+# Time a Stop run may spend linting, fixing and re-linting in all, within the 120 s hook timeout
+RUN_BUDGET_SECONDS = 100
+
+# Exit code of a timed-out lint run, as reported by timeout(1)
+TIMEOUT_EXIT_CODE = 124
+
+# Placeholder in CLAUDE_LINT_COMMAND that is expanded to a shard of lintable files
+FILES_PLACEHOLDER = "{files}"
+
+# Most bytes of quoted file names per shard, well within Linux's 128 KiB limit on one `sh -c` argument
+MAX_SHARD_BYTES = 64 * 1024
+
+# Files each known linter checks, used for {files} commands when CLAUDE_LINT_FILES is unset
+PYTHON_GLOBS = ["*.py", "*.pyi"]
+SCRIPT_GLOBS = ["*.js", "*.jsx", "*.mjs", "*.cjs", "*.ts", "*.tsx", "*.mts", "*.cts", "*.vue", "*.svelte"]
+LINTER_GLOBS = {
+    "ruff": PYTHON_GLOBS, "flake8": PYTHON_GLOBS, "pylint": PYTHON_GLOBS, "mypy": PYTHON_GLOBS,
+    "pyright": PYTHON_GLOBS, "black": PYTHON_GLOBS, "isort": PYTHON_GLOBS, "pycodestyle": PYTHON_GLOBS,
+    "eslint": SCRIPT_GLOBS, "tsc": ["*.ts", "*.tsx", "*.mts", "*.cts"], "biome": SCRIPT_GLOBS + ["*.json"],
+    "prettier": SCRIPT_GLOBS + ["*.css", "*.scss", "*.json", "*.md", "*.yml", "*.yaml"],
+    "stylelint": ["*.css", "*.scss", "*.less"], "shellcheck": ["*.sh", "*.bash"], "rubocop": ["*.rb"],
+    "golangci-lint": ["*.go"], "gofmt": ["*.go"], "ktlint": ["*.kt", "*.kts"], "swiftlint": ["*.swift"],
+    "markdownlint": ["*.md"], "yamllint": ["*.yml", "*.yaml"], "hadolint": ["Dockerfile", "*.Dockerfile"],
+}
+# Source files of any language, for {files} commands whose linter isn't known
+SOURCE_GLOBS = PYTHON_GLOBS + SCRIPT_GLOBS + [
+    "*.go", "*.rs", "*.java", "*.kt", "*.kts", "*.scala", "*.c", "*.h", "*.cc", "*.cpp", "*.hpp", "*.cs",
+    "*.swift", "*.rb", "*.php", "*.sh", "*.bash", "*.css", "*.scss", "*.less",
+]
+
+# Files marking a directory as a sub-project with its own lint configuration
+SUBPROJECT_MARKERS = ("pyproject.toml", "package.json", ".flake8")
+
+# Environment variables that change what a lint run does (part of the result key)
+LINT_ENV_VARS = (
+    "CLAUDE_LINT_COMMAND", "CLAUDE_LINT_FILES", "CLAUDE_LINT_SCOPE", "CLAUDE_LINT_FIX_COMMAND", "CLAUDE_LINT_NEW_CODE",
+    "CLAUDE_LINT_MAX_MEMORY", "CLAUDE_LINT_NICE", "CLAUDE_LINT_IONICE", "CLAUDE_LINT_MAX_PARALLEL",
+    "CLAUDE_LINT_SHARDS", "CLAUDE_LINT_CACHE", "CLAUDE_LINT_CACHE_DIR",
+)
+
+# How long a started background run counts as in progress before it may be started again
+DEFERRED_PENDING_SECONDS = 5 * TIMEOUT_SECONDS
+
 
 def get_project_dir() -> Path:
     """Get project directory from env or cwd."""
-    return Path(os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd()))
+    return Path(hook_runtime.get_project_dir())
 
 
 def get_log_path() -> Path:
     """Get lint log file path."""
-    log_dir = get_project_dir() / ".claude" / "logs"
-    log_dir.mkdir(parents=True, exist_ok=True)
-    return log_dir / "lint.log"
+    return Path(hook_runtime.get_log_dir()) / "lint.log"
+
+
+def get_lock_path() -> Path:
+    """Get path of the project-level lock serializing lint runs."""
+    return get_log_path().parent / "lint.lock"
 
 
-def run_lint(command: str) -> tuple[int, str]:
-    """Run lint command, return (exit_code, output)."""
+def get_result_path() -> Path:
+    """Get path of the last lint result shared between concurrent hooks."""
+    return get_log_path().parent / "lint-result.json"
+
+
+def get_pending_path() -> Path:
+    """Get path of the result key a deferred background run was started for."""
+    return get_log_path().parent / "lint-pending"
+
+
+def get_surfaced_path() -> Path:
+    """Get path of the result key whose failure was last reported in deferred mode."""
+    return get_log_path().parent / "lint-surfaced"
+
+
+def get_diagnostics_path() -> Path:
+    """Get path of the diagnostics reported by the previous failing run."""
+    return get_log_path().parent / "lint-diagnostics.json"
+
+
+def get_cost_path() -> Path:
+    """Get path of the per-file lint cost history used to balance shards."""
+    return get_log_path().parent / "lint-costs.json"
+
+
+def parse_size(value: str) -> Optional[int]:
+    """Size like "512M", "2G" or "1048576" (bytes) in KiB, None if unset or invalid."""
+    value = value.strip().upper().removesuffix("B")
+    units = {"K": 1, "M": 1024, "G": 1024 ** 2, "T": 1024 ** 3}
+    try:
+        if value and value[-1] in units:
+            kib = int(float(value[:-1]) * units[value[-1]])
+        else:
+            kib = int(value) // 1024
+    except ValueError:
+        return None
+    return kib if kib > 0 else None
+
+
+def get_nice() -> int:
+    """CPU niceness for lint processes from CLAUDE_LINT_NICE, default 0 (not reniced)."""
+    try:
+        return int(os.environ.get("CLAUDE_LINT_NICE", "0"))
+    except ValueError:
+        return 0
+
+
+def get_ionice_args() -> list[str]:
+    """ionice arguments for CLAUDE_LINT_IONICE ("idle" or "best-effort[:0-7]"), [] if unset."""
+    io_class, _, level = os.environ.get("CLAUDE_LINT_IONICE", "").strip().lower().partition(":")
+    if io_class == "idle":
+        return ["-c", "3"]
+    if io_class == "best-effort":
+        return ["-c", "2", "-n", level if level.isdigit() and int(level) <= 7 else "7"]
+    return []
+
+
+def limit_command(command: str) -> str:
+    """
+    Wrap a lint command so it and its children run with the configured limits.
+
+    Niceness and IO priority are applied with `nice` and `ionice` where those
+    exist; the memory cap is a per-process data segment limit (`ulimit -d`).
+    All of them are inherited by the linter's own child processes.
+    """
+    wrappers = []
+    nice = get_nice()
+    if nice > 0 and shutil.which("nice"):
+        wrappers += ["nice", "-n", str(nice)]
+    ionice = get_ionice_args()
+    if ionice and shutil.which("ionice"):
+        wrappers += ["ionice", *ionice]
+    memory_kib = parse_size(os.environ.get("CLAUDE_LINT_MAX_MEMORY", ""))
+    if not wrappers and not memory_kib:
+        return command
+    ulimit = f"ulimit -d {memory_kib} && " if memory_kib else ""
+    return f"{ulimit}exec {shlex.join(wrappers + ['sh', '-c', command])}"
+
+
+def get_max_parallel() -> Optional[int]:
+    """Cap on concurrently running lint processes from CLAUDE_LINT_MAX_PARALLEL."""
+    try:
+        return max(int(os.environ.get("CLAUDE_LINT_MAX_PARALLEL", "")), 1)
+    except ValueError:
+        return None
+
+
+def run_lint(command: str, cwd: Optional[Path] = None, deadline: Optional[float] = None) -> tuple[int, str]:
+    """
+    Run lint command (in the project directory by default), return (exit_code, output).
+
+    The run is cut off after TIMEOUT_SECONDS, or earlier at `deadline` (a time.monotonic() value).
+    A command that can't be started (such as one over the argument size limit) exits with 126.
+    """
+    timeout = TIMEOUT_SECONDS
+    if deadline is not None:
+        timeout = max(min(timeout, deadline - time.monotonic()), 0)
     try:
         result = subprocess.run(
-            command,
+            limit_command(command),
             shell=True,
             capture_output=True,
             text=True,
-            timeout=TIMEOUT_SECONDS,
-            cwd=get_project_dir(),
+            timeout=timeout,
+            cwd=cwd or get_project_dir(),
         )
         output = result.stdout + result.stderr
         return result.returncode, output
     except subprocess.TimeoutExpired:
-        return 1, f"Lint timed out after {TIMEOUT_SECONDS} seconds"
+        return TIMEOUT_EXIT_CODE, f"Lint timed out after {timeout:g} seconds"
+    except OSError as e:
+        return 126, f"Lint could not be started: {e}"
+
+
+def get_shard_count() -> int:
+    """Number of shards from CLAUDE_LINT_SHARDS, defaulting to the CPU count."""
+    try:
+        count = int(os.environ.get("CLAUDE_LINT_SHARDS", ""))
+    except ValueError:
+        count = os.cpu_count() or 1
+    return max(count, 1)
+
+
+def git_lines(args: list[str], cwd: Path) -> Optional[list[str]]:
+    """Run a NUL-separated git listing, return entries or None outside a git repo."""
+    try:
+        result = subprocess.run(["git", args[0], "-z", *args[1:]], capture_output=True, text=True, cwd=cwd)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return [line for line in result.stdout.split("\0") if line]
+
+
+def list_files(cwd: Path) -> list[str]:
+    """List files relative to cwd: git tracked + untracked (honoring .gitignore), else a directory walk."""
+    files = git_lines(["ls-files", "--cached", "--others", "--exclude-standard"], cwd)
+    if files is not None:
+        return files
+
+    files = []
+    for root, dirs, names in os.walk(cwd):
+        dirs[:] = [d for d in dirs if not d.startswith(".") and d != "node_modules"]
+        rel_root = os.path.relpath(root, cwd)
+        for name in names:
+            files.append(os.path.normpath(os.path.join(rel_root, name)))
+    return files
+
+
+def get_lint_globs(command: str) -> list[str]:
+    """
+    Globs selecting the files a {files} command lints.
+
+    The comma-separated CLAUDE_LINT_FILES when set. Otherwise the files of
+    the first known linter named in the command (LINTER_GLOBS), else
+    SOURCE_GLOBS, so docs, data and build artifacts are never passed.
+    """
+    configured = [p.strip() for p in os.environ.get("CLAUDE_LINT_FILES", "").split(",") if p.strip()]
+    if configured:
+        return configured
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        words = command.split()
+    for word in words:
+        globs = LINTER_GLOBS.get(os.path.basename(word))
+        if globs:
+            return globs
+    return SOURCE_GLOBS
+
+
+def list_lint_files(cwd: Optional[Path] = None, command: str = "") -> list[str]:
+    """List files relative to cwd (the project directory by default) that `command` lints, by get_lint_globs."""
+    project_dir = cwd or get_project_dir()
+    files = list_files(project_dir)
+
+    patterns = get_lint_globs(command)
+    matched = {
+        f for f in files
+        if any(fnmatch.fnmatch(f, p) or fnmatch.fnmatch(os.path.basename(f), p) for p in patterns)
+    }
+    # git lists deleted-but-tracked files until they are staged
+    return sorted(f for f in matched if (project_dir / f).is_file())
+
+
+def cost_scope(cwd: Path) -> str:
+    """Key of a lint working directory in the cost history."""
+    return os.path.relpath(cwd, get_project_dir())
+
+
+def load_all_costs() -> dict[str, dict[str, float]]:
+    """Load the cost history of every lint working directory."""
+    try:
+        return json.loads(get_cost_path().read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def load_costs(cwd: Path) -> dict[str, float]:
+    """Load per-file historical lint cost (seconds) for cwd, empty if unavailable."""
+    return load_all_costs().get(cost_scope(cwd), {})
+
+
+def save_costs(cwd: Path, costs: dict[str, float]):
+    """Persist per-file lint cost history for cwd."""
+    history = load_all_costs()
+    history[cost_scope(cwd)] = costs
+    try:
+        get_cost_path().write_text(json.dumps(history, sort_keys=True))
+    except OSError:
+        pass
+
+
+def estimate_weights(files: list[str], costs: dict[str, float], cwd: Path) -> dict[str, float]:
+    """
+    Estimate relative lint cost per file.
+
+    Files with history use their recorded cost. Others are sized by bytes,
+    scaled by the observed seconds-per-byte so both kinds are comparable.
+    """
+    sizes = {}
+    for f in files:
+        try:
+            sizes[f] = max((cwd / f).stat().st_size, 1)
+        except OSError:
+            sizes[f] = 1
+
+    known = [f for f in files if f in costs]
+    known_bytes = sum(sizes[f] for f in known)
+    rate = sum(costs[f] for f in known) / known_bytes if known_bytes else 1.0
+    return {f: costs[f] if f in costs else sizes[f] * rate for f in files}
+
+
+def plan_shards(files: list[str], count: int, weights: dict[str, float]) -> list[list[str]]:
+    """
+    Split files into `count` shards of balanced weight (greedy LPT), at most
+    one per file. Shards whose file list exceeds MAX_SHARD_BYTES are split
+    further, so a large change set can still be passed on one command line.
+    """
+    count = min(count, len(files))
+    if count <= 0:
+        return []
+
+    heap = [(0.0, i) for i in range(count)]
+    shards: list[list[str]] = [[] for _ in range(count)]
+    for f in sorted(files, key=lambda f: (-weights.get(f, 1.0), f)):
+        load, index = heapq.heappop(heap)
+        shards[index].append(f)
+        heapq.heappush(heap, (load + weights.get(f, 1.0), index))
+
+    return sorted((part for shard in shards for part in split_shard(sorted(shard))), key=lambda shard: shard[0])
+
+
+def split_shard(shard: list[str]) -> list[list[str]]:
+    """Split a shard into consecutive parts of at most MAX_SHARD_BYTES of quoted file names."""
+    parts: list[list[str]] = [[]]
+    size = 0
+    for f in shard:
+        length = len(shlex.quote(f).encode()) + 1
+        if parts[-1] and size + length > MAX_SHARD_BYTES:
+            parts.append([])
+            size = 0
+        parts[-1].append(f)
+        size += length
+    return parts
+
+
+def expand_files(command: str, files: list[str]) -> str:
+    """Substitute the shell-quoted file list for the {files} placeholder."""
+    return command.replace(FILES_PLACEHOLDER, " ".join(shlex.quote(f) for f in files))
+
+
+def run_units(command: str, units: list[tuple[Path, Optional[list[str]]]],
+              deadline: Optional[float] = None) -> list[tuple[int, str, float]]:
+    """
+    Run one lint process per unit in parallel, return (exit_code, output, seconds) per unit.
+
+    A unit is a (cwd, files) pair; files is None when the command has no {files} placeholder.
+    Every process is cut off at `deadline` (see run_lint).
+    """
+
+    def run_unit(unit: tuple[Path, Optional[list[str]]]) -> tuple[int, str, float]:
+        cwd, files = unit
+        start = time.monotonic()
+        expanded = command if files is None else expand_files(command, files)
+        exit_code, output = run_lint(expanded, cwd, deadline)
+        return exit_code, output, time.monotonic() - start
+
+    if not units:
+        return []
+    with futures.ThreadPoolExecutor(max_workers=min(len(units), get_max_parallel() or len(units))) as pool:
+        return list(pool.map(run_unit, units))
+
+
+def merge_results(results: list[tuple[int, str, float]]) -> tuple[int, str]:
+    """Merge shard results in shard order: highest exit code, concatenated output."""
+    exit_code = max((r[0] for r in results), default=0)
+    chunks = [r[1] if r[1].endswith("\n") else r[1] + "\n" for r in results if r[1]]
+    return exit_code, "".join(chunks)
+
+
+def plan_units(command: str, cwds: list[Path]) -> tuple[list[tuple[Path, Optional[list[str]]]],
+                                                        dict[Path, dict[str, float]]]:
+    """
+    Plan lint units for each working directory.
+
+    With a {files} placeholder each cwd is split into balanced shards, and the
+    file weights used are returned per cwd. Otherwise each cwd is one unit.
+    """
+    units = []
+    weights = {}
+    for cwd in cwds:
+        if FILES_PLACEHOLDER not in command:
+            units.append((cwd, None))
+            continue
+        files = list_lint_files(cwd, command)
+        if lint_cache.is_enabled(command):
+            cache = lint_cache.LintCache(command, cwd, get_project_dir())
+            files = [f for f in files if not cache.is_clean(f)]
+        weights[cwd] = estimate_weights(files, load_costs(cwd), cwd)
+        units.extend((cwd, shard) for shard in plan_shards(files, get_shard_count(), weights[cwd]))
+    return units, weights
+
+
+def update_costs(units: list[tuple[Path, Optional[list[str]]]], results: list[tuple[int, str, float]],
+                 weights: dict[Path, dict[str, float]]):
+    """Attribute each shard's wall time to its files in proportion to their weight."""
+    costs: dict[Path, dict[str, float]] = {cwd: {} for cwd in weights}
+    for (cwd, files), (_, _, seconds) in zip(units, results):
+        if files is None:
+            continue
+        total = sum(weights[cwd][f] for f in files) or 1.0
+        for f in files:
+            costs[cwd][f] = seconds * weights[cwd][f] / total
+    for cwd, cwd_costs in costs.items():
+        save_costs(cwd, cwd_costs)
+
+
+def clean_files(cwd: Path, files: list[str], exit_code: int, output: str) -> list[str]:
+    """
+    Files of a unit that linted clean: all of them if it passed, otherwise
+    those without a diagnostic (none when the output can't be parsed).
+    """
+    if exit_code == 0:
+        return files
+    diagnostics = lint_diagnostics.parse_diagnostics(output)
+    if not diagnostics:
+        return []
+    flagged = {os.path.normpath(os.path.relpath(d["file"], cwd) if os.path.isabs(d["file"]) else d["file"])
+               for d in diagnostics}
+    return [f for f in files if os.path.normpath(f) not in flagged]
+
+
+def record_clean(command: str, units: list[tuple[Path, Optional[list[str]]]],
+                 results: list[tuple[int, str, float]]):
+    """Add the files that linted clean to the shared lint cache (CLAUDE_LINT_CACHE=1)."""
+    if FILES_PLACEHOLDER not in command or not lint_cache.is_enabled(command):
+        return
+    clean: dict[Path, list[str]] = {}
+    for (cwd, files), (exit_code, output, _) in zip(units, results):
+        clean.setdefault(cwd, []).extend(clean_files(cwd, files or [], exit_code, output))
+    for cwd, files in clean.items():
+        lint_cache.LintCache(command, cwd, get_project_dir()).mark_clean(files)
+
+
+def label_results(units: list[tuple[Path, Optional[list[str]]]],
+                  results: list[tuple[int, str, float]]) -> list[tuple[int, str, float]]:
+    """Prefix output of units outside the project root with their directory."""
+    project_dir = get_project_dir()
+    labeled = []
+    for (cwd, _), (exit_code, output, seconds) in zip(units, results):
+        if cwd != project_dir:
+            output = f"--- {os.path.relpath(cwd, project_dir)} (exit code {exit_code}) ---\n{output}"
+        labeled.append((exit_code, output, seconds))
+    return labeled
+
+
+def run_lint_sharded(command: str, cwd: Optional[Path] = None) -> tuple[int, str]:
+    """
+    Run lint in cwd, expanding {files} across parallel shards when present.
+
+    Without the placeholder this is a single run_lint call.
+    """
+    units, weights = plan_units(command, [cwd or get_project_dir()])
+    results = run_units(command, units)
+    update_costs(units, results, weights)
+    record_clean(command, units, results)
+    return merge_results(results)
+
+
+def find_subprojects(files: list[str]) -> list[str]:
+    """Directories (relative to the project) holding a sub-project marker, excluding the root."""
+    dirs = {os.path.dirname(f) for f in files if os.path.basename(f) in SUBPROJECT_MARKERS}
+    dirs.discard("")
+    return sorted(dirs)
+
+
+def list_changed_files(cwd: Path) -> Optional[list[str]]:
+    """
+    Files changed against HEAD plus untracked files, relative to cwd. None outside git.
+
+    Lint-runner's own logs are excluded so writing them doesn't count as a change.
+    """
+    changed = git_lines(["diff", "--name-only", "--relative", "HEAD", "--", ".", ":(exclude).claude/logs"], cwd)
+    untracked = git_lines(["ls-files", "--others", "--exclude-standard", "--", ".", ":(exclude).claude/logs"], cwd)
+    if changed is None or untracked is None:
+        return None
+    return sorted(set(changed) | set(untracked))
+
+
+def find_owner(path: str, subprojects: list[str]) -> str:
+    """Deepest sub-project containing path, or "." for the project root."""
+    owner = "."
+    for subproject in subprojects:
+        if path.startswith(subproject + "/") and len(subproject) > len(owner):
+            owner = subproject
+    return owner
+
+
+def get_affected_packages() -> Optional[list[str]]:
+    """
+    Sub-projects owning changed files, as paths relative to the project.
+
+    Returns None when changes can't be determined (not a git repo).
+    """
+    project_dir = get_project_dir()
+    changed = list_changed_files(project_dir)
+    if changed is None:
+        return None
+    subprojects = find_subprojects(list_files(project_dir))
+    return sorted({find_owner(path, subprojects) for path in changed})
+
+
+def get_lint_dirs() -> list[Path]:
+    """
+    Directories to run lint in according to CLAUDE_LINT_SCOPE.
+
+    "project" (default) is the project directory. "packages" is every
+    sub-project owning a changed file (empty when nothing changed).
+    """
+    project_dir = get_project_dir()
+    if os.environ.get("CLAUDE_LINT_SCOPE", "project") != "packages":
+        return [project_dir]
+
+    packages = get_affected_packages()
+    if packages is None:
+        return [project_dir]
+    return [project_dir / package for package in packages]
+
+
+def unit_paths(command: str, units: list[tuple[Path, Optional[list[str]]]]) -> list[str]:
+    """
+    Files of lint units relative to the project. A unit without a file list
+    stands for the files `command` lints in its directory.
+    """
+    project_dir = get_project_dir()
+    paths = []
+    for cwd, files in units:
+        prefix = os.path.relpath(cwd, project_dir)
+        for f in list_lint_files(cwd, command) if files is None else files:
+            paths.append(os.path.normpath(os.path.join(prefix, f)))
+    return paths
 
 
-def write_failure_log(command: str, exit_code: int, output: str):
-    """Write lint failure to log file."""
+def snapshot_files(paths: list[str]) -> dict[str, tuple[int, int]]:
+    """Size and mtime of project files, keyed by path relative to the project."""
+    project_dir = get_project_dir()
+    snapshot = {}
+    for f in paths:
+        try:
+            stat = (project_dir / f).stat()
+        except OSError:
+            continue
+        snapshot[f] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def run_fix(fix_command: str, failing: list[tuple[Path, Optional[list[str]]]],
+            deadline: Optional[float] = None) -> set[str]:
+    """
+    Run the auto-fix command over the failing lint units.
+
+    Failing shards are reused directly when both commands take {files};
+    otherwise the fixer runs over each failing unit's directory. Returns the
+    files (relative to the project) the fixer modified, among the files it
+    was given or, without {files}, the files it lints in those directories.
+    """
+    if FILES_PLACEHOLDER in fix_command and all(files is not None for _, files in failing):
+        fix_units = failing
+    else:
+        fix_units, _ = plan_units(fix_command, sorted({cwd for cwd, _ in failing}))
+
+    paths = unit_paths(fix_command, fix_units)
+    before = snapshot_files(paths)
+    run_units(fix_command, fix_units, deadline)
+    after = snapshot_files(paths)
+    return {f for f in before.keys() | after.keys() if before.get(f) != after.get(f)}
+
+
+def get_new_code_base() -> Optional[str]:
+    """
+    Base the changed lines are taken against, from CLAUDE_LINT_NEW_CODE.
+
+    "1" or "HEAD" is HEAD (uncommitted changes). Any other ref means its
+    merge base with HEAD (everything on the branch). None when unset or "0".
+    """
+    value = os.environ.get("CLAUDE_LINT_NEW_CODE", "").strip()
+    if value in ("", "0"):
+        return None
+    return "HEAD" if value.upper() in ("1", "HEAD") else value
+
+
+def resolve_new_code_base() -> Optional[str]:
+    """The new-code base as "HEAD" or a merge base SHA. None when the mode is off or the ref can't be resolved."""
+    base = get_new_code_base()
+    if base is None or base == "HEAD":
+        return base
+    try:
+        merge_base = subprocess.run(
+            ["git", "merge-base", base, "HEAD"], capture_output=True, text=True, cwd=get_project_dir(),
+        )
+    except OSError:
+        return None
+    return merge_base.stdout.strip() or None if merge_base.returncode == 0 else None
+
+
+def get_changed_lines() -> Optional[dict[str, tuple[list[int], list[int]]]]:
+    """
+    Changed line ranges of project files against the new-code base, keyed
+    by path relative to the project. Untracked files count as changed
+    throughout. None when the mode is off or the diff can't be taken.
+    """
+    base = resolve_new_code_base()
+    if base is None:
+        return None
+    project_dir = get_project_dir()
+    try:
+        diff = subprocess.run(
+            ["git", "-c", "core.quotePath=false", "diff", "-U0", "--no-color", "--no-ext-diff", "--relative",
+             "--src-prefix=a/", "--dst-prefix=b/", base, "--"],
+            capture_output=True, text=True, errors="replace", cwd=project_dir,
+        )
+    except OSError:
+        return None
+    untracked = git_lines(["ls-files", "--others", "--exclude-standard"], project_dir)
+    if diff.returncode != 0 or untracked is None:
+        return None
+    index = lint_diagnostics.parse_changed_lines(diff.stdout)
+    for path in untracked:
+        index[path] = ([1], [sys.maxsize])
+    return index
+
+
+def project_path(cwd: Path, file: str) -> str:
+    """Path of a diagnostic's file (relative to the unit's directory, or absolute) relative to the project."""
+    project_dir = get_project_dir()
+    if os.path.isabs(file):
+        return os.path.normpath(os.path.relpath(file, project_dir))
+    return os.path.normpath(os.path.join(os.path.relpath(cwd, project_dir), file))
+
+
+def filter_new_code(units: list[tuple[Path, Optional[list[str]]]], results: list[tuple[int, str, float]],
+                    changed_lines: Optional[dict]) -> list[tuple[int, str, float]]:
+    """
+    Keep only the diagnostics on changed lines (CLAUDE_LINT_NEW_CODE).
+
+    A failing unit whose diagnostics are all on unchanged lines passes.
+    Output that can't be parsed into diagnostics is kept as is.
+    """
+    if changed_lines is None:
+        return results
+    filtered = []
+    for (cwd, _), (exit_code, output, seconds) in zip(units, results):
+        diagnostics = lint_diagnostics.parse_diagnostics(output) if exit_code != 0 else []
+        if diagnostics:
+            new = [d for d in diagnostics
+                   if lint_diagnostics.in_changed_lines(changed_lines, project_path(cwd, d["file"]), d["line"])]
+            note = f"({len(diagnostics) - len(new)} diagnostic(s) on unchanged lines ignored)"
+            if new:
+                output = "\n".join([d["text"] for d in new] + ["", note]) + "\n"
+            else:
+                exit_code, output = 0, note + "\n"
+        filtered.append((exit_code, output, seconds))
+    return filtered
+
+
+def unit_touched(unit: tuple[Path, Optional[list[str]]], touched: set[str]) -> bool:
+    """Whether any touched file (relative to the project) belongs to the lint unit."""
+    cwd, files = unit
+    prefix = os.path.relpath(cwd, get_project_dir())
+    if files is not None:
+        return any(os.path.normpath(os.path.join(prefix, f)) in touched for f in files)
+    # The project root holds every touched file, but only if there is one
+    return any(prefix == "." or f.startswith(prefix + "/") for f in touched)
+
+
+def split_touched(unit: tuple[Path, Optional[list[str]]], result: tuple[int, str, float],
+                  touched: set[str]) -> list[tuple[tuple[Path, Optional[list[str]]], Optional[tuple]]]:
+    """
+    Split a lint unit after a fix into (unit, result) parts, with None for the
+    parts to lint again.
+
+    A {files} unit keeps its result for the files the fixer left alone and
+    re-lints only the touched ones, as long as its output can be attributed
+    to files. Other touched units are linted again whole.
+    """
+    if not unit_touched(unit, touched):
+        return [(unit, result)]
+    cwd, files = unit
+    exit_code, output, seconds = result
+    diagnostics = lint_diagnostics.parse_diagnostics(output) if exit_code != 0 else []
+    if files is None or (exit_code != 0 and not diagnostics):
+        return [(unit, None)]
+
+    prefix = os.path.relpath(cwd, get_project_dir())
+    changed = [f for f in files if os.path.normpath(os.path.join(prefix, f)) in touched]
+    kept = [f for f in files if f not in changed]
+    parts = [((cwd, changed), None)]
+    if kept:
+        remaining = [d for d in diagnostics if project_path(cwd, d["file"]) not in touched]
+        output = "".join(d["text"] + "\n" for d in remaining)
+        parts.append(((cwd, kept), (exit_code if remaining else 0, output, seconds)))
+    return parts
+
+
+def is_transient(exit_code: int) -> bool:
+    """
+    Whether a unit's exit code says nothing about the code: a timeout, a
+    linter that can't run (126, 127) or one killed by a signal.
+
+    Any other failure counts, whether or not its output can be parsed.
+    """
+    return exit_code < 0 or exit_code in (TIMEOUT_EXIT_CODE, 126, 127) or exit_code > 128
+
+
+def run_lint_scoped(command: str) -> tuple[int, str]:
+    """
+    Run lint in the directories selected by CLAUDE_LINT_SCOPE.
+
+    When lint fails and CLAUDE_LINT_FIX_COMMAND is set, the fixer runs first
+    and only the units containing files it modified are linted again, as
+    long as a full TIMEOUT_SECONDS of the run's budget is left for it. With
+    CLAUDE_LINT_NEW_CODE, only diagnostics on changed lines fail a unit.
+    """
+    exit_code, output, _, _ = lint_scoped(command)
+    return exit_code, output
+
+
+def lint_scoped(command: str, fix: bool = True, deadline: Optional[float] = None) -> tuple[int, str, bool, bool]:
+    """
+    run_lint_scoped, also telling whether any unit's failure was transient
+    (see is_transient) and whether the fixer modified files. With fix=False
+    the fix pass is skipped.
+
+    Lint, fix and re-lint all end by `deadline` (a time.monotonic() value,
+    RUN_BUDGET_SECONDS from now by default).
+    """
+    if deadline is None:
+        deadline = time.monotonic() + RUN_BUDGET_SECONDS
+    units, weights = plan_units(command, get_lint_dirs())
+    results = run_units(command, units, deadline)
+    update_costs(units, results, weights)
+    reported = filter_new_code(units, results, get_changed_lines())
+
+    fix_command = os.environ.get("CLAUDE_LINT_FIX_COMMAND") if fix else None
+    failing = [unit for unit, result in zip(units, reported) if result[0] != 0]
+    if deadline - time.monotonic() < TIMEOUT_SECONDS:
+        # Report the failures as they are rather than have the hook killed mid-fix
+        fix_command = None
+    if not fix_command or not failing:
+        record_clean(command, units, results)
+        return (*merge_results(label_results(units, reported)), any(is_transient(r[0]) for r in reported), False)
+
+    touched = run_fix(fix_command, failing, deadline)
+    parts = [part for unit, result in zip(units, results) for part in split_touched(unit, result, touched)]
+    units = [unit for unit, _ in parts]
+    results = [result for _, result in parts]
+    rerun = [i for i, result in enumerate(results) if result is None]
+    for i, result in zip(rerun, run_units(command, [units[i] for i in rerun], deadline)):
+        results[i] = result
+    record_clean(command, units, results)
+
+    # The fixer may have moved the changed lines
+    reported = filter_new_code(units, results, get_changed_lines())
+    exit_code, output = merge_results(label_results(units, reported))
+    summary = f"Auto-fix ({fix_command}) modified {len(touched)} file(s), re-linted {len(rerun)} unit(s)\n"
+    return exit_code, summary + output, any(is_transient(r[0]) for r in reported), bool(touched)
+
+
+def atomic_write(path: Path, content: str):
+    """Write content via a temp file and rename so readers never see partial files."""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(content)
+    os.replace(tmp_path, path)
+
+
+def get_tree_state() -> Optional[str]:
+    """
+    Fingerprint of the working tree: HEAD plus every changed or untracked file's
+    status, size and mtime. None outside a git repository.
+
+    Lint-runner's own logs are excluded so writing them doesn't change the state.
+    """
+    project_dir = get_project_dir()
+    try:
+        head = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel", "HEAD"],
+            capture_output=True, text=True, cwd=project_dir,
+        )
+        status = subprocess.run(
+            ["git", "status", "--porcelain=v1", "-z", "--untracked-files=all",
+             "--", ".", ":(exclude).claude/logs"],
+            capture_output=True, text=True, cwd=project_dir,
+        )
+    except OSError:
+        return None
+    if head.returncode != 0 or status.returncode != 0:
+        return None
+
+    toplevel, _, head_sha = head.stdout.strip().partition("\n")
+    digest = hashlib.sha256(head_sha.encode())
+    records = iter(status.stdout.split("\0"))
+    for record in records:
+        if not record:
+            continue
+        digest.update(record.encode() + b"\0")
+        if record[0] in "RC":
+            next(records, None)  # rename/copy source path
+        try:
+            stat = os.stat(os.path.join(toplevel, record[3:]))
+            digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+        except OSError:
+            digest.update(b"missing")
+    return digest.hexdigest()
+
+
+def get_result_key() -> Optional[str]:
+    """Key identifying a lint run: tree state plus lint configuration."""
+    tree_state = get_tree_state()
+    if tree_state is None:
+        return None
+    config = {name: os.environ.get(name) for name in LINT_ENV_VARS}
+    # A branch base moves when the ref is fetched or rebased onto
+    config["new_code_base"] = resolve_new_code_base()
+    config = json.dumps(config, sort_keys=True)
+    return hashlib.sha256(f"{tree_state}\0{config}".encode()).hexdigest()
+
+
+def load_result(key: Optional[str], since: Optional[float] = None) -> Optional[tuple[int, str, bool]]:
+    """
+    Load the stored lint result, (exit_code, output, transient), if it was
+    produced for key. A transient failure only counts if it finished at or
+    after `since` (a time.time() value), and never when since is None.
+    """
+    if key is None:
+        return None
+    try:
+        result = json.loads(get_result_path().read_text())
+    except (OSError, ValueError):
+        return None
+    if result.get("key") != key:
+        return None
+    transient = result.get("transient", False)
+    if transient and (since is None or result.get("finished", 0) < since):
+        return None
+    return result["exit_code"], result["output"], transient
+
+
+def save_result(key: Optional[str], exit_code: int, output: str, transient: bool = False):
+    """Store a lint result so concurrent and repeated hooks can reuse it."""
+    if key is None:
+        return
+    result = {"key": key, "exit_code": exit_code, "output": output, "transient": transient, "finished": time.time()}
+    atomic_write(get_result_path(), json.dumps(result))
+
+
+@contextmanager
+def lint_lock():
+    """Hold the project-level lint lock (blocking) for the duration of the block."""
+    if fcntl is None:
+        yield
+        return
+    with open(get_lock_path(), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def run_lint_single_flight(command: str, fix: bool = True) -> tuple[int, str]:
+    """
+    Run lint at most once per tree state across concurrent hooks.
+
+    The first hook to take the lock runs lint and stores its result. Hooks
+    waiting on the lock then find that result and reuse it, along with the
+    failure log it wrote. The log is only updated while the lock is held.
+
+    A transient failure (a timeout, a missing or crashed linter) is only
+    reused by hooks that were already waiting for it; a later hook lints
+    again rather than blocking on it forever. fix=False skips the
+    CLAUDE_LINT_FIX_COMMAND pass.
+    """
+    start = time.monotonic()
+    waiting_since = time.time()
+    usage = None
+    with lint_lock():
+        key = get_result_key()
+        result = load_result(key, since=waiting_since)
+        fresh = result is None
+        if fresh:
+            before = get_child_usage()
+            exit_code, output, transient, fixed = lint_scoped(command, fix, start + RUN_BUDGET_SECONDS)
+            usage = usage_since(before)
+            if fixed:
+                # The result describes the tree as the fixer left it
+                key = get_result_key()
+            save_result(key, exit_code, output, transient)
+        else:
+            exit_code, output, _ = result
+
+        if exit_code == 0:
+            clear_failure_log()
+        elif fresh or not get_log_path().exists():
+            write_failure_log(command, exit_code, output, usage)
+
+    outcome = "pass" if exit_code == 0 else "fail"
+    hook_metrics.counter("hook.lint.runs", result=outcome, reused=not fresh)
+    if fresh:
+        hook_metrics.histogram("hook.lint.duration", time.monotonic() - start, result=outcome)
+    if usage:
+        hook_metrics.histogram("hook.lint.cpu_time", usage["cpu_seconds"], result=outcome)
+    return exit_code, output
+
+
+def get_child_usage() -> Optional[tuple[float, float, int]]:
+    """(user seconds, system seconds, max RSS) of the child processes waited for so far."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime, usage.ru_stime, usage.ru_maxrss
+
+
+def usage_since(before: Optional[tuple[float, float, int]]) -> Optional[dict]:
+    """
+    CPU time used by child processes since `before`, and their peak RSS.
+
+    The peak is that of the largest single process among the linters and
+    their children (the kernel keeps a maximum, not a per-run value).
+    """
+    after = get_child_usage()
+    if before is None or after is None:
+        return None
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak_kib = after[2] / 1024 if sys.platform == "darwin" else after[2]
+    user, system = after[0] - before[0], after[1] - before[1]
+    return {
+        "user_seconds": round(user, 2),
+        "system_seconds": round(system, 2),
+        "cpu_seconds": round(user + system, 2),
+        "peak_rss_mib": round(peak_kib / 1024, 1),
+    }
+
+
+def format_usage(usage: dict) -> str:
+    return (
+        f"peak RSS {usage['peak_rss_mib']} MiB, CPU {usage['cpu_seconds']}s "
+        f"({usage['user_seconds']}s user, {usage['system_seconds']}s system)"
+    )
+
+
+def load_previous_diagnostics() -> Optional[list[dict]]:
+    """Diagnostics of the previous failing run, None if there was none."""
+    try:
+        return json.loads(get_diagnostics_path().read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def report_delta(output: str) -> str:
+    """
+    Reduce lint output to the change since the previous failing run.
+
+    Diagnostics are matched across runs by project-relative file, rule and
+    a line-insensitive fingerprint. Lines that aren't diagnostics (the
+    auto-fix summary, package headers, unparseable output) are kept. The
+    full output is kept on the first failure, or when no diagnostics can
+    be parsed from it.
+    """
+    project_dir = get_project_dir()
+    current, other = lint_diagnostics.parse_output(output, lambda section, file: project_path(project_dir / section, file))
+    previous = load_previous_diagnostics()
+    atomic_write(get_diagnostics_path(), json.dumps(current))
+    if previous is None or not current:
+        return output
+    return lint_diagnostics.format_delta(*lint_diagnostics.diff_diagnostics(previous, current), other)
+
+
+def write_failure_log(command: str, exit_code: int, output: str, usage: Optional[dict] = None):
+    """Write lint failure to log file, reporting only the delta on repeated failures."""
     log_path = get_log_path()
-    timestamp = datetime.now(timezone.utc).isoformat()
+    output = report_delta(output)
+    timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    resources = f"\nResources: {format_usage(usage)}" if usage else ""
     content = f"""================================================================================
 LINT FAILED at {timestamp}
 Command: {command}
 Exit code: {exit_code}
-Working directory: {get_project_dir()}
+Working directory: {get_project_dir()}{resources}
 ================================================================================
 
 {output}
 
 ================================================================================
 """
-    log_path.write_text(content)
+    atomic_write(log_path, content)
 
 
 def clear_failure_log():
-    """Remove lint log file if it exists."""
-    log_path = get_log_path()
-    if log_path.exists():
-        log_path.unlink()
+    """Remove lint log file and the previous run's diagnostics if they exist."""
+    get_log_path().unlink(missing_ok=True)
+    get_diagnostics_path().unlink(missing_ok=True)
 
 
-def approve():
-    """Output approve decision and exit."""
-    response = {"decision": "approve"}
-    print(json.dumps(response))
-    sys.exit(0)
+def approve_response() -> dict:
+    """Approve decision."""
+    return {"decision": "approve"}
 
 
-def block():
-    """Output block decision with subagent instruction."""
+def block_response() -> dict:
+    """Block decision with subagent instruction."""
     log_path = get_log_path()
-    response = {
+    return {
         "decision": "block",
         "reason": "Lint failed",
         "systemMessage": (
@@ -85,26 +1040,133 @@ def block():
             "and verify by running the lint command again."
         ),
     }
-    print(json.dumps(response))
-    sys.exit(0)
 
 
-def main():
-    """Entry point for Stop hook."""
+def approve():
+    """Output approve decision and exit."""
+    hook_runtime.emit(approve_response())
+
+
+def block():
+    """Output block decision with subagent instruction."""
+    hook_runtime.emit(block_response())
+
+
+def failure_context_response() -> dict:
+    """Lint failure reported to Claude alongside the user's next prompt."""
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "UserPromptSubmit",
+            "additionalContext": block_response()["systemMessage"],
+        },
+    }
+
+
+def read_key(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def start_background_lint(key: str):
+    """Start a detached lint run for result key `key`, unless one is already under way."""
+    pending = get_pending_path()
+    try:
+        if read_key(pending) == key and time.time() - pending.stat().st_mtime < DEFERRED_PENDING_SECONDS:
+            return
+    except OSError:
+        pass
+    atomic_write(pending, key)
+    code = (
+        f"import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); "
+        "import lint_runner; lint_runner.run_background()"
+    )
+    subprocess.Popen(
+        [sys.executable, "-S", "-E", "-c", code],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True, cwd=get_project_dir(),
+    )
+
+
+def run_background():
+    """
+    Entry point of a deferred run: lint the tree as it is now and store the result.
+
+    The fix pass is skipped: Claude keeps editing while a background run is
+    under way, and a fixer rewriting the same files would race those edits.
+    """
+    command = os.environ.get("CLAUDE_LINT_COMMAND")
+    if command:
+        run_lint_single_flight(command, fix=False)
+
+
+def handle_deferred(event: str, key: str) -> Optional[dict]:
+    """
+    Answer Stop or UserPromptSubmit from the stored result of a background run.
+
+    A result counts only if it was produced for the current tree state and
+    lint configuration. A stale or missing result starts a background run for
+    the tree as it is now, and the event goes through without waiting. A
+    failure blocks every Stop while it is current and is added to the next
+    prompt's context once. A transient failure is answered once per run: the
+    event after it starts another background run.
+    """
+    pending = get_pending_path()
+    started = None
+    try:
+        if read_key(pending) == key:
+            started = pending.stat().st_mtime
+    except OSError:
+        pass
+    result = load_result(key, since=started)
+    if result is None:
+        start_background_lint(key)
+        return approve_response() if event == "Stop" else None
+    if result[0] == 0:
+        return approve_response() if event == "Stop" else None
+    if result[2]:
+        pending.unlink(missing_ok=True)
+
+    surfaced = read_key(get_surfaced_path()) == key
+    if not surfaced:
+        atomic_write(get_surfaced_path(), key)
+    if event == "Stop":
+        return block_response()
+    return None if surfaced else failure_context_response()
+
+
+def handle(data: dict) -> Optional[dict]:
+    """Lint the project and return the Stop decision. Also run in-process by hook-dispatcher."""
+    event = data.get("hook_event_name", "Stop")
     # Check if lint command is configured
     lint_cmd = os.environ.get("CLAUDE_LINT_COMMAND")
     if not lint_cmd:
-        approve()
+        return approve_response() if event == "Stop" else None
 
-    # Run lint
-    exit_code, output = run_lint(lint_cmd)
+    if os.environ.get("CLAUDE_LINT_MODE", "").strip().lower() == "deferred":
+        with span("deferred", event=event):
+            key = get_result_key()
+            if key is not None:
+                return handle_deferred(event, key)
+        # Outside git there is no tree state to judge staleness by: lint in the foreground
+    if event != "Stop":
+        return None
 
-    if exit_code == 0:
-        clear_failure_log()
-        approve()
-    else:
-        write_failure_log(lint_cmd, exit_code, output)
-        block()
+    with span("decision", command=lint_cmd) as decision:
+        # Run lint (or reuse a concurrent run's result for the same tree state)
+        exit_code, _ = run_lint_single_flight(lint_cmd)
+        decision.args["exit_code"] = exit_code
+
+    return approve_response() if exit_code == 0 else block_response()
+
+
+@traced("lint-runner/lint_runner")
+def main():
+    """Entry point for the Stop and UserPromptSubmit hooks."""
+    response = handle(hook_runtime.read_stdin() or {})
+    if response is not None:
+        hook_runtime.emit(response)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Minimal D-Bus client for desktop notifications on Linux.
+
+Speaks the D-Bus wire protocol directly over the session bus socket, so a
+notification costs one socket round trip instead of a notify-send process.
+Only what org.freedesktop.Notifications needs is implemented: EXTERNAL
+authentication, method calls and replies, and the basic, array, struct,
+dict-entry and variant types.
+"""
+
+import os
+import socket
+import struct
+from typing import Optional
+from urllib.parse import unquote
+
+NOTIFICATIONS_NAME = "org.freedesktop.Notifications"
+NOTIFICATIONS_PATH = "/org/freedesktop/Notifications"
+NOTIFY_SIGNATURE = "susssasa{sv}i"
+
+URGENCY_LEVELS = {"low": 0, "normal": 1, "critical": 2}
+
+METHOD_CALL, METHOD_RETURN, ERROR, SIGNAL = 1, 2, 3, 4
+NO_REPLY_EXPECTED = 0x1
+
+# Header field codes and their types
+HEADER_FIELDS = {
+    "path": (1, "o"),
+    "interface": (2, "s"),
+    "member": (3, "s"),
+    "error_name": (4, "s"),
+    "reply_serial": (5, "u"),
+    "destination": (6, "s"),
+    "sender": (7, "s"),
+    "signature": (8, "g"),
+}
+HEADER_NAMES = {code: name for name, (code, _) in HEADER_FIELDS.items()}
+
+FIXED_TYPES = {
+    "y": "B", "b": "I", "n": "h", "q": "H", "i": "i", "u": "I", "x": "q", "t": "Q", "d": "d", "h": "I",
+}
+ALIGNMENT = {
+    "y": 1, "b": 4, "n": 2, "q": 2, "i": 4, "u": 4, "x": 8, "t": 8, "d": 8, "h": 4,
+    "s": 4, "o": 4, "g": 1, "v": 1, "a": 4, "(": 8, "{": 8,
+}
+
+
+class DBusError(Exception):
+    """Error reply or protocol failure."""
+
+
+def split_signature(signature: str) -> list[str]:
+    """Split a signature into its complete types: "sa{sv}i" -> ["s", "a{sv}", "i"]."""
+    types = []
+    i = 0
+    while i < len(signature):
+        start = i
+        while signature[i] == "a":
+            i += 1
+        if signature[i] in "({":
+            depth = 0
+            while True:
+                depth += signature[i] in "({"
+                depth -= signature[i] in ")}"
+                i += 1
+                if depth == 0:
+                    break
+        else:
+            i += 1
+        types.append(signature[start:i])
+    return types
+
+
+class Writer:
+    """Marshals values into a message buffer, aligned from the start of the message."""
+
+    def __init__(self, endian: str = "<"):
+        self.endian = endian
+        self.buffer = bytearray()
+
+    def align(self, alignment: int):
+        self.buffer.extend(b"\0" * (-len(self.buffer) % alignment))
+
+    def write(self, signature: str, values):
+        for type_code, value in zip(split_signature(signature), values):
+            self.write_value(type_code, value)
+
+    def write_value(self, type_code: str, value):
+        code = type_code[0]
+        self.align(ALIGNMENT[code])
+        if code in FIXED_TYPES:
+            self.buffer.extend(struct.pack(self.endian + FIXED_TYPES[code], value))
+        elif code in "so":
+            data = value.encode()
+            self.buffer.extend(struct.pack(self.endian + "I", len(data)) + data + b"\0")
+        elif code == "g":
+            data = value.encode()
+            self.buffer.extend(bytes([len(data)]) + data + b"\0")
+        elif code == "v":
+            signature, inner = value
+            self.write_value("g", signature)
+            self.write_value(signature, inner)
+        elif code == "a":
+            self.write_array(type_code[1:], value)
+        else:  # struct or dict entry
+            self.write(type_code[1:-1], value)
+
+    def write_array(self, element: str, value):
+        length_at = len(self.buffer)
+        self.buffer.extend(b"\0\0\0\0")
+        self.align(ALIGNMENT[element[0]])
+        start = len(self.buffer)
+        for item in (value.items() if element[0] == "{" else value):
+            self.write_value(element, item)
+        struct.pack_into(self.endian + "I", self.buffer, length_at, len(self.buffer) - start)
+
+
+class Reader:
+    """Unmarshals values from a message buffer."""
+
+    def __init__(self, data: bytes, endian: str = "<", offset: int = 0):
+        self.data = data
+        self.endian = endian
+        self.offset = offset
+
+    def align(self, alignment: int):
+        self.offset += -self.offset % alignment
+
+    def read(self, signature: str) -> list:
+        return [self.read_value(type_code) for type_code in split_signature(signature)]
+
+    def read_value(self, type_code: str):
+        code = type_code[0]
+        self.align(ALIGNMENT[code])
+        if code in FIXED_TYPES:
+            fmt = self.endian + FIXED_TYPES[code]
+            (value,) = struct.unpack_from(fmt, self.data, self.offset)
+            self.offset += struct.calcsize(fmt)
+            return bool(value) if code == "b" else value
+        if code in "so":
+            (length,) = struct.unpack_from(self.endian + "I", self.data, self.offset)
+            value = self.data[self.offset + 4:self.offset + 4 + length].decode()
+            self.offset += 4 + length + 1
+            return value
+        if code == "g":
+            length = self.data[self.offset]
+            value = self.data[self.offset + 1:self.offset + 1 + length].decode()
+            self.offset += 1 + length + 1
+            return value
+        if code == "v":
+            signature = self.read_value("g")
+            return signature, self.read_value(signature)
+        if code == "a":
+            (length,) = struct.unpack_from(self.endian + "I", self.data, self.offset)
+            self.offset += 4
+            self.align(ALIGNMENT[type_code[1]])
+            end = self.offset + length
+            items = []
+            while self.offset < end:
+                items.append(self.read_value(type_code[1:]))
+            return dict(items) if type_code[1] == "{" else items
+        return tuple(self.read(type_code[1:-1]))
+
+
+def encode_message(message_type: int, serial: int, fields: dict, signature: str = "", body=(),
+                   flags: int = 0) -> bytes:
+    """Serialize a message with header `fields` (names from HEADER_FIELDS) and body."""
+    body_writer = Writer()
+    body_writer.write(signature, body)
+    if signature:
+        fields = {**fields, "signature": signature}
+    header_fields = [
+        (HEADER_FIELDS[name][0], (HEADER_FIELDS[name][1], value))
+        for name, value in fields.items() if value is not None
+    ]
+    writer = Writer()
+    writer.buffer.extend(struct.pack("<cBBBII", b"l", message_type, flags, 1, len(body_writer.buffer), serial))
+    writer.write("a(yv)", [header_fields])
+    writer.align(8)
+    return bytes(writer.buffer + body_writer.buffer)
+
+
+class Message:
+    """A received message: type, serial, header fields by name and the unmarshaled body."""
+
+    def __init__(self, message_type: int, flags: int, serial: int, fields: dict, body: list):
+        self.type = message_type
+        self.flags = flags
+        self.serial = serial
+        self.fields = fields
+        self.body = body
+
+
+def parse_address(address: str) -> Optional[str]:
+    """Socket path for the first unix: entry of a bus address, "\\0"-prefixed if abstract."""
+    for entry in address.split(";"):
+        transport, _, params = entry.partition(":")
+        if transport != "unix":
+            continue
+        options = dict(param.partition("=")[::2] for param in params.split(","))
+        if "path" in options:
+            return unquote(options["path"])
+        if "abstract" in options:
+            return "\0" + unquote(options["abstract"])
+    return None
+
+
+def get_session_bus_path() -> Optional[str]:
+    """Session bus socket from DBUS_SESSION_BUS_ADDRESS, else $XDG_RUNTIME_DIR/bus."""
+    address = os.environ.get("DBUS_SESSION_BUS_ADDRESS")
+    if address:
+        return parse_address(address)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.exists(os.path.join(runtime_dir, "bus")):
+        return os.path.join(runtime_dir, "bus")
+    return None
+
+
+class Connection:
+    """A connection to a message bus, authenticated and registered with Hello()."""
+
+    def __init__(self, path: str, timeout: float = 1.0):
+        self.serial = 0
+        self.pending = b""
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.settimeout(timeout)
+            self.sock.connect(path)
+            self.authenticate()
+            (self.unique_name,) = self.call("org.freedesktop.DBus", "/org/freedesktop/DBus",
+                                            "org.freedesktop.DBus", "Hello")
+        except BaseException:
+            self.sock.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.sock.close()
+
+    def authenticate(self):
+        uid = str(os.getuid()).encode().hex()
+        self.sock.sendall(b"\0AUTH EXTERNAL " + uid.encode() + b"\r\n")
+        line = b""
+        while not line.endswith(b"\r\n"):
+            chunk = self.sock.recv(256)
+            if not chunk:
+                raise DBusError("connection closed during authentication")
+            line += chunk
+        if not line.startswith(b"OK "):
+            raise DBusError(f"authentication rejected: {line.strip().decode(errors='replace')}")
+        self.sock.sendall(b"BEGIN\r\n")
+
+    def next_serial(self) -> int:
+        self.serial += 1
+        return self.serial
+
+    def send(self, data: bytes):
+        self.sock.sendall(data)
+
+    def recv_exactly(self, size: int) -> bytes:
+        while len(self.pending) < size:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise DBusError("connection closed")
+            self.pending += chunk
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+    def receive(self) -> Message:
+        """Read the next message from the bus."""
+        fixed = self.recv_exactly(16)
+        endian = {b"l": "<", b"B": ">"}.get(fixed[:1])
+        if endian is None:
+            raise DBusError("invalid message endianness")
+        message_type, flags, _, body_length, serial, fields_length = struct.unpack_from(endian + "BBBIII", fixed, 1)
+        header_length = 16 + fields_length + (-(16 + fields_length) % 8)
+        data = fixed + self.recv_exactly(header_length - 16 + body_length)
+        (raw_fields,) = Reader(data, endian, 12).read("a(yv)")
+        fields = {HEADER_NAMES[code]: value for code, (_, value) in raw_fields if code in HEADER_NAMES}
+        body = Reader(data, endian, header_length).read(fields.get("signature", ""))
+        return Message(message_type, flags, serial, fields, body)
+
+    def call(self, destination: str, path: str, interface: str, member: str,
+             signature: str = "", args=()) -> list:
+        """Call a method and return the reply's body; raises DBusError on an error reply."""
+        serial = self.next_serial()
+        self.send(encode_message(METHOD_CALL, serial, {
+            "path": path, "interface": interface, "member": member, "destination": destination,
+        }, signature, args))
+        while True:
+            message = self.receive()
+            if message.fields.get("reply_serial") != serial:
+                continue  # signals such as NameAcquired
+            if message.type == ERROR:
+                detail = message.body[0] if message.body else ""
+                raise DBusError(f"{message.fields.get('error_name')}: {detail}")
+            return message.body
+
+    def reply(self, call: Message, signature: str = "", args=()):
+        """Send the return value of a method call received from the bus."""
+        if call.flags & NO_REPLY_EXPECTED:
+            return
+        self.send(encode_message(METHOD_RETURN, self.next_serial(), {
+            "reply_serial": call.serial, "destination": call.fields.get("sender"),
+        }, signature, args))
+
+
+def notify(app_name: str, summary: str, body: str, urgency: str = "normal",
+           replaces_id: int = 0, timeout: float = 1.0) -> Optional[int]:
+    """
+    Show a notification through org.freedesktop.Notifications.
+
+    Returns the notification's id (pass it as `replaces_id` to update the
+    same toast), or None when there is no session bus or the call failed.
+    """
+    path = get_session_bus_path()
+    if path is None:
+        return None
+    hints = {"urgency": ("y", URGENCY_LEVELS.get(urgency, 1))}
+    try:
+        with Connection(path, timeout) as connection:
+            (notification_id,) = connection.call(
+                NOTIFICATIONS_NAME, NOTIFICATIONS_PATH, NOTIFICATIONS_NAME, "Notify", NOTIFY_SIGNATURE,
+                [app_name, replaces_id, "", summary, body, [], hints, -1],
+            )
+            return notification_id
+    except (OSError, DBusError, ValueError, struct.error):
+        return None
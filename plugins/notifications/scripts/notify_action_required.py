@@ -6,7 +6,7 @@ Sends desktop notification when Claude needs user input.
 
 import sys
 
-from platform_utils import send_notification, play_sound, detect_os, read_stdin
+from platform_utils import send_notification, play_sound, detect_os, read_stdin, span, traced, counter
 
 URGENCY_MAP = {
     "permission_prompt": "normal",
@@ -32,19 +32,25 @@ def get_notification_urgency(notification_type: str) -> str:
     return URGENCY_MAP.get(notification_type, "normal")
 
 
-def main() -> int:
-    """Main entry point for the notification hook."""
-    data = read_stdin() or {}
-
+def handle(data: dict) -> None:
+    """Notify that Claude needs input. Also run in-process by hook-dispatcher."""
     notification_type = data.get("notification_type", "unknown")
     message = data.get("message", DEFAULT_MESSAGE)
 
     title = get_notification_title(notification_type)
     urgency = get_notification_urgency(notification_type)
 
-    send_notification(title, message, urgency)
-    if detect_os() == "linux":
-        play_sound("attention")
+    with span("decision", notification_type=notification_type):
+        sent = send_notification(title, message, urgency, session_id=data.get("session_id"))
+        counter("hook.notifications.sent", event=notification_type, result="ok" if sent else "failed")
+        if detect_os() == "linux":
+            play_sound("attention")
+
+
+@traced("notifications/notify_action_required")
+def main() -> int:
+    """Main entry point for the notification hook."""
+    handle(read_stdin() or {})
     return 0
 
 
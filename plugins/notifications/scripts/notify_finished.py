@@ -6,18 +6,24 @@ Sends desktop notification and plays sound when Claude finishes responding.
 
 import sys
 
-from platform_utils import send_notification, play_sound, detect_os, read_stdin
+from platform_utils import send_notification, play_sound, detect_os, read_stdin, span, traced, counter
 
 NOTIFICATION_TITLE = "Claude Code - Finished"
 
 
+def handle(data: dict) -> None:
+    """Notify that Claude finished. Also run in-process by hook-dispatcher."""
+    with span("decision"):
+        sent = send_notification(NOTIFICATION_TITLE, "Task completed", session_id=data.get("session_id"))
+        counter("hook.notifications.sent", event="stop", result="ok" if sent else "failed")
+        if detect_os() == "linux":
+            play_sound("complete")
+
+
+@traced("notifications/notify_finished")
 def main() -> int:
     """Main entry point for the stop hook."""
-    read_stdin()
-
-    send_notification(NOTIFICATION_TITLE, "Task completed")
-    if detect_os() == "linux":
-        play_sound("complete")
+    handle(read_stdin() or {})
     return 0
 
 
@@ -1,15 +1,25 @@
 #!/usr/bin/env python3
 """Cross-platform utilities for notifications."""
 
-import json
 import os
 import platform as _platform
+import re
 import subprocess
 import sys
+import tempfile
 from typing import Literal, Optional
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lib"))
+
+from hook_metrics import counter  # noqa: E402,F401 - re-exported for the notify scripts
+from hook_runtime import lazy_import, read_stdin  # noqa: E402,F401 - re-exported for the notify scripts
+from hook_trace import span, traced  # noqa: E402,F401 - re-exported for the notify scripts
+
+shutil = lazy_import("shutil")
+
 OSType = Literal["linux", "macos", "windows"]
 SoundType = Literal["complete", "attention"]
+BackendType = Literal["desktop", "terminal"]
 
 # Linux sound paths (macOS/Windows use native notification sounds)
 LINUX_SOUND_PATHS = {
@@ -19,6 +29,15 @@ LINUX_SOUND_PATHS = {
 
 APP_NAME = "Claude Code"
 
+# Controlling terminal of the session the hook runs in
+TTY_PATH = "/dev/tty"
+
+# Escape sequence styles for terminal notifications
+TERMINAL_STYLES = ("osc777", "osc9", "bel")
+
+# Control characters that would end or corrupt an escape sequence
+CONTROL_CHARS = re.compile(r"[\x00-\x1f\x7f-\x9f]")
+
 
 def detect_os() -> OSType:
     """Detect the current operating system."""
@@ -31,6 +50,79 @@ def detect_os() -> OSType:
         return "linux"
 
 
+def has_desktop_backend(os_type: OSType) -> bool:
+    """
+    Whether notifications can reach a desktop on this machine.
+
+    Over SSH the user's desktop is on the other end, so a remote macOS or a
+    Linux host without a forwarded display has none; neither has a container
+    without a display or session bus.
+    """
+    if os_type == "windows":
+        return True
+    if os_type == "macos":
+        return not os.environ.get("SSH_CONNECTION") and shutil.which("terminal-notifier") is not None
+    if not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+        return False
+    import dbus_notify
+
+    return dbus_notify.get_session_bus_path() is not None or shutil.which("notify-send") is not None
+
+
+def get_backend() -> BackendType:
+    """Notification backend from CLAUDE_NOTIFY_BACKEND ("desktop" or "terminal"), detected by default."""
+    backend = os.environ.get("CLAUDE_NOTIFY_BACKEND", "").strip().lower()
+    if backend in ("desktop", "terminal"):
+        return backend
+    return "desktop" if has_desktop_backend(detect_os()) else "terminal"
+
+
+def get_terminal_style() -> str:
+    """Escape sequence the terminal understands, from CLAUDE_NOTIFY_TERMINAL or the terminal's identity."""
+    style = os.environ.get("CLAUDE_NOTIFY_TERMINAL", "").strip().lower()
+    if style in TERMINAL_STYLES:
+        return style
+    term_program = os.environ.get("TERM_PROGRAM", "")
+    term = os.environ.get("TERM", "")
+    if os.environ.get("VTE_VERSION") or term_program in ("WezTerm", "ghostty") or term.startswith(("rxvt", "foot")):
+        return "osc777"
+    if term_program == "iTerm.app":
+        return "osc9"
+    # Unknown terminal (TERM_PROGRAM is not forwarded over SSH): ring the bell
+    return "bel"
+
+
+def format_terminal_notification(title: str, body: str, style: str) -> str:
+    """Escape sequence showing a notification, wrapped for tmux passthrough inside tmux."""
+    title = CONTROL_CHARS.sub(" ", title)
+    body = CONTROL_CHARS.sub(" ", body)
+    if style == "osc777":
+        sequence = f"\033]777;notify;{title.replace(';', ',')};{body}\a"
+    elif style == "osc9":
+        sequence = f"\033]9;{title}: {body}\a"
+    else:
+        return "\a"  # tmux forwards the bell itself
+    if os.environ.get("TMUX"):
+        # Needs `set -g allow-passthrough on` (tmux 3.3+)
+        sequence = "\033Ptmux;" + sequence.replace("\033", "\033\033") + "\033\\"
+    return sequence
+
+
+def send_terminal_notification(title: str, body: str) -> bool:
+    """Write a notification escape sequence to the controlling terminal. No process is started."""
+    try:
+        fd = os.open(TTY_PATH, os.O_WRONLY | getattr(os, "O_NOCTTY", 0))
+    except OSError:
+        return False  # no controlling terminal
+    try:
+        os.write(fd, format_terminal_notification(title, body, get_terminal_style()).encode())
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+
+
 def get_sound_path(sound_type: SoundType) -> str:
     """Get the sound file path for Linux."""
     return LINUX_SOUND_PATHS[sound_type]
@@ -54,9 +146,65 @@ def escape_powershell_string(text: str) -> str:
     return text
 
 
-def send_notification(title: str, body: str, urgency: str = "normal") -> bool:
-    """Send a desktop notification. Returns True on success."""
+def get_notification_id_path(session_id: str) -> str:
+    """
+    File holding the id of a session's current toast.
+
+    Notification ids are only valid for the notification server's lifetime,
+    which matches the login session's runtime directory.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), f"claude-code-{os.getuid()}")
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", session_id)[:128]
+    return os.path.join(runtime_dir, "claude-code-notifications", name)
+
+
+def load_notification_id(session_id: Optional[str]) -> int:
+    """Id of the session's current toast, 0 (a new toast) if there is none."""
+    if not session_id:
+        return 0
+    try:
+        with open(get_notification_id_path(session_id)) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return 0
+
+
+def save_notification_id(session_id: Optional[str], notification_id: int):
+    if not session_id:
+        return
+    path = get_notification_id_path(session_id)
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        with open(path, "w") as f:
+            f.write(str(notification_id))
+    except OSError:
+        pass
+
+
+def send_dbus_notification(title: str, body: str, urgency: str, session_id: Optional[str]) -> bool:
+    """Show (or update) the session's toast over the session bus. False if there is no bus."""
+    import dbus_notify
+
+    notification_id = dbus_notify.notify(APP_NAME, title, body, urgency, load_notification_id(session_id))
+    if notification_id is None:
+        return False
+    save_notification_id(session_id, notification_id)
+    return True
+
+
+def send_notification(title: str, body: str, urgency: str = "normal", session_id: Optional[str] = None) -> bool:
+    """
+    Send a desktop notification. Returns True on success.
+
+    On Linux the notification goes straight to the session bus, replacing the
+    previous toast of the same session; notify-send is the fallback when
+    there is no bus.
+    """
+    if get_backend() == "terminal":
+        return send_terminal_notification(title, body)
     os_type = detect_os()
+    if os_type == "linux" and send_dbus_notification(title, body, urgency, session_id):
+        return True
     try:
         if os_type == "linux":
             cmd = [
@@ -92,7 +240,12 @@ def send_notification(title: str, body: str, urgency: str = "normal") -> bool:
 
 
 def play_sound(sound_type: SoundType) -> bool:
-    """Play a notification sound on Linux. macOS/Windows use native notification sounds."""
+    """
+    Play a notification sound on Linux. macOS/Windows use native notification
+    sounds, and terminal notifications leave sound to the terminal.
+    """
+    if get_backend() == "terminal":
+        return False
     sound_path = get_sound_path(sound_type)
 
     if not os.path.exists(sound_path):
@@ -106,14 +259,3 @@ def play_sound(sound_type: SoundType) -> bool:
         return True
     except Exception:
         return False
-
-
-def read_stdin() -> Optional[dict]:
-    """Read and parse JSON from stdin."""
-    try:
-        data = sys.stdin.read()
-        if not data.strip():
-            return None
-        return json.loads(data)
-    except json.JSONDecodeError:
-        return None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Check a PR's branch name and commit subjects against the team conventions.
+
+Usage:
+    python3 check_conventions.py BASE_BRANCH [--branch NAME] [--all]
+
+Branches must look like `<type>/<TICKET-123>-<description>`, with type one of
+BRANCH_TYPES. Commit subjects must follow Conventional Commits:
+`type(scope): description`, with a lowercase, imperative description and no
+trailing period. All commits in BASE_BRANCH..HEAD are read with a single
+`git log`; merge commits are skipped.
+
+Prints JSON with the branch verdict, the commits with violations (every
+commit with --all) and totals. Each violation has a rule, a severity
+(error or warning) and a message.
+"""
+
+import argparse
+import json
+import re
+import sys
+from typing import Optional
+
+from diff_chunks import git, resolve_base
+
+BRANCH_TYPES = ("feature", "bugfix", "hotfix", "refactor", "chore")
+COMMIT_TYPES = ("feat", "fix", "refactor", "test", "docs", "chore", "style", "perf", "ci", "build")
+
+TICKET = r"[A-Z][A-Z0-9]+-\d+"
+BRANCH_PATTERN = re.compile(rf"^({'|'.join(BRANCH_TYPES)})/({TICKET})-([A-Za-z0-9]+(?:-[A-Za-z0-9]+)*)$")
+CONVENTIONAL = re.compile(r"^(?P<type>[A-Za-z]+)(?:\((?P<scope>[^()]*)\))?(?P<breaking>!)?: (?P<description>.*)$")
+UNSQUASHED = re.compile(r"^(wip\b|fixup!|squash!|amend!)", re.IGNORECASE)
+TICKET_IN_TEXT = re.compile(rf"\b{TICKET}\b")
+VAGUE = {"changes", "fix", "fixes", "update", "updates", "stuff", "misc", "cleanup", "wip", "tmp", "test", "work"}
+# Imperative verbs that end in -ed or -ing
+NOT_TENSE = {"embed", "feed", "need", "seed", "shed", "speed", "bring", "ring", "string", "sing", "ping"}
+
+FIELD, RECORD = "\x1f", "\x1e"
+
+
+def violation(rule: str, severity: str, message: str) -> dict:
+    return {"rule": rule, "severity": severity, "message": message}
+
+
+def check_branch(name: str, ticket_prefixes: Optional[set] = None) -> list[dict]:
+    """Violations of the branch naming convention."""
+    if not name:
+        return [violation("branch-detached", "error", "no branch is checked out (detached HEAD)")]
+    match = BRANCH_PATTERN.match(name)
+    if match:
+        prefix = match.group(2).split("-")[0]
+        if ticket_prefixes and prefix not in ticket_prefixes:
+            return [violation("branch-ticket", "warning", f"unknown ticket prefix {prefix}")]
+        return []
+    violations = []
+    branch_type, _, rest = name.partition("/")
+    if branch_type not in BRANCH_TYPES or not rest:
+        violations.append(violation(
+            "branch-prefix", "error", f"must start with one of {', '.join(t + '/' for t in BRANCH_TYPES)}",
+        ))
+        rest = rest or name
+    if not re.match(rf"^{TICKET}(-|$)", rest):
+        violations.append(violation("branch-ticket", "error", "missing ticket reference such as OPTPRIME-123"))
+    if re.search(r"[^A-Za-z0-9/-]", name):
+        violations.append(violation("branch-characters", "error", "only letters, digits and hyphens are allowed"))
+    elif re.match(rf"^{TICKET}$", rest):
+        violations.append(violation("branch-description", "error", "missing short description after the ticket"))
+    return violations or [violation("branch-format", "error", "expected <type>/<TICKET-123>-<description>")]
+
+
+def is_past_or_progressive(word: str) -> bool:
+    word = word.lower()
+    return word not in NOT_TENSE and (word.endswith("ed") or word.endswith("ing")) and len(word) > 4
+
+
+def check_subject(subject: str) -> list[dict]:
+    """Violations of Conventional Commits and the description rules."""
+    if UNSQUASHED.match(subject):
+        return [violation("commit-unsquashed", "error", "WIP or fixup commit should be squashed")]
+    match = CONVENTIONAL.match(subject)
+    if not match:
+        return [violation("commit-format", "error", "expected type(scope): description")]
+    violations = []
+    if match.group("type") not in COMMIT_TYPES:
+        violations.append(violation(
+            "commit-type", "error", f"unknown type {match.group('type')!r}, use one of {', '.join(COMMIT_TYPES)}",
+        ))
+    if match.group("scope") is not None and not match.group("scope").strip():
+        violations.append(violation("commit-scope", "error", "empty scope"))
+    description = match.group("description").strip()
+    words = description.split()
+    if not words:
+        return violations + [violation("commit-description", "error", "missing description")]
+    if description[0].isupper() and not words[0].isupper():
+        violations.append(violation("commit-case", "error", "description should start lowercase"))
+    if description.endswith("."):
+        violations.append(violation("commit-period", "error", "description should not end with a period"))
+    if is_past_or_progressive(words[0]):
+        violations.append(violation("commit-mood", "warning", f"use the imperative mood, not {words[0]!r}"))
+    if TICKET_IN_TEXT.search(subject):
+        violations.append(violation("commit-ticket", "warning", "ticket reference belongs in the branch name"))
+    if (len(words) == 1 and words[0].lower() in VAGUE) or description.lower() in {"update files", "fix bug"}:
+        violations.append(violation("commit-vague", "warning", "description is too vague"))
+    return violations
+
+
+def read_commits(base: str) -> list[tuple[str, str]]:
+    """(sha, subject) of each non-merge commit in base..HEAD, oldest first."""
+    output = git("log", "--no-merges", "--reverse", f"--format=%H{FIELD}%s{RECORD}", f"{resolve_base(base)}..HEAD")
+    commits = []
+    for record in output.split(RECORD):
+        sha, _, subject = record.strip("\n").partition(FIELD)
+        if sha:
+            commits.append((sha, subject))
+    return commits
+
+
+def check(base: str, branch: Optional[str] = None, show_all: bool = False,
+          ticket_prefixes: Optional[set] = None) -> dict:
+    """Branch verdict and commits with violations (all commits if show_all)."""
+    if branch is None:
+        branch = git("branch", "--show-current").strip()
+    branch_violations = check_branch(branch, ticket_prefixes)
+    commits = []
+    invalid = 0
+    log = read_commits(base)
+    for sha, subject in log:
+        violations = check_subject(subject)
+        valid = not any(v["severity"] == "error" for v in violations)
+        invalid += not valid
+        if violations or show_all:
+            commits.append({"sha": sha[:12], "subject": subject, "valid": valid, "violations": violations})
+    return {
+        "branch": {
+            "name": branch,
+            "valid": not any(v["severity"] == "error" for v in branch_violations),
+            "violations": branch_violations,
+        },
+        "commits": commits,
+        "totals": {"commits": len(log), "invalid": invalid},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check branch and commit conventions of a PR")
+    parser.add_argument("base", help="base branch the PR merges into")
+    parser.add_argument("--branch", help="branch name (default: the checked-out branch)")
+    parser.add_argument("--all", action="store_true", help="list commits without violations too")
+    parser.add_argument("--ticket-prefixes", help="comma-separated allowed ticket prefixes, e.g. OPTPRIME,IDAAS")
+    args = parser.parse_args(argv)
+
+    prefixes = {p.strip() for p in args.ticket_prefixes.split(",") if p.strip()} if args.ticket_prefixes else None
+    try:
+        result = check(args.base, args.branch, args.all, prefixes)
+    except RuntimeError as e:
+        print(f"check_conventions: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
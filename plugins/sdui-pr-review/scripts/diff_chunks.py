@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Split a PR's diff into bounded, reviewable chunks.
+
+Usage:
+    python3 diff_chunks.py BASE_BRANCH [--head REF] [--max-lines N] [--context N]
+                           [--out DIR] [--include-noise]
+
+Diffs BASE_BRANCH...HEAD locally and classifies every changed file as
+source, test, lockfile, vendored, generated or binary. Lockfiles, vendored,
+generated and binary files are summarized by line counts instead of
+reviewed. Source and test diffs are split into chunk files of at most
+--max-lines lines, each a valid patch of whole hunks (oversized hunks are
+split). Prints a JSON manifest listing the files and their chunk paths in
+review order. The manifest is also saved as manifest.json next to the
+chunks.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from typing import Optional
+
+DEFAULT_MAX_LINES = 400
+DEFAULT_CONTEXT = 3
+
+LOCKFILES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "bun.lockb", "poetry.lock",
+    "uv.lock", "Pipfile.lock", "Cargo.lock", "Gemfile.lock", "composer.lock", "go.sum", "packages.lock.json",
+    "mix.lock", "pubspec.lock", "Podfile.lock", "flake.lock", "gradle.lockfile",
+}
+VENDOR_DIRS = {"vendor", "vendors", "third_party", "third-party", "node_modules", "Pods", ".yarn", "bower_components"}
+GENERATED_PATTERNS = (
+    "*.min.js", "*.min.css", "*.map", "*.pb.go", "*_pb2.py", "*_pb2_grpc.py", "*.pb.ts", "*.generated.*",
+    "*.g.dart", "*.freezed.dart", "*.designer.cs", "*.snap",
+)
+GENERATED_DIRS = {"generated", "__generated__"}
+# Build output directories; only at the repository root, as the names are common for source too
+BUILD_DIRS = {"dist", "build", "gen"}
+# Markers generators put in the first lines of their output
+GENERATED_MARKERS = re.compile(r"@generated|DO NOT EDIT|auto-?generated", re.IGNORECASE)
+TEST_DIRS = {"test", "tests", "__tests__", "spec", "specs", "e2e", "testing"}
+TEST_PATTERNS = (
+    "test_*.py", "*_test.py", "*_test.go", "*.test.*", "*.spec.*", "*Test.java", "*Test.kt", "*Tests.cs",
+    "*Test.php", "*_spec.rb",
+)
+
+# Categories summarized instead of reviewed, unless --include-noise
+NOISE = {"lockfile", "vendored", "generated", "binary"}
+CATEGORY_ORDER = ["source", "test", "generated", "vendored", "lockfile", "binary"]
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)$")
+
+
+def git(*args: str) -> str:
+    # Decoded by hand: text mode would turn carriage returns inside diff content into newlines
+    result = subprocess.run(["git", *args], capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)}: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout.decode(errors="replace")
+
+
+def resolve_base(base: str) -> str:
+    """
+    base's origin/ remote-tracking branch, else base itself. A local branch
+    is often stale on review machines, so the remote one wins.
+    """
+    for candidate in (f"origin/{base}", base):
+        if subprocess.run(["git", "rev-parse", "--verify", "--quiet", f"{candidate}^{{commit}}"],
+                          capture_output=True).returncode == 0:
+            return candidate
+    raise RuntimeError(f"unknown base branch: {base}")
+
+
+def parse_name_status(output: str) -> list[dict]:
+    """Entries of `git diff --name-status -z`: status letter, path and the old path of renames and copies."""
+    fields = output.split("\0")
+    entries = []
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i]
+        if status[0] in "RC":
+            entries.append({"status": status[0], "old_path": fields[i + 1], "path": fields[i + 2]})
+            i += 3
+        else:
+            entries.append({"status": status[0], "path": fields[i + 1]})
+            i += 2
+    return entries
+
+
+def split_patch(patch: str) -> list[list[str]]:
+    """Lines of each file's section of a patch, in order."""
+    sections: list[list[str]] = []
+    # Only "\n" ends a diff line: splitlines() would also split on form feeds and the like in content
+    for line in patch.removesuffix("\n").split("\n"):
+        if line.startswith("diff --git "):
+            sections.append([])
+        if sections:
+            sections[-1].append(line)
+    return sections
+
+
+def parse_section(lines: list[str]) -> tuple[list[str], list[list[str]], bool]:
+    """(header lines, hunks as lists of lines, binary) of one file's section."""
+    header: list[str] = []
+    hunks: list[list[str]] = []
+    binary = False
+    for line in lines:
+        if line.startswith("@@"):
+            hunks.append([line])
+        elif hunks:
+            hunks[-1].append(line)
+        else:
+            header.append(line)
+            binary = binary or line.startswith(("Binary files ", "GIT binary patch"))
+    return header, hunks, binary
+
+
+def count_changes(hunks: list[list[str]]) -> tuple[int, int]:
+    additions = sum(1 for hunk in hunks for line in hunk[1:] if line.startswith("+"))
+    deletions = sum(1 for hunk in hunks for line in hunk[1:] if line.startswith("-"))
+    return additions, deletions
+
+
+def looks_generated(hunks: list[list[str]]) -> bool:
+    """Whether the first added lines of the file carry a generator's marker."""
+    if not hunks:
+        return False
+    match = HUNK_HEADER.match(hunks[0][0])
+    if not match or int(match.group(3)) > 5:
+        return False
+    head = [line for line in hunks[0][1:12] if not line.startswith("-")]
+    return any(GENERATED_MARKERS.search(line) for line in head)
+
+
+def classify(path: str, hunks: list[list[str]], binary: bool, attributes: dict) -> str:
+    """Category of a changed file; .gitattributes linguist-generated/-vendored take precedence."""
+    name = path.rsplit("/", 1)[-1]
+    directories = path.split("/")[:-1]
+    if binary:
+        return "binary"
+    if name in LOCKFILES:
+        return "lockfile"
+    if attributes.get("linguist-vendored") == "set" or VENDOR_DIRS.intersection(directories):
+        return "vendored"
+    if (attributes.get("linguist-generated") == "set" or GENERATED_DIRS.intersection(directories)
+            or BUILD_DIRS.intersection(directories[:1])
+            or any(fnmatch.fnmatch(name, pattern) for pattern in GENERATED_PATTERNS) or looks_generated(hunks)):
+        return "generated"
+    if TEST_DIRS.intersection(directories) or any(fnmatch.fnmatch(name, pattern) for pattern in TEST_PATTERNS):
+        return "test"
+    return "source"
+
+
+def read_attributes(paths: list[str]) -> dict[str, dict]:
+    """linguist-generated and linguist-vendored attributes of paths, from .gitattributes."""
+    if not paths:
+        return {}
+    result = subprocess.run(
+        ["git", "check-attr", "-z", "--stdin", "linguist-generated", "linguist-vendored"],
+        input="\0".join(paths) + "\0", capture_output=True, text=True,
+    )
+    attributes: dict[str, dict] = {}
+    fields = result.stdout.split("\0") if result.returncode == 0 else []
+    for path, name, value in zip(fields[0::3], fields[1::3], fields[2::3]):
+        if value in ("set", "true"):
+            attributes.setdefault(path, {})[name] = "set"
+    return attributes
+
+
+def split_hunk(hunk: list[str], max_lines: int) -> list[list[str]]:
+    """Split a hunk of more than max_lines lines into consecutive hunks with recomputed headers."""
+    if len(hunk) <= max_lines:
+        return [hunk]
+    match = HUNK_HEADER.match(hunk[0])
+    if not match:
+        return [hunk]
+    old_line, new_line, section = int(match.group(1)), int(match.group(3)), match.group(5)
+    pieces = []
+    body = hunk[1:]
+    step = max(max_lines - 1, 1)  # each piece gets its own header line
+    for start in range(0, len(body), step):
+        lines = body[start:start + step]
+        old_count = sum(1 for line in lines if not line.startswith(("+", "\\")))
+        new_count = sum(1 for line in lines if not line.startswith(("-", "\\")))
+        pieces.append([f"@@ -{old_line},{old_count} +{new_line},{new_count} @@{section}", *lines])
+        old_line += old_count
+        new_line += new_count
+    return pieces
+
+
+def new_range(hunk: list[str]) -> Optional[list[int]]:
+    """[first, last] line of the hunk in the new file, None for pure deletions."""
+    match = HUNK_HEADER.match(hunk[0])
+    if not match:
+        return None
+    start, count = int(match.group(3)), int(match.group(4) if match.group(4) is not None else 1)
+    return [start, start + count - 1] if count else None
+
+
+def chunk_hunks(hunks: list[list[str]], max_lines: int) -> list[list[list[str]]]:
+    """Group hunks, in order, into chunks of at most max_lines diff lines."""
+    chunks: list[list[list[str]]] = []
+    size = 0
+    for piece in (piece for hunk in hunks for piece in split_hunk(hunk, max_lines)):
+        if not chunks or size + len(piece) > max_lines:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(piece)
+        size += len(piece)
+    return chunks
+
+
+def safe_name(path: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", path)[-80:]
+
+
+def build_manifest(base: str, head: str, max_lines: int = DEFAULT_MAX_LINES, context: int = DEFAULT_CONTEXT,
+                   out_dir: Optional[str] = None, include_noise: bool = False) -> dict:
+    """Diff base...head, write chunk files to out_dir and return the manifest."""
+    base = resolve_base(base)
+    diff_args = ["-c", "core.quotePath=false", "diff", "--no-color", "--no-ext-diff", "-M", f"{base}...{head}"]
+    entries = parse_name_status(git(*diff_args, "--name-status", "-z"))
+    sections = split_patch(git(*diff_args, f"--unified={context}"))
+    if len(sections) != len(entries):
+        raise RuntimeError("could not match the patch to the changed file list")
+    attributes = read_attributes([entry["path"] for entry in entries])
+
+    out_dir = out_dir or os.path.join(git("rev-parse", "--git-dir").strip(), "sdui-pr-review", "chunks")
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+
+    files = []
+    chunk_count = 0
+    for entry, section in zip(entries, sections):
+        header, hunks, binary = parse_section(section)
+        additions, deletions = count_changes(hunks)
+        category = classify(entry["path"], hunks, binary, attributes.get(entry["path"], {}))
+        record = {**entry, "category": category, "additions": additions, "deletions": deletions}
+        if category in NOISE and not include_noise:
+            record["summary"] = f"{category}, +{additions} -{deletions}, not reviewed"
+        elif entry["status"] == "D":
+            record["summary"] = f"deleted, -{deletions}"
+        elif hunks:
+            record["chunks"] = []
+            for hunk_group in chunk_hunks(hunks, max_lines):
+                chunk_count += 1
+                chunk_path = os.path.join(out_dir, f"{chunk_count:04d}-{safe_name(entry['path'])}.diff")
+                lines = [line for hunk in hunk_group for line in hunk]
+                with open(chunk_path, "w") as f:
+                    f.write("\n".join(header + lines) + "\n")
+                record["chunks"].append({
+                    "file": chunk_path,
+                    "lines": len(lines),
+                    "new_lines": [r for r in map(new_range, hunk_group) if r],
+                })
+        files.append(record)
+
+    files.sort(key=lambda r: ("chunks" not in r, CATEGORY_ORDER.index(r["category"]), r["path"]))
+    reviewed = [r for r in files if "chunks" in r]
+    manifest = {
+        "base": base,
+        "head": head,
+        "files": files,
+        "totals": {
+            "files": len(files),
+            "reviewed_files": len(reviewed),
+            "chunks": chunk_count,
+            "reviewed_lines": sum(r["additions"] + r["deletions"] for r in reviewed),
+            "skipped_lines": sum(r["additions"] + r["deletions"] for r in files if "chunks" not in r),
+        },
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Split a PR's diff into bounded review chunks")
+    parser.add_argument("base", help="base branch the PR merges into")
+    parser.add_argument("--head", default="HEAD", help="PR head (default: HEAD)")
+    parser.add_argument("--max-lines", type=int, default=DEFAULT_MAX_LINES, help="diff lines per chunk")
+    parser.add_argument("--context", type=int, default=DEFAULT_CONTEXT, help="context lines around changes")
+    parser.add_argument("--out", help="chunk directory (default: .git/sdui-pr-review/chunks)")
+    parser.add_argument("--include-noise", action="store_true", help="chunk lockfiles, vendored and generated files too")
+    args = parser.parse_args(argv)
+
+    try:
+        manifest = build_manifest(args.base, args.head, max(args.max_lines, 1), max(args.context, 0),
+                                  args.out, args.include_noise)
+    except RuntimeError as e:
+        print(f"diff_chunks: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(manifest, separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
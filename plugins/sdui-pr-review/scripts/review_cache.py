@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Per-file review findings cached by blob SHA, for incremental re-reviews.
+
+Usage:
+    python3 review_cache.py plan PR BASE_BRANCH    # which files need review
+    python3 review_cache.py record PR BASE_BRANCH  # store findings (JSON on stdin)
+
+Every changed file is keyed by its blob SHA on the merge base and on HEAD,
+read in a single `git diff --raw`. `plan` lists the files whose blobs differ
+from the last recorded review and carries forward the findings for the rest.
+`record` takes {"path": [finding, ...]} for the files just reviewed ([] when
+clean). A finding is a dict with at least a "title". `record` stores the
+findings and prints the complete set. Earlier findings that no longer
+appear, or whose file left the diff, are listed as resolved.
+
+The cache lives in the common git directory, so it is shared by worktrees:
+.git/sdui-pr-review/reviews/pr-<PR>.json
+"""
+
+import json
+import os
+import sys
+import time
+
+from diff_chunks import git, resolve_base
+
+CACHE_VERSION = 1
+
+
+def parse_raw(output: str) -> dict[str, dict]:
+    """path -> {"base_blob", "head_blob"} from `git diff --raw -z --no-abbrev`."""
+    fields = output.split("\0")
+    blobs = {}
+    i = 0
+    while i < len(fields) and fields[i].startswith(":"):
+        _, _, base_blob, head_blob, status = fields[i][1:].split(" ")
+        if status[0] in "RC":
+            path = fields[i + 2]
+            i += 3
+        else:
+            path = fields[i + 1]
+            i += 2
+        blobs[path] = {"base_blob": base_blob, "head_blob": head_blob}
+    return blobs
+
+
+def changed_blobs(base: str) -> dict[str, dict]:
+    return parse_raw(git("diff", "--raw", "-z", "--no-abbrev", "-M", f"{resolve_base(base)}...HEAD"))
+
+
+def get_cache_path(pr: str) -> str:
+    git_dir = git("rev-parse", "--path-format=absolute", "--git-common-dir").strip()
+    return os.path.join(git_dir, "sdui-pr-review", "reviews", f"pr-{pr}.json")
+
+
+def load_cache(path: str) -> dict:
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache.get("files", {}) if cache.get("version") == CACHE_VERSION else {}
+
+
+def save_cache(path: str, files: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": CACHE_VERSION, "updated": int(time.time()), "files": files}, f, indent=1)
+    os.replace(tmp, path)
+
+
+def is_current(entry: dict, blobs: dict) -> bool:
+    return entry.get("base_blob") == blobs["base_blob"] and entry.get("head_blob") == blobs["head_blob"]
+
+
+def plan(pr: str, base: str) -> dict:
+    """Files to review, and the findings carried forward for files unchanged since the last review."""
+    cached = load_cache(get_cache_path(pr))
+    review, carried = [], {}
+    for path, blobs in sorted(changed_blobs(base).items()):
+        entry = cached.get(path)
+        if entry is not None and is_current(entry, blobs):
+            carried[path] = entry["findings"]
+        else:
+            review.append(path)
+    return {"review": review, "unchanged": sorted(carried), "carried_findings": carried}
+
+
+def finding_key(finding: dict) -> str:
+    return str(finding.get("title", "")).strip().lower()
+
+
+def record(pr: str, base: str, reviewed: dict[str, list]) -> dict:
+    """Store findings for reviewed files; return all current and resolved findings."""
+    cache_path = get_cache_path(pr)
+    cached = load_cache(cache_path)
+    blobs = changed_blobs(base)
+    files, findings, resolved = {}, [], []
+    for path in sorted(set(blobs) | set(cached)):
+        previous = cached.get(path, {}).get("findings", [])
+        if path not in blobs:
+            resolved.extend({"path": path, **finding} for finding in previous)
+            continue
+        if path in reviewed:
+            current = reviewed[path]
+            keys = {finding_key(finding) for finding in current}
+            resolved.extend({"path": path, **finding} for finding in previous if finding_key(finding) not in keys)
+            findings.extend({"path": path, **finding} for finding in current)
+            files[path] = {**blobs[path], "findings": current}
+        elif path in cached and is_current(cached[path], blobs[path]):
+            findings.extend({"path": path, "carried": True, **finding} for finding in previous)
+            files[path] = cached[path]
+    save_cache(cache_path, files)
+    return {"findings": findings, "resolved": resolved}
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 3 or argv[0] not in ("plan", "record"):
+        print("usage: review_cache.py plan|record PR BASE_BRANCH", file=sys.stderr)
+        return 2
+    command, pr, base = argv
+    try:
+        if command == "plan":
+            result = plan(pr, base)
+        else:
+            reviewed = json.load(sys.stdin)
+            if not isinstance(reviewed, dict) or not all(isinstance(v, list) for v in reviewed.values()):
+                raise ValueError('expected {"path": [finding, ...]}')
+            result = record(pr, base, reviewed)
+    except (RuntimeError, ValueError) as e:
+        print(f"review_cache: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
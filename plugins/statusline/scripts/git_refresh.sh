@@ -0,0 +1,39 @@
+#!/bin/bash
+# Refresh the statusline's cached git/PR info for one repository.
+#
+# Usage: git_refresh.sh <repo_root> <cache_file> <fetch_pr>
+#
+# Started detached by statusline.sh when its cache is stale; never run on the
+# render path. Writes shell assignments atomically so readers never see a
+# partial cache.
+set -uo pipefail
+
+REPO_ROOT=$1
+CACHE_FILE=$2
+FETCH_PR=${3:-true}
+
+trap 'rm -f "$CACHE_FILE.$$" "$CACHE_FILE.lock"' EXIT
+
+# --no-optional-locks: don't refresh the index, which would bump its mtime and
+# invalidate the cache we are writing (and contend with the user's git)
+BRANCH=$(git -C "$REPO_ROOT" rev-parse --abbrev-ref HEAD 2>/dev/null)
+[ "$BRANCH" = HEAD ] && BRANCH=$(git -C "$REPO_ROOT" rev-parse --short=7 HEAD 2>/dev/null)
+DIRTY=$(git -C "$REPO_ROOT" --no-optional-locks status --porcelain 2>/dev/null | wc -l | tr -d ' ')
+
+BEHIND=0
+AHEAD=0
+read -r BEHIND AHEAD < <(git -C "$REPO_ROOT" rev-list --left-right --count '@{upstream}...HEAD' 2>/dev/null)
+
+PR=""
+if [ "$FETCH_PR" = true ] && command -v gh >/dev/null 2>&1; then
+    PR=$(cd "$REPO_ROOT" && gh pr view --json number --jq .number 2>/dev/null)
+fi
+
+{
+    printf 'GIT_CACHE_BRANCH=%q\n' "$BRANCH"
+    printf 'GIT_DIRTY=%q\n' "${DIRTY:-0}"
+    printf 'GIT_AHEAD=%q\n' "${AHEAD:-0}"
+    printf 'GIT_BEHIND=%q\n' "${BEHIND:-0}"
+    printf 'GIT_PR=%q\n' "$PR"
+    printf 'GIT_REFRESHED=%q\n' "$(date +%s)"
+} > "$CACHE_FILE.$$" && mv -f "$CACHE_FILE.$$" "$CACHE_FILE"
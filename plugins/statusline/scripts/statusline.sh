@@ -15,16 +15,40 @@ fi
 # ====================================================================================
 # CONFIGURATION
 # ====================================================================================
+SCRIPT_DIR=${BASH_SOURCE[0]%/*}
+[ "$SCRIPT_DIR" = "${BASH_SOURCE[0]}" ] && SCRIPT_DIR=.
 CONFIG_FILE="$HOME/.claude/statusline-config.json"
+CACHE_DIR="${XDG_CACHE_HOME:-$HOME/.cache}/claude-statusline"
+CONFIG_CACHE="$CACHE_DIR/config.sh"
 
+SHOW_SESSION=true
+SHOW_BRANCH=true
+SHOW_GIT_STATUS=true
+SHOW_PR=true
+GIT_CACHE_TTL=30
+MAX_SESSION_LEN=30
+# Session name memos not rewritten for this many days are removed
+SESSION_MEMO_TTL_DAYS=7
+
+# The config is parsed into shell assignments once and re-parsed only when
+# the config file is newer than the cache (mtime), so refreshes don't fork jq.
 if [ -f "$CONFIG_FILE" ]; then
-    SHOW_SESSION=$(jq -r '.show_session // true' "$CONFIG_FILE" 2>/dev/null || echo 'true')
-    SHOW_BRANCH=$(jq -r '.show_branch // true' "$CONFIG_FILE" 2>/dev/null || echo 'true')
-    MAX_SESSION_LEN=$(jq -r '.max_session_len // 30' "$CONFIG_FILE" 2>/dev/null || echo '30')
-else
-    SHOW_SESSION=true
-    SHOW_BRANCH=true
-    MAX_SESSION_LEN=30
+    if [ ! "$CONFIG_CACHE" -nt "$CONFIG_FILE" ]; then
+        mkdir -p "$CACHE_DIR" 2>/dev/null
+        jq -r '
+            def opt($key; $default): if .[$key] == null then $default else .[$key] end;
+            "SHOW_SESSION=\(opt("show_session"; true) | tostring | @sh)",
+            "SHOW_BRANCH=\(opt("show_branch"; true) | tostring | @sh)",
+            "SHOW_GIT_STATUS=\(opt("show_git_status"; true) | tostring | @sh)",
+            "SHOW_PR=\(opt("show_pr"; true) | tostring | @sh)",
+            "GIT_CACHE_TTL=\(opt("git_cache_ttl"; 30) | tostring | @sh)",
+            "MAX_SESSION_LEN=\(opt("max_session_len"; 30) | tostring | @sh)"
+        ' "$CONFIG_FILE" > "$CONFIG_CACHE.$$" 2>/dev/null \
+            && mv -f "$CONFIG_CACHE.$$" "$CONFIG_CACHE" 2>/dev/null
+        rm -f "$CONFIG_CACHE.$$" 2>/dev/null
+    fi
+    # shellcheck source=/dev/null
+    [ -f "$CONFIG_CACHE" ] && . "$CONFIG_CACHE"
 fi
 
 # Script-level constants (customize by editing script directly)
@@ -47,25 +71,113 @@ RESET='\033[0m'
 # ====================================================================================
 # DATA COLLECTION
 # ====================================================================================
-CURRENT_DIR=$(echo "$input" | jq -r '.workspace.current_dir // "~"' 2>/dev/null || echo '~')
+# Single parse of stdin; fields are joined with the unit separator (non-whitespace
+# for IFS, so empty fields are preserved)
+IFS=$'\x1f' read -r CURRENT_DIR SESSION_ID PROJECT_DIR PCT CTX_SIZE < <(
+    jq -r '[
+        .workspace.current_dir // "~",
+        .session_id // "",
+        .workspace.project_dir // "",
+        (.context_window.used_percentage // 0 | floor),
+        .context_window.context_window_size // 200000
+    ] | map(tostring) | join("\u001f")' <<<"$input" 2>/dev/null
+)
+CURRENT_DIR=${CURRENT_DIR:-"~"}
+PCT=${PCT:-0}
+CTX_SIZE=${CTX_SIZE:-200000}
 
+# Locate the repository by walking up from CURRENT_DIR (no git process).
+# Sets REPO_ROOT and GIT_DIR_PATH; handles worktrees, whose .git is a file.
+find_git_dir() {
+    local dir=$1 line
+    while [ -n "$dir" ] && [ -d "$dir" ]; do
+        if [ -d "$dir/.git" ]; then
+            REPO_ROOT=$dir
+            GIT_DIR_PATH="$dir/.git"
+            return 0
+        elif [ -f "$dir/.git" ]; then
+            IFS= read -r line < "$dir/.git" || return 1
+            GIT_DIR_PATH=${line#gitdir: }
+            [ "${GIT_DIR_PATH:0:1}" = / ] || GIT_DIR_PATH="$dir/$GIT_DIR_PATH"
+            REPO_ROOT=$dir
+            return 0
+        fi
+        [ "$dir" = / ] && return 1
+        dir=${dir%/*}
+        dir=${dir:-/}
+    done
+    return 1
+}
+
+# Expensive fields (dirty count, ahead/behind, PR) come from a per-repo cache
+# filled by git_refresh.sh in the background. The render path only reads it.
+# The cache is stale once HEAD or the index is newer than it, or after
+# GIT_CACHE_TTL seconds.
 GIT_BRANCH=""
-if [ "$SHOW_BRANCH" = true ]; then
-    GIT_BRANCH=$(git -C "$CURRENT_DIR" rev-parse --abbrev-ref HEAD 2>/dev/null || echo '')
+GIT_DIRTY=""
+GIT_AHEAD=""
+GIT_BEHIND=""
+GIT_PR=""
+if [ "$SHOW_BRANCH" = true ] && find_git_dir "$CURRENT_DIR"; then
+    GIT_HEAD=""
+    IFS= read -r GIT_HEAD < "$GIT_DIR_PATH/HEAD" 2>/dev/null
+    if [ "${GIT_HEAD#ref: refs/heads/}" != "$GIT_HEAD" ]; then
+        GIT_BRANCH=${GIT_HEAD#ref: refs/heads/}
+    else
+        GIT_BRANCH=${GIT_HEAD:0:7}
+    fi
+
+    if [ -n "$GIT_BRANCH" ] && { [ "$SHOW_GIT_STATUS" = true ] || [ "$SHOW_PR" = true ]; }; then
+        GIT_CACHE="$CACHE_DIR/git/${REPO_ROOT//\//%}"
+        GIT_CACHE_BRANCH=""
+        GIT_REFRESHED=0
+        # shellcheck source=/dev/null
+        [ -f "$GIT_CACHE" ] && . "$GIT_CACHE"
+        if [ "$GIT_CACHE_BRANCH" != "$GIT_BRANCH" ]; then
+            GIT_DIRTY="" GIT_AHEAD="" GIT_BEHIND="" GIT_PR=""
+        fi
+
+        NOW=${EPOCHSECONDS:-$(date +%s)}
+        if [ ! -f "$GIT_CACHE" ] || [ "$GIT_DIR_PATH/HEAD" -nt "$GIT_CACHE" ] \
+            || [ "$GIT_DIR_PATH/index" -nt "$GIT_CACHE" ] \
+            || [ $((NOW - GIT_REFRESHED)) -ge "$GIT_CACHE_TTL" ]; then
+            GIT_LOCK="$GIT_CACHE.lock"
+            GIT_WORKER=""
+            [ -f "$GIT_LOCK" ] && IFS= read -r GIT_WORKER < "$GIT_LOCK"
+            if [ -z "$GIT_WORKER" ] || ! kill -0 "$GIT_WORKER" 2>/dev/null; then
+                mkdir -p "$CACHE_DIR/git" 2>/dev/null
+                bash "$SCRIPT_DIR/git_refresh.sh" "$REPO_ROOT" "$GIT_CACHE" "$SHOW_PR" \
+                    </dev/null >/dev/null 2>&1 &
+                echo "$!" > "$GIT_LOCK"
+            fi
+        fi
+    fi
 fi
 
 SESSION_NAME=""
 if [ "$SHOW_SESSION" = true ]; then
-    SESSION_ID=$(echo "$input" | jq -r '.session_id // ""' 2>/dev/null || echo '')
     if [ -n "$SESSION_ID" ]; then
-        PROJECT_DIR=$(echo "$input" | jq -r '.workspace.project_dir // ""' 2>/dev/null || echo '')
         if [ -n "$PROJECT_DIR" ]; then
-            ENCODED_PATH=$(echo "$PROJECT_DIR" | sed 's|/|-|g')
+            ENCODED_PATH=${PROJECT_DIR//\//-}
             INDEX_FILE="$HOME/.claude/projects/${ENCODED_PATH}/sessions-index.json"
+            # The index grows with every session ever run in the project, so the
+            # lookup is memoized per session and redone only when the index is
+            # newer than the memo (empty names are memoized too). Writing a memo
+            # also prunes the memos of sessions gone for SESSION_MEMO_TTL_DAYS.
+            SESSION_MEMO="$CACHE_DIR/sessions/${SESSION_ID//[^A-Za-z0-9_-]/_}"
             if [ -f "$INDEX_FILE" ]; then
-                SESSION_NAME=$(jq -r --arg sid "$SESSION_ID" \
-                    '.entries[] | select(.sessionId == $sid) | .summary // empty' \
-                    "$INDEX_FILE" 2>/dev/null || echo '')
+                if [ "$SESSION_MEMO" -nt "$INDEX_FILE" ]; then
+                    IFS= read -r SESSION_NAME < "$SESSION_MEMO"
+                else
+                    SESSION_NAME=$(jq -r --arg sid "$SESSION_ID" \
+                        'first(.entries[] | select(.sessionId == $sid) | .summary // empty)' \
+                        "$INDEX_FILE" 2>/dev/null || echo '')
+                    SESSION_NAME=${SESSION_NAME%%$'\n'*}
+                    mkdir -p "$CACHE_DIR/sessions" 2>/dev/null \
+                        && printf '%s\n' "$SESSION_NAME" > "$SESSION_MEMO.$$" 2>/dev/null \
+                        && mv -f "$SESSION_MEMO.$$" "$SESSION_MEMO" 2>/dev/null
+                    find "$CACHE_DIR/sessions" -type f -mtime +"$SESSION_MEMO_TTL_DAYS" -delete 2>/dev/null
+                fi
             fi
         fi
     fi
@@ -76,9 +188,6 @@ if [ "$SHOW_SESSION" = true ]; then
 fi
 
 # Context window
-PCT=$(echo "$input" | jq -r '.context_window.used_percentage // 0' 2>/dev/null | cut -d. -f1 || echo '0')
-PCT=${PCT:-0}
-CTX_SIZE=$(echo "$input" | jq -r '.context_window.context_window_size // 200000' 2>/dev/null || echo '200000')
 MAX_K=$((CTX_SIZE / 1000))
 USED_K=$((PCT * MAX_K / 100))
 FILLED=$((PCT * BAR_LENGTH / 100))
@@ -118,6 +227,14 @@ if [ -n "$SESSION_NAME" ]; then
 fi
 if [ -n "$GIT_BRANCH" ]; then
     MIDDLE="${MIDDLE} ${SEP} ⎇ ${LAVENDER}${GIT_BRANCH}${RESET}"
+    if [ "$SHOW_GIT_STATUS" = true ]; then
+        [ "${GIT_DIRTY:-0}" -gt 0 ] && MIDDLE="${MIDDLE} ${AMBER}±${GIT_DIRTY}${RESET}"
+        [ "${GIT_AHEAD:-0}" -gt 0 ] && MIDDLE="${MIDDLE} ↑${GIT_AHEAD}"
+        [ "${GIT_BEHIND:-0}" -gt 0 ] && MIDDLE="${MIDDLE} ↓${GIT_BEHIND}"
+    fi
+    if [ "$SHOW_PR" = true ] && [ -n "$GIT_PR" ]; then
+        MIDDLE="${MIDDLE} ${SEP} ${SOFT_WHITE}PR #${GIT_PR}${RESET}"
+    fi
 fi
 
 printf "› ${CYAN}%s${RESET}%b ${SEP} ⚡ ${CTX_COLOR}%dk/%dk${RESET} ${BAR} ${CTX_COLOR}%d%%${RESET}" \
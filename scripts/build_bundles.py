@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Build precompiled zipapp bundles for the plugins' Python hooks.
+
+Usage:
+    python3 scripts/build_bundles.py [--check]
+
+Each hook entry point becomes plugins/<plugin>/dist/<entry>.pyz holding the
+entry module (run by a small __main__), its sibling modules and the shared
+lib/ modules, each as source plus bytecode compiled at -OO with unchecked
+hash-based invalidation. The hooks manifests launch these bundles with
+`python3 -S -E`, so a hook skips site-packages setup, byte-compilation and
+directory scans; hook-dispatcher imports handlers from them in-process.
+
+Bytecode is specific to the Python version that built it; other versions
+ignore it and fall back to the bundled source. Builds are reproducible: zip
+members are sorted, stored uncompressed and carry a fixed timestamp.
+
+Run this after changing any hook source; --check exits 1 when a bundle's
+sources are out of date.
+"""
+
+import argparse
+import importlib.util
+import io
+import marshal
+import sys
+import zipfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+LIB_DIR = REPO_ROOT / "lib"
+PLUGINS_DIR = REPO_ROOT / "plugins"
+
+# plugin -> {bundle name: entry script relative to the plugin}
+BUNDLES = {
+    "command-safety": {"validate_command": "hooks/validate_command.py"},
+    "hook-dispatcher": {"dispatch": "hooks/dispatch.py"},
+    "lint-runner": {"lint_runner": "hooks/lint_runner.py"},
+    "notifications": {
+        "notify_action_required": "scripts/notify_action_required.py",
+        "notify_finished": "scripts/notify_finished.py",
+    },
+}
+
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+OPTIMIZE = 2
+
+
+def compile_pyc(source: bytes, filename: str) -> bytes:
+    """Bytecode for `source` as an unchecked hash-based .pyc."""
+    code = compile(source, filename, "exec", dont_inherit=True, optimize=OPTIMIZE)
+    flags = 0b01  # hash-based, source not checked
+    header = importlib.util.MAGIC_NUMBER + flags.to_bytes(4, "little") + importlib.util.source_hash(source)
+    return header + marshal.dumps(code)
+
+
+def main_stub(module: str) -> bytes:
+    """__main__ running the entry module's main()."""
+    return f"import sys\n\nfrom {module} import main\n\nsys.exit(main())\n".encode()
+
+
+def bundle_sources(plugin: str, entry: str) -> dict[str, bytes]:
+    """Module name -> source for one bundle, including the __main__ stub."""
+    plugin_dir = PLUGINS_DIR / plugin
+    entry_path = plugin_dir / entry
+    entry_points = {plugin_dir / path for path in BUNDLES[plugin].values()}
+    sources = {path.stem: path.read_bytes() for path in sorted(LIB_DIR.glob("*.py"))}
+    for path in sorted(entry_path.parent.glob("*.py")):
+        if path not in entry_points:
+            sources[path.stem] = path.read_bytes()
+    sources[entry_path.stem] = entry_path.read_bytes()
+    sources["__main__"] = main_stub(entry_path.stem)
+    return sources
+
+
+def build_bundle(plugin: str, name: str) -> bytes:
+    """Zipapp bytes for one bundle."""
+    members = {}
+    for module, source in bundle_sources(plugin, BUNDLES[plugin][name]).items():
+        members[f"{module}.py"] = source
+        members[f"{module}.pyc"] = compile_pyc(source, f"{name}.pyz/{module}.py")
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for member in sorted(members):
+            info = zipfile.ZipInfo(member, date_time=ZIP_DATE)
+            info.external_attr = 0o644 << 16
+            archive.writestr(info, members[member])
+    return buffer.getvalue()
+
+
+def bundle_path(plugin: str, name: str) -> Path:
+    return PLUGINS_DIR / plugin / "dist" / f"{name}.pyz"
+
+
+def stale_bundles() -> list[Path]:
+    """Bundles whose bundled sources differ from the tree (or are missing)."""
+    stale = []
+    for plugin, bundles in BUNDLES.items():
+        for name, entry in bundles.items():
+            path = bundle_path(plugin, name)
+            if not path.exists():
+                stale.append(path)
+                continue
+            with zipfile.ZipFile(path) as archive:
+                bundled = {n[:-3]: archive.read(n) for n in archive.namelist() if n.endswith(".py")}
+            if bundled != bundle_sources(plugin, entry):
+                stale.append(path)
+    return stale
+
+
+def build_all() -> list[Path]:
+    """Write every bundle; returns the paths written."""
+    written = []
+    for plugin, bundles in BUNDLES.items():
+        for name in bundles:
+            path = bundle_path(plugin, name)
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(".pyz.tmp")
+            tmp.write_bytes(build_bundle(plugin, name))
+            tmp.replace(path)
+            written.append(path)
+    return written
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build precompiled zipapp bundles for the plugins' hooks")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any bundle is out of date")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        stale = stale_bundles()
+        for path in stale:
+            print(f"out of date: {path.relative_to(REPO_ROOT)}", file=sys.stderr)
+        return 1 if stale else 0
+
+    for path in build_all():
+        print(f"built {path.relative_to(REPO_ROOT)} (python {sys.version_info.major}.{sys.version_info.minor})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
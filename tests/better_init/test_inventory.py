@@ -0,0 +1,141 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../plugins/better-init/skills/init-guidance/scripts'))
+
+import inventory  # noqa: E402
+
+
+def write(root, path, content=""):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w") as f:
+        f.write(content)
+
+
+def git(root, *args):
+    subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = str(tmp_path)
+    write(root, ".gitignore", "build/\n*.log\n")
+    write(root, "pyproject.toml", '[project]\nname = "app"\n[project.scripts]\napp = "app.cli:main"\n')
+    write(root, "app/__init__.py", "")
+    write(root, "app/main.py", "print('hello')\n" * 20)
+    write(root, "tests/conftest.py", "")
+    write(root, "tests/test_main.py", "def test_main(): pass\n")
+    write(root, "web/package.json", json.dumps({"name": "web", "main": "src/index.js"}))
+    write(root, "web/src/index.js", "console.log(1)\n")
+    write(root, "web/src/app.test.js", "test('x', () => {})\n")
+    write(root, "build/out.py", "x = 1\n" * 1000)
+    write(root, "debug.log", "noise\n" * 1000)
+    return root
+
+
+@pytest.fixture
+def repo(project):
+    git(project, "init", "-q")
+    git(project, "-c", "user.name=t", "-c", "user.email=t@t", "add", ".")
+    git(project, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init")
+    return project
+
+
+class TestBuildInventory:
+    def test_summarizes_files(self):
+        sizes = {"a/x.py": 300, "a/b/c/y.ts": 100, "package.json": 10, "tests/test_x.py": 50}
+        changes = {"a/x.py": 4, "a/b/c/y.ts": 2}
+        result = inventory.build_inventory("/nonexistent", sizes, changes, top=10)
+        assert result["files"] == 4
+        assert result["languages"] == {"Python": 77.8, "TypeScript": 22.2}
+        assert result["manifests"] == ["package.json"]
+        assert result["subprojects"] == ["."]
+        assert result["largest_dirs"][0] == {"dir": "a", "bytes": 300, "files": 1}
+        assert {"dir": "a/b", "bytes": 100, "files": 1} in result["largest_dirs"]
+        assert result["most_changed_dirs"] == [{"dir": "a", "changes": 4}, {"dir": "a/b", "changes": 2}]
+        assert result["tests"]["files"] == 1
+
+    def test_top_limits_rankings(self):
+        sizes = {f"d{i}/f.py": i for i in range(20)}
+        result = inventory.build_inventory("/nonexistent", sizes, {}, top=3)
+        assert [d["dir"] for d in result["largest_dirs"]] == ["d19", "d18", "d17"]
+
+
+class TestWalk:
+    def test_honors_gitignore_outside_git(self, project):
+        sizes = inventory.walk_files(project)
+        assert "app/main.py" in sizes
+        assert "build/out.py" not in sizes
+        assert "debug.log" not in sizes
+
+    def test_nested_gitignore_is_relative_to_its_directory(self, project):
+        write(project, "web/.gitignore", "/src/*.test.js\n")
+        write(project, "web/src/nested/src/keep.test.js", "")
+        sizes = inventory.walk_files(project)
+        assert "web/src/app.test.js" not in sizes
+        assert "web/src/nested/src/keep.test.js" in sizes
+
+    def test_inventory_outside_git(self, project):
+        result = inventory.inventory(project)
+        assert result["tests"]["frameworks"] == ["pytest"]
+        assert result["most_changed_dirs"] == []
+
+
+class TestGit:
+    def test_lists_tracked_and_untracked_files(self, repo):
+        write(repo, "app/new.py", "y = 2\n")
+        write(repo, "build/ignored.py", "z = 3\n")
+        sizes, changes = inventory.list_git_files(repo, 100)
+        assert sizes["app/main.py"] == os.path.getsize(os.path.join(repo, "app/main.py"))
+        assert sizes["app/new.py"] == 6
+        assert "build/ignored.py" not in sizes and "debug.log" not in sizes
+        assert changes["app/main.py"] == 1
+
+    def test_inventory(self, repo):
+        result = inventory.inventory(os.path.join(repo, "app"))
+        assert result["languages"].keys() == {"Python", "JavaScript"}
+        assert result["manifests"] == ["pyproject.toml", "web/package.json"]
+        assert result["subprojects"] == [".", "web"]
+        assert "app = app.cli:main" in result["entry_points"]
+        assert "web/src/index.js" in result["entry_points"]
+        assert "app/main.py" in result["entry_points"]
+        assert result["tests"]["files"] == 3
+        assert {"dir": "app", "changes": 2} in result["most_changed_dirs"]
+
+    def test_cached_per_head(self, repo):
+        first = inventory.inventory(repo)
+        cache_dir = os.path.join(repo, ".git", "claude-inventory")
+        assert len(os.listdir(cache_dir)) == 1
+        with open(os.path.join(cache_dir, os.listdir(cache_dir)[0]), "w") as f:
+            json.dump({"cached": True}, f)
+        assert inventory.inventory(repo) == {"cached": True}  # same HEAD and files, served from cache
+
+        git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "empty", "--allow-empty")
+        assert inventory.inventory(repo) == first
+        assert len(os.listdir(cache_dir)) == 2
+
+    def test_untracked_changes_invalidate_cache(self, repo):
+        first = inventory.inventory(repo)
+        write(repo, "app/extra.py", "pass\n")
+        assert inventory.inventory(repo)["files"] == first["files"] + 1
+        write(repo, "app/extra.py", "pass\n" * 100)
+        assert inventory.inventory(repo)["bytes"] == first["bytes"] + 500
+        os.unlink(os.path.join(repo, "app", "extra.py"))
+        assert inventory.inventory(repo) == first
+
+    def test_cache_keeps_recent_entries(self, repo, monkeypatch):
+        monkeypatch.setattr(inventory, "CACHE_KEEP", 2)
+        for top in (1, 2, 3):
+            inventory.inventory(repo, top=top)
+        assert len(os.listdir(os.path.join(repo, ".git", "claude-inventory"))) == 2
+
+    def test_main_prints_json(self, repo, capsys):
+        assert inventory.main(["--root", repo, "--no-cache", "--top", "1"]) == 0
+        result = json.loads(capsys.readouterr().out)
+        assert len(result["largest_dirs"]) == 1
+        assert not os.path.exists(os.path.join(repo, ".git", "claude-inventory"))
@@ -0,0 +1,134 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../plugins/notifications/scripts'))
+
+import dbus_notify  # noqa: E402
+from platform_utils import send_notification  # noqa: E402
+
+
+class TestWireFormat:
+    def test_split_signature(self):
+        assert dbus_notify.split_signature("susssasa{sv}i") == ["s", "u", "s", "s", "s", "as", "a{sv}", "i"]
+        assert dbus_notify.split_signature("a(yv)aai") == ["a(yv)", "aai"]
+
+    def test_round_trip(self):
+        values = ["Claude Code", 7, "", "Title", "Body", ["a", "b"], {"urgency": ("y", 2), "x": ("s", "é")}, -1]
+        message = dbus_notify.encode_message(dbus_notify.METHOD_CALL, 3, {
+            "path": dbus_notify.NOTIFICATIONS_PATH, "member": "Notify",
+        }, dbus_notify.NOTIFY_SIGNATURE, values)
+        assert message[:1] == b"l"
+
+        class FakeSocket:
+            def recv(self, size):
+                data, self.data = self.data[:size], self.data[size:]
+                return data
+
+        connection = dbus_notify.Connection.__new__(dbus_notify.Connection)
+        connection.pending = b""
+        connection.sock = FakeSocket()
+        connection.sock.data = message
+        received = connection.receive()
+        assert received.type == dbus_notify.METHOD_CALL
+        assert received.serial == 3
+        assert received.fields["member"] == "Notify"
+        assert received.fields["signature"] == dbus_notify.NOTIFY_SIGNATURE
+        assert received.body == values
+
+    def test_parse_address(self):
+        assert dbus_notify.parse_address("unix:path=/run/user/1000/bus,guid=abc") == "/run/user/1000/bus"
+        assert dbus_notify.parse_address("tcp:host=x;unix:abstract=/tmp/dbus-%41") == "\0/tmp/dbus-A"
+        assert dbus_notify.parse_address("tcp:host=localhost,port=1") is None
+
+
+class StubNotificationServer:
+    """org.freedesktop.Notifications on a private bus, recording Notify calls."""
+
+    def __init__(self, path):
+        self.calls = []
+        self.connection = dbus_notify.Connection(path)
+        self.connection.call("org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus",
+                             "RequestName", "su", [dbus_notify.NOTIFICATIONS_NAME, 4])
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        self.connection.sock.settimeout(None)
+        while True:
+            try:
+                message = self.connection.receive()
+            except (OSError, dbus_notify.DBusError):
+                return
+            if message.type == dbus_notify.METHOD_CALL and message.fields.get("member") == "Notify":
+                self.calls.append(message.body)
+                replaces_id = message.body[1]
+                self.connection.reply(message, "u", [replaces_id or len(self.calls)])
+
+
+BUS_CONFIG = """<busconfig>
+  <type>session</type>
+  <listen>unix:path={path}</listen>
+  <auth>EXTERNAL</auth>
+  <policy context="default">
+    <allow send_destination="*"/>
+    <allow own="*"/>
+    <allow receive_sender="*"/>
+  </policy>
+</busconfig>
+"""
+
+
+@pytest.fixture
+def session_bus(tmp_path, monkeypatch):
+    if shutil.which("dbus-daemon") is None:
+        pytest.skip("dbus-daemon not installed")
+    path = str(tmp_path / "bus")
+    # A private bus without service activation, so no real notification daemon is started
+    config = tmp_path / "bus.conf"
+    config.write_text(BUS_CONFIG.format(path=path))
+    daemon = subprocess.Popen(
+        ["dbus-daemon", "--nofork", "--print-address=1", f"--config-file={config}"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    address = daemon.stdout.readline().strip()
+    monkeypatch.setenv("DBUS_SESSION_BUS_ADDRESS", address)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    monkeypatch.setenv("CLAUDE_NOTIFY_BACKEND", "desktop")
+    yield path
+    daemon.terminate()
+    daemon.wait()
+
+
+class TestSessionBus:
+    @patch("platform_utils.detect_os", return_value="linux")
+    def test_replaces_toast_per_session(self, mock_detect_os, session_bus):
+        server = StubNotificationServer(session_bus)
+        with patch("subprocess.Popen") as mock_popen:
+            assert send_notification("Claude Code - Finished", "Task completed", session_id="one")
+            assert send_notification("Claude Code - Permission Required", "Allow?", "critical", session_id="one")
+            assert send_notification("Claude Code - Finished", "Task completed", session_id="two")
+        mock_popen.assert_not_called()
+
+        first, second, other = server.calls
+        assert first[:5] == ["Claude Code", 0, "", "Claude Code - Finished", "Task completed"]
+        assert first[6] == {"urgency": ("y", 1)}
+        assert second[1] == 1
+        assert second[6] == {"urgency": ("y", 2)}
+        assert other[1] == 0
+
+    @patch("platform_utils.detect_os", return_value="linux")
+    def test_falls_back_to_notify_send_without_server(self, mock_detect_os, session_bus):
+        with patch("subprocess.Popen") as mock_popen:
+            assert send_notification("Title", "Body")
+        assert mock_popen.call_args[0][0][0] == "notify-send"
+
+    def test_no_bus(self, monkeypatch):
+        monkeypatch.delenv("DBUS_SESSION_BUS_ADDRESS", raising=False)
+        monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+        assert dbus_notify.notify("Claude Code", "Title", "Body") is None
@@ -36,14 +36,15 @@ class TestMain:
     @patch("notify_action_required.play_sound")
     @patch("notify_action_required.send_notification")
     def test_main_with_permission_prompt_on_linux(self, mock_notify, mock_sound, mock_detect_os):
-        data = {"notification_type": "permission_prompt", "message": "Allow file write?"}
+        data = {"notification_type": "permission_prompt", "message": "Allow file write?", "session_id": "abc"}
         with patch("sys.stdin", StringIO(json.dumps(data))):
             result = main()
         assert result == 0
         mock_notify.assert_called_once_with(
             "Claude Code - Permission Required",
             "Allow file write?",
-            "normal"
+            "normal",
+            session_id="abc",
         )
         mock_sound.assert_called_once_with("attention")
 
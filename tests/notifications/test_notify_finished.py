@@ -14,11 +14,11 @@ class TestMain:
     @patch("notify_finished.play_sound")
     @patch("notify_finished.send_notification")
     def test_main_with_data_on_linux(self, mock_notify, mock_sound, mock_detect_os):
-        data = {"stop_hook_data": {"stop_reason": "end_turn", "duration_ms": 1000}}
+        data = {"session_id": "abc", "stop_hook_data": {"stop_reason": "end_turn", "duration_ms": 1000}}
         with patch("sys.stdin", StringIO(json.dumps(data))):
             result = main()
         assert result == 0
-        mock_notify.assert_called_once_with(NOTIFICATION_TITLE, "Task completed")
+        mock_notify.assert_called_once_with(NOTIFICATION_TITLE, "Task completed", session_id="abc")
         mock_sound.assert_called_once_with("complete")
 
     @patch("notify_finished.detect_os", return_value="linux")
@@ -28,7 +28,7 @@ class TestMain:
         with patch("sys.stdin", StringIO("")):
             result = main()
         assert result == 0
-        mock_notify.assert_called_once_with(NOTIFICATION_TITLE, "Task completed")
+        mock_notify.assert_called_once_with(NOTIFICATION_TITLE, "Task completed", session_id=None)
         mock_sound.assert_called_once_with("complete")
 
     @patch("notify_finished.detect_os", return_value="macos")
@@ -39,7 +39,7 @@ class TestMain:
         with patch("sys.stdin", StringIO(json.dumps(data))):
             result = main()
         assert result == 0
-        mock_notify.assert_called_once_with(NOTIFICATION_TITLE, "Task completed")
+        mock_notify.assert_called_once_with(NOTIFICATION_TITLE, "Task completed", session_id=None)
         mock_sound.assert_not_called()
 
     @patch("notify_finished.detect_os", return_value="windows")
@@ -50,5 +50,5 @@ class TestMain:
         with patch("sys.stdin", StringIO(json.dumps(data))):
             result = main()
         assert result == 0
-        mock_notify.assert_called_once_with(NOTIFICATION_TITLE, "Task completed")
+        mock_notify.assert_called_once_with(NOTIFICATION_TITLE, "Task completed", session_id=None)
         mock_sound.assert_not_called()
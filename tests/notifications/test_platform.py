@@ -1,4 +1,5 @@
 import json
+import pytest
 from unittest.mock import patch, MagicMock
 import sys
 import os
@@ -6,7 +7,22 @@ from io import StringIO
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../plugins/notifications/scripts'))
 
-from platform_utils import detect_os, get_sound_path, send_notification, play_sound, read_stdin  # noqa: E402
+from platform_utils import (  # noqa: E402
+    detect_os, format_terminal_notification, get_backend, get_sound_path, get_terminal_style,
+    play_sound, read_stdin, send_notification,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_session_bus(monkeypatch):
+    """Keep notifications off the developer's real session bus."""
+    monkeypatch.delenv("DBUS_SESSION_BUS_ADDRESS", raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+
+
+@pytest.fixture
+def desktop_backend(monkeypatch):
+    monkeypatch.setenv("CLAUDE_NOTIFY_BACKEND", "desktop")
 
 
 class TestDetectOS:
@@ -39,6 +55,7 @@ class TestGetSoundPath:
         assert path == "/usr/share/sounds/freedesktop/stereo/message-new-instant.oga"
 
 
+@pytest.mark.usefixtures("desktop_backend")
 class TestSendNotification:
     @patch("subprocess.Popen")
     def test_linux_notification(self, mock_popen):
@@ -182,6 +199,7 @@ class TestSendNotification:
             assert "``n" in ps_script
 
 
+@pytest.mark.usefixtures("desktop_backend")
 class TestPlaySound:
     """Test Linux sound playback. macOS/Windows use native notification sounds."""
 
@@ -247,3 +265,84 @@ class TestReadStdin:
             result = read_stdin()
         assert result == data
         assert result["stop_hook_data"]["stop_reason"] == "end_turn"
+
+
+class TestBackendSelection:
+    @pytest.fixture(autouse=True)
+    def clean_env(self, monkeypatch):
+        for name in ("CLAUDE_NOTIFY_BACKEND", "DISPLAY", "WAYLAND_DISPLAY", "SSH_CONNECTION"):
+            monkeypatch.delenv(name, raising=False)
+
+    def test_override(self, monkeypatch):
+        monkeypatch.setenv("CLAUDE_NOTIFY_BACKEND", "terminal")
+        assert get_backend() == "terminal"
+
+    @patch("platform_utils.detect_os", return_value="linux")
+    def test_linux_without_display_uses_terminal(self, mock_detect_os):
+        with patch("shutil.which", return_value="/usr/bin/notify-send"):
+            assert get_backend() == "terminal"
+
+    @patch("platform_utils.detect_os", return_value="linux")
+    def test_linux_desktop(self, mock_detect_os, monkeypatch):
+        monkeypatch.setenv("WAYLAND_DISPLAY", "wayland-0")
+        with patch("shutil.which", return_value="/usr/bin/notify-send"):
+            assert get_backend() == "desktop"
+        with patch("shutil.which", return_value=None):
+            assert get_backend() == "terminal"
+
+    @patch("platform_utils.detect_os", return_value="macos")
+    def test_macos_over_ssh_uses_terminal(self, mock_detect_os, monkeypatch):
+        with patch("shutil.which", return_value="/opt/homebrew/bin/terminal-notifier"):
+            assert get_backend() == "desktop"
+            monkeypatch.setenv("SSH_CONNECTION", "10.0.0.1 50000 10.0.0.2 22")
+            assert get_backend() == "terminal"
+
+
+class TestTerminalNotification:
+    @pytest.fixture(autouse=True)
+    def clean_env(self, monkeypatch):
+        for name in ("CLAUDE_NOTIFY_TERMINAL", "TERM_PROGRAM", "VTE_VERSION", "TMUX"):
+            monkeypatch.delenv(name, raising=False)
+        monkeypatch.setenv("TERM", "xterm-256color")
+
+    def test_style_detection(self, monkeypatch):
+        assert get_terminal_style() == "bel"
+        monkeypatch.setenv("TERM_PROGRAM", "iTerm.app")
+        assert get_terminal_style() == "osc9"
+        monkeypatch.setenv("TERM_PROGRAM", "WezTerm")
+        assert get_terminal_style() == "osc777"
+        monkeypatch.setenv("CLAUDE_NOTIFY_TERMINAL", "osc9")
+        assert get_terminal_style() == "osc9"
+
+    def test_sequences(self):
+        assert format_terminal_notification("A; B", "x;y", "osc777") == "\033]777;notify;A, B;x;y\a"
+        assert format_terminal_notification("Title", "Body", "osc9") == "\033]9;Title: Body\a"
+        assert format_terminal_notification("Title", "Body", "bel") == "\a"
+
+    def test_strips_control_characters(self):
+        sequence = format_terminal_notification("T", "evil\a\033]52;c;payload\a", "osc9")
+        assert sequence == "\033]9;T: evil  ]52;c;payload \a"
+
+    def test_tmux_passthrough(self, monkeypatch):
+        monkeypatch.setenv("TMUX", "/tmp/tmux-1000/default,1,0")
+        assert format_terminal_notification("T", "B", "osc9") == "\033Ptmux;\033\033]9;T: B\a\033\\"
+        assert format_terminal_notification("T", "B", "bel") == "\a"
+
+    def test_writes_to_tty_without_spawning(self, monkeypatch):
+        master, slave = os.openpty()
+        try:
+            monkeypatch.setenv("CLAUDE_NOTIFY_BACKEND", "terminal")
+            monkeypatch.setenv("CLAUDE_NOTIFY_TERMINAL", "osc777")
+            with patch("platform_utils.TTY_PATH", os.ttyname(slave)), patch("subprocess.Popen") as mock_popen:
+                assert send_notification("Claude Code - Finished", "Task completed")
+                assert play_sound("complete") is False
+            mock_popen.assert_not_called()
+            assert os.read(master, 1024) == b"\033]777;notify;Claude Code - Finished;Task completed\a"
+        finally:
+            os.close(master)
+            os.close(slave)
+
+    def test_no_tty(self, monkeypatch):
+        monkeypatch.setenv("CLAUDE_NOTIFY_BACKEND", "terminal")
+        with patch("platform_utils.TTY_PATH", "/nonexistent/tty"):
+            assert send_notification("Title", "Body") is False
@@ -0,0 +1,119 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../plugins/sdui-pr-review/scripts'))
+
+import check_conventions  # noqa: E402
+
+
+def rules(violations):
+    return [v["rule"] for v in violations]
+
+
+def git(root, *args):
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=root, check=True,
+                   capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    git(root, "init", "-q", "-b", "main")
+    git(root, "commit", "-q", "--allow-empty", "-m", "base")
+    git(root, "checkout", "-qb", "feature/OPTPRIME-42-tag-config")
+    monkeypatch.chdir(root)
+    return root
+
+
+class TestBranch:
+    @pytest.mark.parametrize("name", [
+        "feature/OPTPRIME-123-add-tag-config",
+        "bugfix/IDAAS-9-token-expiry",
+        "chore/CODEFELLAS-1000-bump",
+    ])
+    def test_valid(self, name):
+        assert check_conventions.check_branch(name) == []
+
+    @pytest.mark.parametrize("name,expected", [
+        ("feat/OPTPRIME-1-x", ["branch-prefix"]),
+        ("feature/add-tag-config", ["branch-ticket"]),
+        ("feature/OPTPRIME-1", ["branch-description"]),
+        ("feature/OPTPRIME-1-tag config", ["branch-characters"]),
+        ("my_branch", ["branch-prefix", "branch-ticket", "branch-characters"]),
+        ("", ["branch-detached"]),
+    ])
+    def test_invalid(self, name, expected):
+        assert rules(check_conventions.check_branch(name)) == expected
+
+    def test_ticket_prefixes(self):
+        assert check_conventions.check_branch("feature/OPTPRIME-1-x", {"OPTPRIME"}) == []
+        assert rules(check_conventions.check_branch("feature/ABC-1-x", {"OPTPRIME"})) == ["branch-ticket"]
+
+
+class TestSubject:
+    @pytest.mark.parametrize("subject", [
+        "feat(MusicSchool): add tag configuration endpoint",
+        "fix(Authentication): resolve token expiration issue",
+        "test: add integration tests for invoice module",
+        "refactor(MasterData)!: extract repository interface",
+        "docs: document the API for the embed widget",
+    ])
+    def test_valid(self, subject):
+        assert check_conventions.check_subject(subject) == []
+
+    @pytest.mark.parametrize("subject,expected", [
+        ("Fixed bug", ["commit-format"]),
+        ("WIP", ["commit-unsquashed"]),
+        ("fixup! feat: add endpoint", ["commit-unsquashed"]),
+        ("OPTPRIME-123 changes", ["commit-format"]),
+        ("feature: add endpoint", ["commit-type"]),
+        ("feat(): add endpoint", ["commit-scope"]),
+        ("feat: Add endpoint.", ["commit-case", "commit-period"]),
+        ("fix: added missing check", ["commit-mood"]),
+        ("fix: OPTPRIME-123 resolve crash", ["commit-ticket"]),
+        ("chore: update files", ["commit-vague"]),
+        ("feat: ", ["commit-description"]),
+    ])
+    def test_invalid(self, subject, expected):
+        assert rules(check_conventions.check_subject(subject)) == expected
+
+    def test_acronyms_may_be_uppercase(self):
+        assert check_conventions.check_subject("feat(Api): expose JSON export") == []
+        assert check_conventions.check_subject("feat: JSON export for invoices") == []
+
+
+class TestCheck:
+    def test_single_log_pass(self, repo):
+        for subject in ["feat(Tags): add tag endpoint", "Fixed bug", "fix: handle empty tags."]:
+            git(repo, "commit", "-q", "--allow-empty", "-m", subject)
+        git(repo, "checkout", "-q", "-b", "side", "main")
+        git(repo, "commit", "-q", "--allow-empty", "-m", "side work")
+        git(repo, "checkout", "-q", "feature/OPTPRIME-42-tag-config")
+        git(repo, "merge", "-q", "--no-ff", "-m", "Merge branch side", "side")
+
+        result = check_conventions.check("main")
+        assert result["branch"] == {"name": "feature/OPTPRIME-42-tag-config", "valid": True, "violations": []}
+        assert sorted(c["subject"] for c in result["commits"]) == ["Fixed bug", "fix: handle empty tags.", "side work"]
+        assert result["totals"] == {"commits": 4, "invalid": 3}
+
+        everything = check_conventions.check("main", show_all=True)
+        assert [c["valid"] for c in everything["commits"]].count(True) == 1
+        assert len(everything["commits"]) == 4
+
+    def test_warnings_do_not_invalidate(self, repo):
+        git(repo, "commit", "-q", "--allow-empty", "-m", "fix: added retry")
+        result = check_conventions.check("main", branch="feat/x")
+        assert result["commits"][0]["valid"] is True
+        assert result["branch"]["valid"] is False
+        assert result["totals"]["invalid"] == 0
+
+    def test_main(self, repo, capsys):
+        git(repo, "commit", "-q", "--allow-empty", "-m", "feat: add x")
+        assert check_conventions.main(["main", "--ticket-prefixes", "IDAAS"]) == 0
+        result = json.loads(capsys.readouterr().out)
+        assert rules(result["branch"]["violations"]) == ["branch-ticket"]
+        assert check_conventions.main(["missing"]) == 1
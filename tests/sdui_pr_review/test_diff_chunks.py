@@ -0,0 +1,181 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../plugins/sdui-pr-review/scripts'))
+
+import diff_chunks  # noqa: E402
+
+
+def write(root, path, content):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w") as f:
+        f.write(content)
+
+
+def git(root, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=root, check=True, capture_output=True, text=True,
+    ).stdout
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    git(root, "init", "-q", "-b", "main")
+    write(root, "src/app.py", "".join(f"line {i}\n" for i in range(1, 101)))
+    write(root, "src/old.py", "gone = True\n")
+    write(root, "package-lock.json", "{}\n")
+    git(root, "add", ".")
+    git(root, "commit", "-qm", "base")
+    git(root, "checkout", "-qb", "feature/X-1-change")
+
+    app = [f"line {i}\n" for i in range(1, 101)]
+    app[4] = "changed 5\n"
+    app[89] = "changed 90\n"
+    write(root, "src/app.py", "".join(app))
+    os.unlink(os.path.join(root, "src/old.py"))
+    write(root, "tests/test_app.py", "def test_app():\n    assert True\n")
+    write(root, "package-lock.json", "{\n" + '  "a": 1,\n' * 50 + "}\n")
+    write(root, "vendor/lib.js", "var x = 1;\n")
+    write(root, "api/client.py", "# @generated by codegen\nclass Client: pass\n")
+    write(root, "web/app.min.js", "x()\n")
+    git(root, "add", ".")
+    git(root, "commit", "-qm", "change")
+    monkeypatch.chdir(root)
+    return root
+
+
+class TestClassify:
+    @pytest.mark.parametrize("path,category", [
+        ("src/service.py", "source"),
+        ("yarn.lock", "lockfile"),
+        ("services/api/go.sum", "lockfile"),
+        ("third_party/zlib/inflate.c", "vendored"),
+        ("static/app.min.js", "generated"),
+        ("proto/user_pb2.py", "generated"),
+        ("dist/bundle.js", "generated"),
+        ("web/src/__generated__/query.ts", "generated"),
+        ("src/build/config.py", "source"),
+        ("tools/gen/codegen.py", "source"),
+        ("packages/ui/dist.py", "source"),
+        ("deps.lock", "source"),
+        ("tests/test_service.py", "test"),
+        ("src/service.test.ts", "test"),
+        ("pkg/handler_test.go", "test"),
+    ])
+    def test_by_path(self, path, category):
+        assert diff_chunks.classify(path, [], False, {}) == category
+
+    def test_binary_and_attributes(self):
+        assert diff_chunks.classify("logo.png", [], True, {}) == "binary"
+        assert diff_chunks.classify("src/schema.py", [], False, {"linguist-generated": "set"}) == "generated"
+        assert diff_chunks.classify("lib/x.js", [], False, {"linguist-vendored": "set"}) == "vendored"
+
+    def test_generated_marker_only_at_top_of_file(self):
+        top = [["@@ -0,0 +1,2 @@", "+// Code generated by protoc. DO NOT EDIT.", "+package api"]]
+        middle = [["@@ -40,2 +40,3 @@", " x", "+// DO NOT EDIT the next line", " y"]]
+        assert diff_chunks.classify("api/api.go", top, False, {}) == "generated"
+        assert diff_chunks.classify("api/api.go", middle, False, {}) == "source"
+
+
+class TestChunking:
+    def test_split_hunk_recomputes_headers(self):
+        hunk = ["@@ -10,6 +10,6 @@ def f():", " a", "-b", "+B", "-c", "+C", " d", " e", " f"]
+        pieces = diff_chunks.split_hunk(hunk, 4)
+        assert [piece[0] for piece in pieces] == [
+            "@@ -10,2 +10,2 @@ def f():",
+            "@@ -12,2 +12,2 @@ def f():",
+            "@@ -14,2 +14,2 @@ def f():",
+        ]
+        assert all(len(piece) <= 4 for piece in pieces)
+        assert [line for piece in pieces for line in piece[1:]] == hunk[1:]
+
+    def test_chunks_are_bounded(self):
+        hunks = [["@@ -1,2 +1,2 @@", "-a", "+b"] for _ in range(5)]
+        chunks = diff_chunks.chunk_hunks(hunks, 7)
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert all(sum(len(h) for h in chunk) <= 7 for chunk in chunks)
+
+    def test_new_range(self):
+        assert diff_chunks.new_range(["@@ -3,2 +3,4 @@"]) == [3, 6]
+        assert diff_chunks.new_range(["@@ -3 +3 @@"]) == [3, 3]
+        assert diff_chunks.new_range(["@@ -3,2 +2,0 @@"]) is None
+
+
+class TestManifest:
+    def test_manifest(self, repo):
+        manifest = diff_chunks.build_manifest("main", "HEAD", out_dir=os.path.join(repo, "out"))
+        by_path = {f["path"]: f for f in manifest["files"]}
+
+        assert by_path["package-lock.json"]["category"] == "lockfile"
+        assert "not reviewed" in by_path["package-lock.json"]["summary"]
+        assert by_path["vendor/lib.js"]["category"] == "vendored"
+        assert by_path["api/client.py"]["category"] == "generated"
+        assert by_path["web/app.min.js"]["category"] == "generated"
+        assert by_path["src/old.py"] == {
+            "status": "D", "path": "src/old.py", "category": "source", "additions": 0, "deletions": 1,
+            "summary": "deleted, -1",
+        }
+
+        app = by_path["src/app.py"]
+        assert (app["additions"], app["deletions"]) == (2, 2)
+        assert [chunk["new_lines"] for chunk in app["chunks"]] == [[[2, 8], [87, 93]]]
+        assert [f["path"] for f in manifest["files"]][:2] == ["src/app.py", "tests/test_app.py"]
+        assert manifest["totals"]["reviewed_files"] == 2
+        assert manifest["totals"]["skipped_lines"] == 53 + 1 + 1 + 2 + 1
+
+        with open(os.path.join(repo, "out", "manifest.json")) as f:
+            assert json.load(f) == manifest
+
+    def test_chunk_files_are_valid_patches(self, repo):
+        manifest = diff_chunks.build_manifest("main", "HEAD", max_lines=9, out_dir=os.path.join(repo, "out"))
+        chunks = next(f for f in manifest["files"] if f["path"] == "src/app.py")["chunks"]
+        assert len(chunks) == 2
+        git(repo, "checkout", "-q", "main")
+        for chunk in chunks:
+            git(repo, "apply", "--check", chunk["file"])
+
+    def test_include_noise(self, repo):
+        manifest = diff_chunks.build_manifest("main", "HEAD", out_dir=os.path.join(repo, "out"), include_noise=True)
+        lockfile = next(f for f in manifest["files"] if f["path"] == "package-lock.json")
+        assert len(lockfile["chunks"]) == 1
+
+    def test_falls_back_to_remote_tracking_base(self, repo):
+        git(repo, "update-ref", "refs/remotes/origin/develop", "main")
+        assert diff_chunks.resolve_base("develop") == "origin/develop"
+
+    def test_prefers_remote_tracking_base_over_stale_local(self, repo):
+        git(repo, "update-ref", "refs/remotes/origin/main", "HEAD")
+        assert diff_chunks.resolve_base("main") == "origin/main"
+        assert diff_chunks.resolve_base("HEAD~1") == "HEAD~1"
+
+    def test_control_characters_stay_inside_lines(self, repo):
+        write(repo, "src/page.py", "a = 1\n")
+        git(repo, "add", ".")
+        git(repo, "commit", "-qm", "page")
+        git(repo, "checkout", "-q", "main")
+        git(repo, "merge", "-q", "feature/X-1-change")
+        git(repo, "checkout", "-q", "feature/X-1-change")
+        write(repo, "src/page.py", "a = 1\n\x0c\nb = '\x1c\\r\u2028'\nc = '\r'\n")
+        git(repo, "commit", "-qam", "control characters")
+        manifest = diff_chunks.build_manifest("main", "HEAD", out_dir=os.path.join(repo, "out"))
+        page = next(f for f in manifest["files"] if f["path"] == "src/page.py")
+        git(repo, "checkout", "-q", "main")
+        for chunk in page["chunks"]:
+            git(repo, "apply", "--check", chunk["file"])
+
+    def test_main_reports_unknown_base(self, repo, capsys):
+        assert diff_chunks.main(["nope"]) == 1
+        assert "unknown base branch" in capsys.readouterr().err
+
+    def test_main_default_out_dir(self, repo, capsys):
+        assert diff_chunks.main(["main"]) == 0
+        manifest = json.loads(capsys.readouterr().out)
+        chunk = manifest["files"][0]["chunks"][0]["file"]
+        assert chunk.startswith(os.path.join(".git", "sdui-pr-review", "chunks"))
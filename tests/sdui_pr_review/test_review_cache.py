@@ -0,0 +1,130 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../plugins/sdui-pr-review/scripts'))
+
+import review_cache  # noqa: E402
+
+
+def write(root, path, content):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w") as f:
+        f.write(content)
+
+
+def git(root, *args):
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=root, check=True,
+                   capture_output=True)
+
+
+def commit(root, files, message="change"):
+    for path, content in files.items():
+        write(root, path, content)
+    git(root, "add", "-A")
+    git(root, "commit", "-qm", message)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    git(root, "init", "-q", "-b", "main")
+    commit(root, {"a.py": "a = 1\n", "b.py": "b = 1\n", "c.py": "c = 1\n"}, "base")
+    git(root, "checkout", "-qb", "feature/X-1-change")
+    commit(root, {"a.py": "a = 2\n", "b.py": "b = 2\n", "new.py": "n = 1\n"})
+    monkeypatch.chdir(root)
+    return root
+
+
+BUG = {"severity": "High", "title": "Off by one", "line": 1}
+STYLE = {"severity": "Low", "title": "Naming", "line": 1}
+
+
+class TestParseRaw:
+    def test_modified_added_and_renamed(self):
+        base, head, zero = "1" * 40, "2" * 40, "0" * 40
+        output = (
+            f":100644 100644 {base} {head} M\0src/a.py\0"
+            f":000000 100644 {zero} {head} A\0src/new.py\0"
+            f":100644 100644 {base} {head} R087\0old/b.py\0src/b.py\0"
+        )
+        assert review_cache.parse_raw(output) == {
+            "src/a.py": {"base_blob": base, "head_blob": head},
+            "src/new.py": {"base_blob": zero, "head_blob": head},
+            "src/b.py": {"base_blob": base, "head_blob": head},
+        }
+
+
+class TestIncrementalReview:
+    def test_first_review_covers_every_changed_file(self, repo):
+        result = review_cache.plan("7", "main")
+        assert result == {"review": ["a.py", "b.py", "new.py"], "unchanged": [], "carried_findings": {}}
+
+    def test_rereview_only_changed_blobs(self, repo):
+        review_cache.record("7", "main", {"a.py": [BUG], "b.py": [STYLE], "new.py": []})
+        commit(repo, {"a.py": "a = 3\n"}, "fixup")
+
+        result = review_cache.plan("7", "main")
+        assert result["review"] == ["a.py"]
+        assert result["unchanged"] == ["b.py", "new.py"]
+        assert result["carried_findings"] == {"b.py": [STYLE], "new.py": []}
+
+    def test_record_carries_forward_and_resolves(self, repo):
+        review_cache.record("7", "main", {"a.py": [BUG, STYLE], "b.py": [STYLE], "new.py": []})
+        commit(repo, {"a.py": "a = 3\n"}, "fixup")
+
+        result = review_cache.record("7", "main", {"a.py": [{**STYLE, "line": 2}]})
+        assert result["findings"] == [
+            {"path": "a.py", **STYLE, "line": 2},
+            {"path": "b.py", "carried": True, **STYLE},
+        ]
+        assert result["resolved"] == [{"path": "a.py", **BUG}]
+        assert review_cache.plan("7", "main")["review"] == []
+
+    def test_file_leaving_the_diff_resolves_its_findings(self, repo):
+        review_cache.record("7", "main", {"a.py": [], "b.py": [STYLE], "new.py": []})
+        commit(repo, {"b.py": "b = 1\n"}, "revert b")
+
+        result = review_cache.record("7", "main", {})
+        assert result["resolved"] == [{"path": "b.py", **STYLE}]
+        assert [f["path"] for f in result["findings"]] == []
+
+    def test_rebase_onto_new_base_rereviews_touched_files(self, repo):
+        review_cache.record("7", "main", {"a.py": [BUG], "b.py": [], "new.py": []})
+        git(repo, "checkout", "-q", "main")
+        commit(repo, {"b.py": "b = 0\n"}, "main moves")
+        git(repo, "checkout", "-q", "feature/X-1-change")
+        git(repo, "rebase", "-q", "-X", "theirs", "main")
+
+        assert review_cache.plan("7", "main")["review"] == ["b.py"]
+
+    def test_unrecorded_files_stay_pending(self, repo):
+        review_cache.record("7", "main", {"a.py": [BUG]})
+        assert review_cache.plan("7", "main")["review"] == ["b.py", "new.py"]
+
+    def test_cache_is_per_pr(self, repo):
+        review_cache.record("7", "main", {"a.py": [], "b.py": [], "new.py": []})
+        assert review_cache.plan("8", "main")["review"] == ["a.py", "b.py", "new.py"]
+        path = os.path.join(repo, ".git", "sdui-pr-review", "reviews", "pr-7.json")
+        with open(path) as f:
+            assert json.load(f)["version"] == review_cache.CACHE_VERSION
+
+
+class TestMain:
+    def test_record_reads_stdin(self, repo, capsys, monkeypatch):
+        monkeypatch.setattr(sys, "stdin", io.StringIO(json.dumps({"a.py": [BUG]})))
+        assert review_cache.main(["record", "7", "main"]) == 0
+        assert json.loads(capsys.readouterr().out)["findings"] == [{"path": "a.py", **BUG}]
+
+    def test_rejects_malformed_findings(self, repo, capsys, monkeypatch):
+        monkeypatch.setattr(sys, "stdin", io.StringIO('{"a.py": "bad"}'))
+        assert review_cache.main(["record", "7", "main"]) == 1
+        assert "expected" in capsys.readouterr().err
+
+    def test_usage(self, capsys):
+        assert review_cache.main(["plan"]) == 2
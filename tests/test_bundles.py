@@ -0,0 +1,51 @@
+"""Tests for the precompiled hook bundles."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../scripts'))
+
+from build_bundles import BUNDLES, PLUGINS_DIR, build_bundle, bundle_path, stale_bundles  # noqa: E402
+
+ENTRIES = [(plugin, name, entry) for plugin, bundles in BUNDLES.items() for name, entry in bundles.items()]
+
+
+def test_bundles_are_up_to_date():
+    stale = stale_bundles()
+    assert not stale, f"Run `python3 scripts/build_bundles.py` to rebuild: {stale}"
+
+
+def test_build_is_reproducible():
+    assert build_bundle("command-safety", "validate_command") == build_bundle("command-safety", "validate_command")
+
+
+@pytest.mark.parametrize("plugin, name, entry", ENTRIES, ids=[name for _, name, _ in ENTRIES])
+def test_manifest_launches_bundle(plugin, name, entry):
+    manifest = json.loads((PLUGINS_DIR / plugin / "hooks" / "hooks.json").read_text())
+    commands = [
+        hook["command"]
+        for groups in manifest["hooks"].values()
+        for group in groups
+        for hook in group["hooks"]
+    ]
+    assert any(f"python3 -S -E ${{CLAUDE_PLUGIN_ROOT}}/dist/{name}.pyz" in command for command in commands)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [{"tool_input": {"command": "rm -rf /"}}, {"tool_input": {"command": "ls"}}],
+    ids=["deny", "allow"],
+)
+def test_bundle_matches_source(tmp_path, payload):
+    env = {"PATH": os.environ["PATH"], "CLAUDE_PROJECT_DIR": str(tmp_path)}
+
+    def run(*command):
+        return subprocess.run(command, input=json.dumps(payload), capture_output=True, text=True, env=env)
+
+    source = run(sys.executable, str(PLUGINS_DIR / "command-safety" / "hooks" / "validate_command.py"))
+    bundled = run(sys.executable, "-S", "-E", str(bundle_path("command-safety", "validate_command")))
+    assert (bundled.returncode, bundled.stdout, bundled.stderr) == (source.returncode, source.stdout, source.stderr)
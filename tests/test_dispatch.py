@@ -0,0 +1,202 @@
+"""Tests for the hook-dispatcher plugin."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from dispatch import find_plugin_root, matches, merge_responses
+
+PLUGINS = Path(__file__).parent.parent / "plugins"
+DISPATCH = PLUGINS / "hook-dispatcher" / "hooks" / "dispatch.py"
+ALL_PLUGINS = "command-safety,lint-runner,notifications"
+
+
+def run_dispatch(payload: dict, project: Path, plugin_root: Path = PLUGINS / "hook-dispatcher", **env):
+    stub_dir = project / "bin"
+    stub_dir.mkdir(exist_ok=True)
+    for name in ("notify-send", "paplay"):
+        (stub_dir / name).write_text("#!/bin/sh\nexit 0\n")
+        (stub_dir / name).chmod(0o755)
+    return subprocess.run(
+        [sys.executable, str(DISPATCH)],
+        input=json.dumps(payload), capture_output=True, text=True,
+        env={
+            "PATH": f"{stub_dir}:{os.environ['PATH']}",
+            "CLAUDE_PROJECT_DIR": str(project),
+            "CLAUDE_PLUGIN_ROOT": str(plugin_root),
+            **env,
+        },
+    )
+
+
+class TestMergeResponses:
+    def test_nothing_to_merge(self):
+        assert merge_responses([]) is None
+        assert merge_responses([None, None]) is None
+
+    def test_block_beats_approve(self):
+        merged = merge_responses([
+            {"decision": "approve"},
+            {"decision": "block", "reason": "Lint failed", "systemMessage": "Fix lint"},
+            {"decision": "block", "reason": "Tests failed"},
+        ])
+        assert merged == {
+            "decision": "block",
+            "reason": "Lint failed\n\nTests failed",
+            "systemMessage": "Fix lint",
+        }
+
+    def test_approve_when_nobody_blocks(self):
+        assert merge_responses([{"decision": "approve"}, None]) == {"decision": "approve"}
+
+    def test_deny_beats_ask_and_allow(self):
+        merged = merge_responses([
+            {"hookSpecificOutput": {"permissionDecision": "allow"}},
+            {"hookSpecificOutput": {"permissionDecision": "deny"}, "systemMessage": "BLOCKED"},
+            {"hookSpecificOutput": {"permissionDecision": "ask"}},
+        ])
+        assert merged == {"hookSpecificOutput": {"permissionDecision": "deny"}, "systemMessage": "BLOCKED"}
+
+    def test_additional_context_is_combined(self):
+        merged = merge_responses([
+            {"hookSpecificOutput": {"hookEventName": "UserPromptSubmit", "additionalContext": "a"}},
+            {"hookSpecificOutput": {"hookEventName": "UserPromptSubmit", "additionalContext": "b"}},
+        ])
+        assert merged["hookSpecificOutput"] == {"additionalContext": "a\n\nb", "hookEventName": "UserPromptSubmit"}
+
+
+class TestMatches:
+    def test_tool_and_notification_matchers(self):
+        assert matches("Bash", "PreToolUse", {"tool_name": "Bash"})
+        assert not matches("Bash", "PreToolUse", {"tool_name": "Edit"})
+        assert matches("permission_prompt", "Notification", {"notification_type": "permission_prompt"})
+        assert not matches("permission_prompt", "Notification", {"notification_type": "idle_prompt"})
+
+    def test_events_without_matchers(self):
+        assert matches("*", "Stop", {})
+        assert matches("", "Stop", {})
+
+
+class TestFindPluginRoot:
+    def write_handlers(self, root: Path):
+        (root / "hooks").mkdir(parents=True)
+        (root / "hooks" / "handlers.json").write_text('{"handlers": {}}')
+
+    def test_marketplace_layout(self, tmp_path):
+        self.write_handlers(tmp_path / "lint-runner")
+        (tmp_path / "hook-dispatcher").mkdir()
+        assert find_plugin_root("lint-runner", str(tmp_path / "hook-dispatcher")) == str(tmp_path / "lint-runner")
+
+    def test_cache_layout_picks_latest_version(self, tmp_path):
+        self.write_handlers(tmp_path / "lint-runner" / "0.1.0")
+        self.write_handlers(tmp_path / "lint-runner" / "0.2.0")
+        os.utime(tmp_path / "lint-runner" / "0.1.0", (0, 0))
+        dispatcher_root = tmp_path / "hook-dispatcher" / "0.1.0"
+        dispatcher_root.mkdir(parents=True)
+        assert find_plugin_root("lint-runner", str(dispatcher_root)) == str(tmp_path / "lint-runner" / "0.2.0")
+
+    def test_missing_plugin(self, tmp_path):
+        assert find_plugin_root("nope", str(tmp_path / "hook-dispatcher")) is None
+
+
+class TestManifest:
+    def test_dispatcher_registers_every_handler(self):
+        manifest = json.loads((PLUGINS / "hook-dispatcher" / "hooks" / "hooks.json").read_text())
+        registered = {
+            event: {group.get("matcher", "*") for group in groups}
+            for event, groups in manifest["hooks"].items()
+        }
+        for handlers_file in PLUGINS.glob("*/hooks/handlers.json"):
+            for event, handlers in json.loads(handlers_file.read_text())["handlers"].items():
+                for handler in handlers:
+                    matchers = registered.get(event, set())
+                    assert (handler.get("matcher") or "*") in matchers or "*" in matchers, (
+                        f"{handlers_file}: {event} {handler.get('matcher')} is not dispatched"
+                    )
+
+    @pytest.mark.parametrize("plugin", ALL_PLUGINS.split(","))
+    def test_handlers_point_at_bundles(self, plugin):
+        handlers = json.loads((PLUGINS / plugin / "hooks" / "handlers.json").read_text())["handlers"]
+        for registrations in handlers.values():
+            for registration in registrations:
+                assert (PLUGINS / plugin / registration["path"]).exists()
+
+
+class TestDispatch:
+    def test_disabled_without_plugins(self, tmp_path):
+        result = run_dispatch({"hook_event_name": "Stop"}, tmp_path)
+        assert (result.returncode, result.stdout, result.stderr) == (0, "", "")
+
+    def test_pre_tool_use_deny(self, tmp_path):
+        payload = {"hook_event_name": "PreToolUse", "tool_name": "Bash", "tool_input": {"command": "rm -rf /"}}
+        result = run_dispatch(payload, tmp_path, CLAUDE_HOOK_DISPATCH=ALL_PLUGINS)
+        assert result.returncode == 2
+        assert json.loads(result.stderr)["hookSpecificOutput"] == {"permissionDecision": "deny"}
+        assert (tmp_path / ".claude" / "logs" / "command-safety.log").exists()
+
+    def test_pre_tool_use_allow(self, tmp_path):
+        payload = {"hook_event_name": "PreToolUse", "tool_name": "Bash", "tool_input": {"command": "ls"}}
+        result = run_dispatch(payload, tmp_path, CLAUDE_HOOK_DISPATCH=ALL_PLUGINS)
+        assert (result.returncode, result.stdout) == (0, "")
+
+    def test_stop_merges_lint_block_with_notification(self, tmp_path):
+        result = run_dispatch(
+            {"hook_event_name": "Stop"}, tmp_path,
+            CLAUDE_HOOK_DISPATCH=ALL_PLUGINS, CLAUDE_LINT_COMMAND="echo 'a.py:1:1: E1 bad'; exit 1",
+        )
+        assert result.returncode == 0
+        response = json.loads(result.stdout)
+        assert response["decision"] == "block"
+        assert response["reason"] == "Lint failed"
+
+    def test_stop_approves_clean_lint(self, tmp_path):
+        result = run_dispatch(
+            {"hook_event_name": "Stop"}, tmp_path,
+            CLAUDE_HOOK_DISPATCH="lint-runner", CLAUDE_LINT_COMMAND="true",
+        )
+        assert json.loads(result.stdout) == {"decision": "approve"}
+
+    def test_handlers_share_the_dispatcher_lib(self, tmp_path):
+        plugins = tmp_path / "plugins"
+        hooks = plugins / "older" / "hooks"
+        hooks.mkdir(parents=True)
+        (hooks / "hook_metrics.py").write_text("ORIGIN = 'older'\n")
+        (hooks / "older_hook.py").write_text(
+            "import hook_metrics\n\n"
+            "def handle(data):\n"
+            "    return {'systemMessage': getattr(hook_metrics, 'ORIGIN', 'dispatcher')}\n"
+        )
+        (hooks / "handlers.json").write_text(
+            json.dumps({"handlers": {"Stop": [{"path": "hooks", "module": "older_hook"}]}})
+        )
+        (plugins / "hook-dispatcher").mkdir()
+
+        result = run_dispatch(
+            {"hook_event_name": "Stop"}, tmp_path, plugin_root=plugins / "hook-dispatcher",
+            CLAUDE_HOOK_DISPATCH="older",
+        )
+        assert json.loads(result.stdout) == {"systemMessage": "dispatcher"}
+
+    def test_failing_handler_is_isolated(self, tmp_path):
+        plugins = tmp_path / "plugins"
+        broken = plugins / "broken" / "hooks"
+        broken.mkdir(parents=True)
+        (broken / "broken_hook.py").write_text("def handle(data):\n    raise RuntimeError('boom')\n")
+        (broken / "handlers.json").write_text(
+            json.dumps({"handlers": {"Stop": [{"path": "hooks", "module": "broken_hook"}]}})
+        )
+        os.symlink(PLUGINS / "lint-runner", plugins / "lint-runner")
+        (plugins / "hook-dispatcher").mkdir()
+
+        result = run_dispatch(
+            {"hook_event_name": "Stop"}, tmp_path, plugin_root=plugins / "hook-dispatcher",
+            CLAUDE_HOOK_DISPATCH="broken,lint-runner,missing", CLAUDE_LINT_COMMAND="true",
+        )
+        assert result.returncode == 0
+        assert json.loads(result.stdout) == {"decision": "approve"}
+        assert "broken handler failed: RuntimeError('boom')" in result.stderr
+        assert "plugin 'missing' not found" in result.stderr
@@ -0,0 +1,263 @@
+"""Tests for the hook metrics spool and OTLP/HTTP flusher."""
+
+import json
+import os
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import hook_metrics
+
+
+class Collector:
+    """Stand-in OTLP/HTTP collector recording every request."""
+
+    def __init__(self, status: int = 200):
+        self.status = status
+        self.requests: list[tuple] = []
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.headers["Content-Type"] == "application/json":
+                    body = json.loads(body)
+                collector.requests.append((self.path, self.headers, body))
+                self.send_response(collector.status)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def collector():
+    server = Collector()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def telemetry(tmp_path, monkeypatch, collector):
+    monkeypatch.setenv("CLAUDE_CODE_ENABLE_TELEMETRY", "1")
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_ENDPOINT", collector.url)
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_HEADERS", "Authorization=Bearer%20abc,x-team=core")
+    monkeypatch.setenv("OTEL_RESOURCE_ATTRIBUTES", "user.name=jane,service.name=claude-code,team.name=core")
+    monkeypatch.setenv("CLAUDE_HOOK_METRICS_DIR", str(tmp_path / "spool"))
+    monkeypatch.setenv("CLAUDE_HOOK_METRICS_INTERVAL", "3600")
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_PROTOCOL", "http/json")
+    monkeypatch.delenv("OTEL_EXPORTER_OTLP_METRICS_ENDPOINT", raising=False)
+    monkeypatch.delenv("OTEL_EXPORTER_OTLP_METRICS_PROTOCOL", raising=False)
+    return tmp_path / "spool"
+
+
+def spool_entries(spool_dir):
+    return [json.loads(line) for line in (spool_dir / hook_metrics.SPOOL_FILE).read_text().splitlines()]
+
+
+def decode_proto(data: bytes) -> dict[int, list]:
+    """Protobuf wire-format fields by number: varints as ints, everything else as bytes."""
+    fields: dict[int, list] = {}
+    i = 0
+
+    def varint():
+        nonlocal i
+        value = shift = 0
+        while True:
+            byte = data[i]
+            i += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                return value
+
+    while i < len(data):
+        key = varint()
+        wire_type = key & 7
+        if wire_type == 0:
+            value = varint()
+        elif wire_type == 1:
+            value, i = data[i:i + 8], i + 8
+        else:
+            length = varint()
+            value, i = data[i:i + length], i + length
+        fields.setdefault(key >> 3, []).append(value)
+    return fields
+
+
+def attributes(point: dict) -> dict:
+    return {a["key"]: next(iter(a["value"].values())) for a in point["attributes"]}
+
+
+class TestRecord:
+    def test_disabled_without_telemetry(self, telemetry, monkeypatch):
+        monkeypatch.delenv("CLAUDE_CODE_ENABLE_TELEMETRY")
+        hook_metrics.counter("hook.test")
+        assert not telemetry.exists()
+
+    def test_disabled_without_endpoint(self, telemetry, monkeypatch):
+        monkeypatch.delenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+        hook_metrics.counter("hook.test")
+        assert not telemetry.exists()
+
+    def test_appends_to_spool(self, telemetry):
+        hook_metrics.counter("hook.test", decision="deny")
+        hook_metrics.histogram("hook.duration", 0.25, result="pass")
+
+        entries = spool_entries(telemetry)
+        assert [(e["k"], e["n"], e["v"], e["a"]) for e in entries] == [
+            ("c", "hook.test", 1, {"decision": "deny"}),
+            ("h", "hook.duration", 0.25, {"result": "pass"}),
+        ]
+
+    def test_unwritable_spool_is_ignored(self, telemetry):
+        telemetry.parent.mkdir(exist_ok=True)
+        telemetry.write_text("not a directory")
+        hook_metrics.counter("hook.test")
+
+
+class TestBuildRequest:
+    def test_aggregates_counters_and_histograms(self, telemetry):
+        entries = [
+            {"t": 1, "k": "c", "n": "hook.checks", "v": 1, "u": "1", "a": {"decision": "allow"}},
+            {"t": 2, "k": "c", "n": "hook.checks", "v": 1, "u": "1", "a": {"decision": "allow"}},
+            {"t": 3, "k": "c", "n": "hook.checks", "v": 1, "u": "1", "a": {"decision": "deny"}},
+            {"t": 4, "k": "h", "n": "hook.lint.duration", "v": 0.004, "u": "s", "a": {}},
+            {"t": 5, "k": "h", "n": "hook.lint.duration", "v": 3.0, "u": "s", "a": {}},
+        ]
+        request = hook_metrics.build_request(entries, bounds=[0.01, 1])
+        resource = request["resourceMetrics"][0]
+        assert attributes(resource["resource"]) == {
+            "service.name": "claude-code-hooks", "team.name": "core", "user.name": "jane",
+        }
+        metrics = {m["name"]: m for m in resource["scopeMetrics"][0]["metrics"]}
+
+        checks = metrics["hook.checks"]["sum"]
+        assert checks["aggregationTemporality"] == 1 and checks["isMonotonic"]
+        points = {attributes(p)["decision"]: p for p in checks["dataPoints"]}
+        assert points["allow"]["asInt"] == "2"
+        assert (points["allow"]["startTimeUnixNano"], points["allow"]["timeUnixNano"]) == ("1", "2")
+        assert points["deny"]["asInt"] == "1"
+
+        (point,) = metrics["hook.lint.duration"]["histogram"]["dataPoints"]
+        assert point["count"] == "2"
+        assert point["bucketCounts"] == ["1", "0", "1"]
+        assert point["explicitBounds"] == [0.01, 1]
+        assert (point["min"], point["max"], point["sum"]) == (0.004, 3.0, 3.004)
+        assert metrics["hook.lint.duration"]["unit"] == "s"
+
+
+class TestFlush:
+    def test_ships_spool_to_collector(self, telemetry, collector):
+        hook_metrics.counter("hook.test", decision="deny")
+        hook_metrics.counter("hook.test", decision="deny")
+
+        assert hook_metrics.flush() == 2
+
+        (path, headers, body), = collector.requests
+        assert path == "/v1/metrics"
+        assert headers["Authorization"] == "Bearer abc"
+        assert headers["x-team"] == "core"
+        assert headers["Content-Type"] == "application/json"
+        (metric,) = body["resourceMetrics"][0]["scopeMetrics"][0]["metrics"]
+        assert metric["sum"]["dataPoints"][0]["asInt"] == "2"
+        assert sorted(os.listdir(telemetry)) == [hook_metrics.LOCK_FILE, hook_metrics.STAMP_FILE]
+
+    def test_protobuf_is_the_default_protocol(self, telemetry, collector, monkeypatch):
+        monkeypatch.delenv("OTEL_EXPORTER_OTLP_PROTOCOL")
+        hook_metrics.counter("hook.test", exit_code=-9)
+        hook_metrics.counter("hook.test", exit_code=-9)
+        hook_metrics.histogram("hook.duration", 0.2)
+        assert hook_metrics.flush() == 3
+
+        (_, headers, body), = collector.requests
+        assert headers["Content-Type"] == "application/x-protobuf"
+        resource_metrics = decode_proto(decode_proto(body)[1][0])
+        scope_metrics = decode_proto(resource_metrics[2][0])
+        assert decode_proto(scope_metrics[1][0])[1] == [b"hook_metrics"]
+        counter, histogram = (decode_proto(m) for m in scope_metrics[2])
+
+        assert counter[1] == [b"hook.test"]
+        point = decode_proto(decode_proto(counter[7][0])[1][0])
+        assert struct.unpack("<q", point[6][0]) == (2,)
+        attribute = decode_proto(point[7][0])
+        assert attribute[1] == [b"exit_code"]
+        assert decode_proto(attribute[2][0])[3] == [2 ** 64 - 9]
+
+        assert histogram[1] == [b"hook.duration"]
+        point = decode_proto(decode_proto(histogram[9][0])[1][0])
+        assert struct.unpack("<Q", point[4][0]) == (1,)
+        buckets = struct.unpack(f"<{len(hook_metrics.DEFAULT_BOUNDS) + 1}Q", point[6][0])
+        assert buckets[hook_metrics.DEFAULT_BOUNDS.index(0.25)] == 1
+        assert list(struct.unpack(f"<{len(hook_metrics.DEFAULT_BOUNDS)}d", point[7][0])) == hook_metrics.DEFAULT_BOUNDS
+
+    def test_metrics_protocol_overrides_general_one(self, telemetry, collector, monkeypatch):
+        monkeypatch.setenv("OTEL_EXPORTER_OTLP_PROTOCOL", "grpc")
+        monkeypatch.setenv("OTEL_EXPORTER_OTLP_METRICS_PROTOCOL", "http/json")
+        hook_metrics.counter("hook.test")
+        assert hook_metrics.flush() == 1
+        assert collector.requests[0][1]["Content-Type"] == "application/json"
+
+    def test_grpc_is_not_recorded(self, telemetry, collector, monkeypatch):
+        monkeypatch.setenv("OTEL_EXPORTER_OTLP_PROTOCOL", "grpc")
+        hook_metrics.counter("hook.test")
+        assert not (telemetry / hook_metrics.SPOOL_FILE).exists()
+        assert hook_metrics.flush() == 0
+        assert not collector.requests
+
+    def test_failed_send_keeps_batch_for_retry(self, telemetry, collector):
+        collector.status = 503
+        hook_metrics.counter("hook.test")
+        assert hook_metrics.flush() == 0
+        assert [n for n in os.listdir(telemetry) if n.endswith(hook_metrics.BATCH_SUFFIX)]
+
+        collector.status = 200
+        hook_metrics.counter("hook.test")
+        assert hook_metrics.flush() == 2
+        assert collector.requests[-1][2]["resourceMetrics"][0]["scopeMetrics"][0]["metrics"][0]["sum"][
+            "dataPoints"][0]["asInt"] == "2"
+
+    def test_metrics_endpoint_override(self, telemetry, collector, monkeypatch):
+        monkeypatch.setenv("OTEL_EXPORTER_OTLP_METRICS_ENDPOINT", f"{collector.url}/custom")
+        hook_metrics.counter("hook.test")
+        hook_metrics.flush()
+        assert collector.requests[0][0] == "/custom"
+
+    def test_skips_torn_lines(self, telemetry, collector):
+        hook_metrics.counter("hook.test")
+        with open(telemetry / hook_metrics.SPOOL_FILE, "a") as f:
+            f.write('{"t": 1, "k"')
+        assert hook_metrics.flush() == 1
+
+    def test_record_starts_background_flush_when_due(self, telemetry, collector, monkeypatch):
+        hook_metrics.counter("hook.test")  # first measurement starts the interval
+        assert not collector.requests
+
+        monkeypatch.setenv("CLAUDE_HOOK_METRICS_INTERVAL", "0")
+        hook_metrics.counter("hook.test")
+
+        deadline = time.monotonic() + 10
+        while not collector.requests and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert collector.requests
+        assert collector.requests[0][2]["resourceMetrics"][0]["scopeMetrics"][0]["metrics"][0]["name"] == "hook.test"
+
+
+class TestParseHeaders:
+    def test_parses_url_encoded_pairs(self):
+        assert hook_metrics.parse_headers("Authorization=Bearer%20x, a=b=c,broken") == {
+            "Authorization": "Bearer x", "a": "b=c",
+        }
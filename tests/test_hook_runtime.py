@@ -0,0 +1,201 @@
+"""Tests for the shared hook runtime library."""
+
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+import hook_runtime
+import hook_trace
+
+PLUGINS = Path(__file__).parent.parent / "plugins"
+
+# Record which modules importing a hook script pulls in, without running it
+IMPORT_PROBE = """
+import json, runpy, sys
+before = set(sys.modules)
+sys.path.insert(0, sys.argv[2])
+sys.argv = sys.argv[1:2]
+runpy.run_path(sys.argv[0], run_name="probe")
+loaded = [m for m in set(sys.modules) - before if type(sys.modules[m]).__name__ != "_LazyModule"]
+print(json.dumps(sorted(loaded)))
+"""
+
+
+def run_hook(script: Path, payload: dict, project: Path, **env) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, str(script)],
+        input=json.dumps(payload), capture_output=True, text=True,
+        env={"PATH": "/usr/bin:/bin", "CLAUDE_PROJECT_DIR": str(project), **env},
+    )
+
+
+def load_chrome_trace(project: Path) -> list[dict]:
+    content = (project / ".claude" / "logs" / hook_trace.CHROME_TRACE_FILE).read_text()
+    assert content.startswith("[\n")
+    # The closing bracket is omitted while the file is being appended to
+    return json.loads(content.rstrip().rstrip(",") + "]")
+
+
+def imported_modules(script: Path) -> set[str]:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE, str(script), str(script.parent)],
+        capture_output=True, text=True, check=True,
+    )
+    return set(json.loads(result.stdout))
+
+
+class TestLazyImport:
+    def test_returns_loaded_module(self):
+        assert hook_runtime.lazy_import("json") is json
+
+    def test_defers_execution_until_first_use(self):
+        sys.modules.pop("colorsys", None)
+        module = hook_runtime.lazy_import("colorsys")
+        assert type(module).__name__ == "_LazyModule"
+        assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+
+    def test_missing_module_raises(self):
+        with pytest.raises(ImportError):
+            hook_runtime.lazy_import("no_such_module_here")
+
+
+class TestReadStdin:
+    def test_parses_json(self):
+        with patch("sys.stdin", io.StringIO('{"a": 1}')):
+            assert hook_runtime.read_stdin() == {"a": 1}
+
+    @pytest.mark.parametrize("data", ["", "  \n", "{not json"])
+    def test_empty_or_invalid_returns_none(self, data):
+        with patch("sys.stdin", io.StringIO(data)):
+            assert hook_runtime.read_stdin() is None
+
+
+class TestLogDir:
+    def test_created_under_project_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("CLAUDE_PROJECT_DIR", str(tmp_path))
+        log_dir = hook_runtime.get_log_dir()
+        assert log_dir == str(tmp_path / ".claude" / "logs")
+        assert Path(log_dir).is_dir()
+
+
+class TestEmit:
+    def test_writes_json_line_and_exits(self, capsys):
+        with pytest.raises(SystemExit) as exc:
+            hook_runtime.emit({"decision": "approve"})
+        assert exc.value.code == 0
+        assert json.loads(capsys.readouterr().out) == {"decision": "approve"}
+
+    def test_custom_stream_and_exit_code(self, capsys):
+        with pytest.raises(SystemExit) as exc:
+            hook_runtime.emit({"decision": "block"}, exit_code=2, stream=sys.stderr)
+        assert exc.value.code == 2
+        assert json.loads(capsys.readouterr().err) == {"decision": "block"}
+
+
+class TestImportBudget:
+    """Hooks must not pay for heavy modules before they know they need them."""
+
+    @pytest.mark.parametrize(
+        "script, deferred",
+        [
+            (PLUGINS / "command-safety" / "hooks" / "validate_command.py", {"datetime", "subprocess"}),
+            (
+                PLUGINS / "lint-runner" / "hooks" / "lint_runner.py",
+                {"concurrent.futures", "datetime", "hashlib", "lint_diagnostics", "subprocess"},
+            ),
+        ],
+        ids=["validate_command", "lint_runner"],
+    )
+    def test_heavy_modules_deferred(self, script, deferred):
+        assert not deferred & imported_modules(script)
+
+
+VALIDATE_COMMAND = PLUGINS / "command-safety" / "hooks" / "validate_command.py"
+LINT_RUNNER = PLUGINS / "lint-runner" / "hooks" / "lint_runner.py"
+
+
+class TestHookTrace:
+    def test_disabled_by_default(self, tmp_path):
+        run_hook(VALIDATE_COMMAND, {"tool_input": {"command": "ls"}}, tmp_path)
+        logs = tmp_path / ".claude" / "logs"
+        assert not (logs / hook_trace.CHROME_TRACE_FILE).exists()
+        assert not (logs / hook_trace.OTLP_TRACE_FILE).exists()
+
+    def test_span_is_noop_outside_traced_hook(self):
+        with hook_trace.span("decision") as current:
+            current.args["x"] = 1
+        assert hook_trace._tracer is None
+
+    def test_chrome_trace_spans(self, tmp_path):
+        payload = {"hook_event_name": "PreToolUse", "tool_input": {"command": "rm -rf /"}}
+        result = run_hook(VALIDATE_COMMAND, payload, tmp_path, CLAUDE_HOOK_TRACE="1")
+        assert result.returncode == 2
+
+        events = load_chrome_trace(tmp_path)
+        assert events[0] == {
+            "name": "process_name", "ph": "M", "pid": events[0]["pid"], "tid": 0,
+            "args": {"name": "command-safety/validate_command"},
+        }
+        spans = {e["name"]: e for e in events if e["ph"] == "X"}
+        root = spans["command-safety/validate_command"]
+        assert root["args"] == {"exit_code": 2}
+        assert spans["read_stdin"]["args"]["event"] == "PreToolUse"
+        assert spans["decision"]["args"] == {"denied": True, "category": "file_destruction"}
+        for name in ("read_stdin", "decision"):
+            assert root["ts"] <= spans[name]["ts"]
+            assert spans[name]["ts"] + spans[name]["dur"] <= root["ts"] + root["dur"]
+        if Path("/proc/self/stat").exists():
+            assert spans["startup"]["ts"] == root["ts"]
+
+    def test_runs_append_to_one_trace(self, tmp_path):
+        run_hook(VALIDATE_COMMAND, {"tool_input": {"command": "ls"}}, tmp_path, CLAUDE_HOOK_TRACE="1")
+        run_hook(LINT_RUNNER, {}, tmp_path, CLAUDE_HOOK_TRACE="1", CLAUDE_LINT_COMMAND="exit 3")
+
+        events = load_chrome_trace(tmp_path)
+        processes = [e["args"]["name"] for e in events if e["ph"] == "M"]
+        assert processes == ["command-safety/validate_command", "lint-runner/lint_runner"]
+        lint = [e for e in events if e["name"] == "subprocess exit"]
+        assert len(lint) == 1
+        assert lint[0]["args"]["returncode"] == 3
+        assert lint[0]["args"]["waited"] is True
+
+    def test_otlp_trace(self, tmp_path):
+        run_hook(LINT_RUNNER, {}, tmp_path, CLAUDE_HOOK_TRACE="otlp", CLAUDE_LINT_COMMAND="true")
+
+        lines = (tmp_path / ".claude" / "logs" / hook_trace.OTLP_TRACE_FILE).read_text().splitlines()
+        assert len(lines) == 1
+        resource_spans = json.loads(lines[0])["resourceSpans"][0]
+        assert {"key": "hook.name", "value": {"stringValue": "lint-runner/lint_runner"}} in (
+            resource_spans["resource"]["attributes"]
+        )
+        spans = resource_spans["scopeSpans"][0]["spans"]
+        root = next(s for s in spans if "parentSpanId" not in s)
+        assert root["name"] == "lint-runner/lint_runner"
+        assert {s["traceId"] for s in spans} == {root["traceId"]}
+        decision = next(s for s in spans if s["name"] == "decision")
+        assert decision["parentSpanId"] == root["spanId"]
+        assert {"key": "exit_code", "value": {"intValue": "0"}} in decision["attributes"]
+
+    @pytest.mark.parametrize("trace_format", ["chrome", "otlp"])
+    def test_non_json_span_args_written_as_strings(self, tmp_path, trace_format):
+        tracer = hook_trace.Tracer("test/hook", trace_format)
+        tracer.add("decision", 0, 1, {"path": Path("/a"), "kinds": {"x"}}, parent_id=tracer.root_id)
+        with patch.dict("os.environ", {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            tracer.write()
+        trace = tmp_path / ".claude" / "logs" / (
+            hook_trace.CHROME_TRACE_FILE if trace_format == "chrome" else hook_trace.OTLP_TRACE_FILE
+        )
+        assert "/a" in trace.read_text() and "{'x'}" in trace.read_text()
+
+    def test_chrome_header_written_once(self, tmp_path):
+        path = str(tmp_path / "trace.json")
+        hook_trace.ensure_chrome_header(path)
+        hook_trace.append(path, "{},\n")
+        hook_trace.ensure_chrome_header(path)
+        assert Path(path).read_text() == "[\n{},\n"
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["trace.json"]
@@ -2,11 +2,27 @@
 
 import json
 import os
+import subprocess
+import time
 import pytest
 from pathlib import Path
 from unittest.mock import patch
 
 
+def init_git_repo(path, files):
+    """Create a git repo at path with files committed."""
+    for name, content in files.items():
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        (path / name).write_text(content)
+    subprocess.run(["git", "init", "-q"], cwd=path, check=True)
+    subprocess.run(["git", "add", "-A"], cwd=path, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-qm", "init"],
+        cwd=path,
+        check=True,
+    )
+
+
 class TestGetProjectDir:
     """Tests for get_project_dir function."""
 
@@ -76,9 +92,26 @@ class TestRunLint:
             # Use a command that would take longer than timeout
             with patch("lint_runner.TIMEOUT_SECONDS", 0.1):
                 exit_code, output = run_lint("sleep 10")
-                assert exit_code == 1
+                assert exit_code == 124
                 assert "timed out" in output.lower()
 
+    def test_oversized_command_fails_instead_of_raising(self, tmp_path):
+        from lint_runner import run_lint
+
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            exit_code, output = run_lint("true " + "x" * 200 * 1024)
+            assert exit_code == 126
+            assert "could not be started" in output
+
+    def test_stops_at_deadline(self, tmp_path):
+        from lint_runner import run_lint
+
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            start = time.monotonic()
+            exit_code, output = run_lint("sleep 10", deadline=start + 0.1)
+            assert exit_code == 124
+            assert time.monotonic() - start < 5
+
 
 class TestWriteFailureLog:
     """Tests for write_failure_log function."""
@@ -161,3 +194,1052 @@ class TestBlock:
             assert response["reason"] == "Lint failed"
             assert "Task tool" in response["systemMessage"]
             assert ".claude/logs/lint.log" in response["systemMessage"]
+
+
+class TestPlanShards:
+    """Tests for plan_shards function."""
+
+    def test_balances_by_weight(self):
+        from lint_runner import plan_shards
+
+        weights = {"a.py": 10, "b.py": 6, "c.py": 4, "d.py": 1}
+        shards = plan_shards(list(weights), 2, weights)
+        loads = sorted(sum(weights[f] for f in shard) for shard in shards)
+        assert loads == [10, 11]
+
+    def test_caps_shard_count_at_file_count(self):
+        from lint_runner import plan_shards
+
+        shards = plan_shards(["a.py", "b.py"], 8, {"a.py": 1, "b.py": 1})
+        assert len(shards) == 2
+
+    def test_is_deterministic(self):
+        from lint_runner import plan_shards
+
+        files = [f"f{i}.py" for i in range(20)]
+        weights = {f: 1 for f in files}
+        assert plan_shards(files, 4, weights) == plan_shards(list(reversed(files)), 4, weights)
+
+    def test_empty_file_list(self):
+        from lint_runner import plan_shards
+
+        assert plan_shards([], 4, {}) == []
+
+    def test_splits_oversized_shards(self):
+        from lint_runner import MAX_SHARD_BYTES, plan_shards
+
+        files = [f"{'d' * 200}/f{i}.py" for i in range(1000)]
+        shards = plan_shards(files, 1, {f: 1 for f in files})
+        assert len(shards) > 1
+        assert sorted(f for shard in shards for f in shard) == sorted(files)
+        assert all(sum(len(f) + 1 for f in shard) <= MAX_SHARD_BYTES for shard in shards)
+
+
+class TestExpandFiles:
+    """Tests for expand_files function."""
+
+    def test_quotes_file_names(self):
+        from lint_runner import expand_files
+
+        result = expand_files("flake8 {files}", ["a.py", "with space.py"])
+        assert result == "flake8 a.py 'with space.py'"
+
+
+class TestMergeResults:
+    """Tests for merge_results function."""
+
+    def test_uses_highest_exit_code_and_shard_order(self):
+        from lint_runner import merge_results
+
+        exit_code, output = merge_results([(0, "first", 0.1), (2, "second\n", 0.1), (1, "", 0.1)])
+        assert exit_code == 2
+        assert output == "first\nsecond\n"
+
+
+class TestListLintFiles:
+    """Tests for list_lint_files function."""
+
+    def test_filters_by_pattern_without_git(self, tmp_path):
+        from lint_runner import list_lint_files
+
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "mod.py").write_text("x = 1\n")
+        (tmp_path / "README.md").write_text("readme\n")
+        env = {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_FILES": "*.py"}
+        with patch.dict(os.environ, env):
+            with patch("lint_runner.subprocess.run", side_effect=OSError):
+                assert list_lint_files() == [os.path.join("pkg", "mod.py")]
+
+    def test_default_globs_skip_non_source_files(self, tmp_path):
+        from lint_runner import list_lint_files
+
+        for name in ("app.py", "types.pyi", "web.ts", "run.sh", "README.md", "data.json", "dist/hook.pyz"):
+            (tmp_path / name).parent.mkdir(exist_ok=True)
+            (tmp_path / name).write_text("x\n")
+        init_git_repo(tmp_path, {})
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            os.environ.pop("CLAUDE_LINT_FILES", None)
+            assert list_lint_files(command="flake8 {files}") == ["app.py", "types.pyi"]
+            assert list_lint_files(command="npx eslint --max-warnings 0 {files}") == ["web.ts"]
+            assert list_lint_files(command="./lint.sh {files}") == ["app.py", "run.sh", "types.pyi", "web.ts"]
+            os.environ["CLAUDE_LINT_FILES"] = "*.md,*.json"
+            assert list_lint_files(command="flake8 {files}") == ["README.md", "data.json"]
+
+
+class TestRunLintSharded:
+    """Tests for run_lint_sharded function."""
+
+    def test_without_placeholder_runs_once(self, tmp_path):
+        from lint_runner import run_lint_sharded
+
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            exit_code, output = run_lint_sharded("echo whole-tree")
+            assert exit_code == 0
+            assert output.strip() == "whole-tree"
+
+    def test_runs_every_file_once_across_shards(self, tmp_path):
+        from lint_runner import run_lint_sharded
+
+        for i in range(5):
+            (tmp_path / f"f{i}.py").write_text("x" * (i + 1))
+        env = {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_SHARDS": "3", "CLAUDE_LINT_FILES": "*.py"}
+        with patch.dict(os.environ, env):
+            exit_code, output = run_lint_sharded("for f in {files}; do echo $f; done")
+            assert exit_code == 0
+            assert sorted(output.split()) == [f"f{i}.py" for i in range(5)]
+            assert (tmp_path / ".claude" / "logs" / "lint-costs.json").exists()
+
+    def test_failing_shard_fails_run(self, tmp_path):
+        from lint_runner import run_lint_sharded
+
+        for name in ("bad.py", "good.py"):
+            (tmp_path / name).write_text("x\n")
+        env = {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_SHARDS": "2", "CLAUDE_LINT_FILES": "*.py"}
+        with patch.dict(os.environ, env):
+            exit_code, output = run_lint_sharded('case "{files}" in *bad*) echo bad; exit 1;; esac')
+            assert exit_code == 1
+            assert "bad" in output
+
+
+class TestFindSubprojects:
+    """Tests for find_subprojects function."""
+
+    def test_finds_marker_directories(self):
+        from lint_runner import find_subprojects
+
+        files = [
+            "pyproject.toml",
+            "services/api/pyproject.toml",
+            "services/api/app.py",
+            "web/package.json",
+            "tools/.flake8",
+            "docs/index.md",
+        ]
+        assert find_subprojects(files) == ["services/api", "tools", "web"]
+
+
+class TestFindOwner:
+    """Tests for find_owner function."""
+
+    def test_deepest_subproject_wins(self):
+        from lint_runner import find_owner
+
+        subprojects = ["services", "services/api"]
+        assert find_owner("services/api/app.py", subprojects) == "services/api"
+        assert find_owner("services/worker.py", subprojects) == "services"
+
+    def test_root_when_unowned(self):
+        from lint_runner import find_owner
+
+        assert find_owner("README.md", ["services/api"]) == "."
+
+    def test_prefix_must_match_directory(self):
+        from lint_runner import find_owner
+
+        assert find_owner("services/api-gateway/x.py", ["services/api"]) == "."
+
+
+class TestRunLintScoped:
+    """Tests for run_lint_scoped function."""
+
+    def test_runs_only_in_affected_package(self, tmp_path):
+        from lint_runner import run_lint_scoped
+
+        init_git_repo(tmp_path, {
+            "svc-a/pyproject.toml": "",
+            "svc-a/a.py": "a = 1\n",
+            "svc-b/pyproject.toml": "",
+            "svc-b/b.py": "b = 1\n",
+        })
+        (tmp_path / "svc-b" / "b.py").write_text("b = 2\n")
+        env = {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_SCOPE": "packages"}
+        with patch.dict(os.environ, env):
+            exit_code, output = run_lint_scoped("basename $(pwd)")
+            assert exit_code == 0
+            assert "svc-b" in output
+            assert "svc-a" not in output
+
+    def test_own_logs_dont_count_as_changes(self, tmp_path):
+        from lint_runner import run_lint_scoped
+
+        init_git_repo(tmp_path, {
+            "svc-a/pyproject.toml": "",
+            "svc-a/a.py": "a = 1\n",
+        })
+        (tmp_path / "svc-a" / "a.py").write_text("a = 2\n")
+        logs = tmp_path / ".claude" / "logs"
+        logs.mkdir(parents=True)
+        (logs / "lint.lock").write_text("")
+        (logs / "lint.log").write_text("old failure\n")
+        env = {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_SCOPE": "packages"}
+        with patch.dict(os.environ, env):
+            exit_code, output = run_lint_scoped("basename $(pwd)")
+            assert exit_code == 0
+            assert output == "--- svc-a (exit code 0) ---\nsvc-a\n"
+
+    def test_no_changes_skips_lint(self, tmp_path):
+        from lint_runner import run_lint_scoped
+
+        init_git_repo(tmp_path, {"svc-a/pyproject.toml": ""})
+        env = {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_SCOPE": "packages"}
+        with patch.dict(os.environ, env):
+            exit_code, output = run_lint_scoped("exit 1")
+            assert exit_code == 0
+
+    def test_project_scope_lints_whole_tree(self, tmp_path):
+        from lint_runner import run_lint_scoped
+
+        env = {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_SCOPE": "project"}
+        with patch.dict(os.environ, env):
+            exit_code, output = run_lint_scoped("exit 3")
+            assert exit_code == 3
+
+
+class TestAtomicWrite:
+    """Tests for atomic_write function."""
+
+    def test_writes_content_without_leftover_temp_files(self, tmp_path):
+        from lint_runner import atomic_write
+
+        target = tmp_path / "lint.log"
+        atomic_write(target, "content")
+        assert target.read_text() == "content"
+        assert [p.name for p in tmp_path.iterdir()] == ["lint.log"]
+
+
+class TestGetTreeState:
+    """Tests for get_tree_state function."""
+
+    def test_none_outside_git(self, tmp_path):
+        from lint_runner import get_tree_state
+
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            assert get_tree_state() is None
+
+    def test_changes_when_file_changes(self, tmp_path):
+        from lint_runner import get_tree_state
+
+        init_git_repo(tmp_path, {"a.py": "a = 1\n"})
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            clean = get_tree_state()
+            (tmp_path / "a.py").write_text("a = 22\n")
+            dirty = get_tree_state()
+            assert clean != dirty
+            assert get_tree_state() == dirty
+
+    def test_ignores_lint_logs(self, tmp_path):
+        from lint_runner import get_tree_state, write_failure_log
+
+        init_git_repo(tmp_path, {"a.py": "a = 1\n"})
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            before = get_tree_state()
+            write_failure_log("lint", 1, "error")
+            assert get_tree_state() == before
+
+
+class TestRunLintSingleFlight:
+    """Tests for run_lint_single_flight function."""
+
+    def test_reuses_result_for_same_tree_state(self, tmp_path):
+        from lint_runner import run_lint_single_flight
+
+        project = tmp_path / "project"
+        project.mkdir()
+        init_git_repo(project, {"a.py": "a = 1\n"})
+        counter = tmp_path / "runs"
+        command = f"echo run >> {counter}; echo 'a.py:1:1: E1 bad'; exit 1"
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(project)}):
+            assert run_lint_single_flight(command)[0] == 1
+            assert run_lint_single_flight(command)[0] == 1
+            assert counter.read_text().count("run") == 1
+            assert (project / ".claude" / "logs" / "lint.log").exists()
+
+            (project / "a.py").write_text("a = 2\n")
+            run_lint_single_flight(command)
+            assert counter.read_text().count("run") == 2
+
+    @pytest.mark.parametrize("lint", ["kill -9 $$", "sleep 10", "no-such-linter"])
+    def test_transient_failure_not_reused_by_later_hooks(self, tmp_path, lint):
+        from lint_runner import run_lint_single_flight
+
+        project = tmp_path / "project"
+        project.mkdir()
+        init_git_repo(project, {"a.py": "a = 1\n"})
+        counter = tmp_path / "runs"
+        command = f"echo run >> {counter}; {lint}"
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(project)}):
+            with patch("lint_runner.TIMEOUT_SECONDS", 0.5):
+                assert run_lint_single_flight(command)[0] != 0
+                assert run_lint_single_flight(command)[0] != 0
+        assert counter.read_text().count("run") == 2
+
+    def test_unparseable_failure_reused(self, tmp_path):
+        from lint_runner import run_lint_single_flight
+
+        project = tmp_path / "project"
+        project.mkdir()
+        init_git_repo(project, {"a.ts": "let a = 1\n"})
+        counter = tmp_path / "runs"
+        command = f"echo run >> {counter}; echo 'a.ts(1,5): error TS2322: bad'; exit 2"
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(project)}):
+            assert run_lint_single_flight(command)[0] == 2
+            assert run_lint_single_flight(command)[0] == 2
+        assert counter.read_text().count("run") == 1
+
+    def test_transient_failure_shared_with_waiting_hooks(self, tmp_path):
+        from concurrent.futures import ThreadPoolExecutor
+        from lint_runner import run_lint_single_flight
+
+        project = tmp_path / "project"
+        project.mkdir()
+        init_git_repo(project, {"a.py": "a = 1\n"})
+        counter = tmp_path / "runs"
+        command = f"echo run >> {counter}; sleep 0.2; exit 1"
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(project)}):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(lambda _: run_lint_single_flight(command), range(4)))
+        assert all(exit_code == 1 for exit_code, _ in results)
+        assert counter.read_text().count("run") == 1
+
+    def test_result_key_covers_resource_settings(self, tmp_path):
+        from lint_runner import get_result_key
+
+        init_git_repo(tmp_path, {"a.py": "a = 1\n"})
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            keys = {get_result_key()}
+            for name in ("CLAUDE_LINT_MAX_MEMORY", "CLAUDE_LINT_NICE", "CLAUDE_LINT_IONICE",
+                         "CLAUDE_LINT_MAX_PARALLEL", "CLAUDE_LINT_CACHE"):
+                with patch.dict(os.environ, {name: "1"}):
+                    keys.add(get_result_key())
+        assert len(keys) == 6
+
+    def test_result_key_follows_new_code_merge_base(self, tmp_path):
+        from lint_runner import get_result_key
+
+        init_git_repo(tmp_path, {"a.py": "a = 1\n"})
+        git = ["git", "-c", "user.name=t", "-c", "user.email=t@t"]
+        subprocess.run(git + ["branch", "base"], cwd=tmp_path, check=True)
+        subprocess.run(git + ["commit", "-q", "--allow-empty", "-m", "second"], cwd=tmp_path, check=True)
+        env = {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_NEW_CODE": "base"}
+        with patch.dict(os.environ, env):
+            before = get_result_key()
+            subprocess.run(["git", "branch", "-f", "base", "HEAD"], cwd=tmp_path, check=True)
+            assert get_result_key() != before
+
+    def test_concurrent_hooks_run_lint_once(self, tmp_path):
+        from concurrent.futures import ThreadPoolExecutor
+        from lint_runner import run_lint_single_flight
+
+        project = tmp_path / "project"
+        project.mkdir()
+        init_git_repo(project, {"a.py": "a = 1\n"})
+        counter = tmp_path / "runs"
+        command = f"echo run >> {counter}; sleep 0.2"
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(project)}):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(lambda _: run_lint_single_flight(command), range(4)))
+        assert all(exit_code == 0 for exit_code, _ in results)
+        assert counter.read_text().count("run") == 1
+
+    def test_clears_log_on_success(self, tmp_path):
+        from lint_runner import get_log_path, run_lint_single_flight
+
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            get_log_path().write_text("stale failure")
+            assert run_lint_single_flight("true")[0] == 0
+            assert not get_log_path().exists()
+
+
+class TestAutoFix:
+    """Tests for the CLAUDE_LINT_FIX_COMMAND pre-pass in run_lint_scoped."""
+
+    LINT = "echo {files} >> ../linted; ! grep -H BAD {files}"
+
+    def make_project(self, tmp_path):
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "a.py").write_text("BAD\n")
+        (project / "b.py").write_text("good\n")
+        return project
+
+    def test_fixed_errors_do_not_fail(self, tmp_path):
+        from lint_runner import run_lint_scoped
+
+        project = self.make_project(tmp_path)
+        env = {
+            "CLAUDE_PROJECT_DIR": str(project),
+            "CLAUDE_LINT_FILES": "*.py",
+            "CLAUDE_LINT_SHARDS": "2",
+            "CLAUDE_LINT_FIX_COMMAND": "sed -i.bak s/BAD/good/ {files} && rm -f *.bak",
+        }
+        with patch.dict(os.environ, env):
+            exit_code, output = run_lint_scoped(self.LINT)
+        assert exit_code == 0
+        assert "modified 1 file(s), re-linted 1 unit(s)" in output
+        # b.py's shard was clean and untouched, so it was linted only once
+        assert sorted((tmp_path / "linted").read_text().split()) == ["a.py", "a.py", "b.py"]
+
+    def test_remaining_errors_still_fail(self, tmp_path):
+        from lint_runner import run_lint_scoped
+
+        project = self.make_project(tmp_path)
+        env = {
+            "CLAUDE_PROJECT_DIR": str(project),
+            "CLAUDE_LINT_FILES": "*.py",
+            "CLAUDE_LINT_FIX_COMMAND": "true",
+        }
+        with patch.dict(os.environ, env):
+            exit_code, output = run_lint_scoped(self.LINT)
+        assert exit_code == 1
+        assert "a.py:BAD" in output
+        assert "modified 0 file(s)" in output
+
+    def test_noop_fix_does_not_relint(self, tmp_path):
+        from lint_runner import run_lint_scoped
+
+        project = self.make_project(tmp_path)
+        env = {"CLAUDE_PROJECT_DIR": str(project), "CLAUDE_LINT_FIX_COMMAND": "true"}
+        with patch.dict(os.environ, env):
+            exit_code, output = run_lint_scoped("echo run >> ../linted; ! grep -H BAD *.py")
+        assert exit_code == 1
+        assert "modified 0 file(s), re-linted 0 unit(s)" in output
+        assert (tmp_path / "linted").read_text() == "run\n"
+
+    def test_fix_skipped_when_budget_runs_low(self, tmp_path):
+        from lint_runner import run_lint_scoped
+
+        project = self.make_project(tmp_path)
+        marker = tmp_path / "fixed"
+        env = {"CLAUDE_PROJECT_DIR": str(project), "CLAUDE_LINT_FILES": "*.py",
+               "CLAUDE_LINT_FIX_COMMAND": f"touch {marker}"}
+        with patch.dict(os.environ, env), patch("lint_runner.TIMEOUT_SECONDS", 5), \
+                patch("lint_runner.RUN_BUDGET_SECONDS", 5.5):
+            exit_code, output = run_lint_scoped("sleep 1; " + self.LINT)
+        assert exit_code == 1
+        assert "a.py:BAD" in output
+        assert not marker.exists()
+
+    def test_relints_only_touched_files(self, tmp_path):
+        from lint_runner import run_lint_scoped
+
+        project = self.make_project(tmp_path)
+        (project / "c.py").write_text("BAD\n")
+        env = {
+            "CLAUDE_PROJECT_DIR": str(project),
+            "CLAUDE_LINT_FILES": "*.py",
+            "CLAUDE_LINT_SHARDS": "1",
+            "CLAUDE_LINT_FIX_COMMAND": "sed -i.bak s/BAD/good/ a.py && rm -f *.bak # {files}",
+        }
+        with patch.dict(os.environ, env):
+            exit_code, output = run_lint_scoped("echo {files} >> ../linted; ! grep -Hn BAD {files}")
+        assert exit_code == 1
+        assert "c.py:1:BAD" in output and "a.py:1:BAD" not in output
+        assert (tmp_path / "linted").read_text().splitlines() == ["a.py b.py c.py", "a.py"]
+
+    def test_only_lint_files_count_as_fixed(self, tmp_path):
+        from lint_runner import run_lint_scoped
+
+        project = self.make_project(tmp_path)
+        env = {
+            "CLAUDE_PROJECT_DIR": str(project),
+            "CLAUDE_LINT_FILES": "*.py",
+            "CLAUDE_LINT_SHARDS": "2",
+            "CLAUDE_LINT_FIX_COMMAND": "echo note > notes.txt; sed -i.bak s/BAD/good/ {files} && rm -f *.bak",
+        }
+        with patch.dict(os.environ, env):
+            exit_code, output = run_lint_scoped(self.LINT)
+        assert exit_code == 0
+        assert "modified 1 file(s)" in output
+
+    def test_result_stored_under_fixed_tree(self, tmp_path):
+        from lint_runner import run_lint_single_flight
+
+        project = self.make_project(tmp_path)
+        init_git_repo(project, {})
+        env = {
+            "CLAUDE_PROJECT_DIR": str(project),
+            "CLAUDE_LINT_FILES": "*.py",
+            "CLAUDE_LINT_FIX_COMMAND": "sed -i.bak s/BAD/good/ {files} && rm -f *.bak",
+        }
+        with patch.dict(os.environ, env):
+            assert run_lint_single_flight(self.LINT)[0] == 0
+            linted = (tmp_path / "linted").read_text()
+            assert run_lint_single_flight(self.LINT)[0] == 0
+        assert (tmp_path / "linted").read_text() == linted
+
+    def test_fix_not_run_when_lint_passes(self, tmp_path):
+        from lint_runner import run_lint_scoped
+
+        marker = tmp_path / "fixed"
+        env = {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_FIX_COMMAND": f"touch {marker}"}
+        with patch.dict(os.environ, env):
+            assert run_lint_scoped("true") == (0, "")
+        assert not marker.exists()
+
+
+class TestLintDiagnostics:
+    """Tests for lint_diagnostics parsing and delta functions."""
+
+    def test_parses_common_formats(self):
+        from lint_diagnostics import parse_diagnostics
+
+        output = "\n".join([
+            "a.py:3:1: E302 expected 2 blank lines",
+            'src/x.py:10: error: Module has no attribute "y"  [attr-defined]',
+            "web/app.js",
+            "  1:10  error  'foo' is defined but never used  no-unused-vars",
+            "",
+            "Found 3 errors.",
+        ])
+        diagnostics = parse_diagnostics(output)
+        assert [(d["file"], d["line"], d["rule"]) for d in diagnostics] == [
+            ("a.py", 3, "E302"),
+            ("src/x.py", 10, "attr-defined"),
+            ("web/app.js", 1, "no-unused-vars"),
+        ]
+
+    def test_parse_output_keeps_other_lines(self):
+        from lint_diagnostics import parse_output
+
+        output = "web/app.js\n  1:10  error  'foo' is unused  no-unused-vars\n\nTraceback (most recent call last)\n"
+        diagnostics, other = parse_output(output)
+        assert [d["file"] for d in diagnostics] == ["web/app.js"]
+        assert other == ["Traceback (most recent call last)"]
+
+    def test_fingerprint_ignores_line_numbers(self):
+        from lint_diagnostics import parse_diagnostics
+
+        before = parse_diagnostics("a.py:3:1: F811 redefinition of unused 'x' from line 1")
+        after = parse_diagnostics("a.py:9:1: F811 redefinition of unused 'x' from line 5")
+        assert before[0]["fingerprint"] == after[0]["fingerprint"]
+
+    def test_repeated_diagnostics_stay_distinct(self):
+        from lint_diagnostics import parse_diagnostics
+
+        diagnostics = parse_diagnostics("a.py:1:1: W291 trailing whitespace\na.py:2:1: W291 trailing whitespace")
+        assert len({d["fingerprint"] for d in diagnostics}) == 2
+
+    def test_diff_diagnostics(self):
+        from lint_diagnostics import diff_diagnostics, parse_diagnostics
+
+        previous = parse_diagnostics("a.py:1:1: E1 one\nb.py:1:1: E2 two")
+        current = parse_diagnostics("a.py:5:1: E1 one\nc.py:1:1: E3 three")
+        new, still_present, fixed = diff_diagnostics(previous, current)
+        assert [d["file"] for d in new] == ["c.py"]
+        assert [d["file"] for d in still_present] == ["a.py"]
+        assert [d["file"] for d in fixed] == ["b.py"]
+
+
+class TestDeltaReporting:
+    """Tests for delta reporting in write_failure_log."""
+
+    def test_second_failure_reports_delta(self, tmp_path):
+        from lint_runner import write_failure_log, get_log_path
+
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            write_failure_log("lint", 1, "a.py:1:1: E1 one\nb.py:1:1: E2 two")
+            assert "a.py:1:1: E1 one" in get_log_path().read_text()
+
+            write_failure_log("lint", 1, "a.py:2:1: E1 one\nc.py:1:1: E3 three")
+            content = get_log_path().read_text()
+            assert "1 new, 1 still present, 1 fixed" in content
+            assert "c.py:1:1: E3 three" in content
+            assert "b.py: 1" in content
+
+    def test_delta_keeps_other_output(self, tmp_path):
+        from lint_runner import write_failure_log, get_log_path
+
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            write_failure_log("lint", 1, "a.py:1:1: E1 one")
+            write_failure_log("lint", 1, "\n".join([
+                "Auto-fix (ruff check --fix) modified 2 file(s), re-linted 1 unit(s)",
+                "a.py:1:1: E1 one",
+                "--- svc (exit code 2) ---",
+                "svc/pyproject.toml: invalid config",
+            ]))
+            content = get_log_path().read_text()
+        assert "0 new, 1 still present, 0 fixed" in content
+        other = content.split("Other output:\n")[1].splitlines()
+        assert other[:3] == [
+            "  Auto-fix (ruff check --fix) modified 2 file(s), re-linted 1 unit(s)",
+            "  --- svc (exit code 2) ---",
+            "  svc/pyproject.toml: invalid config",
+        ]
+
+    def test_delta_tells_packages_apart(self, tmp_path):
+        from lint_runner import write_failure_log, get_log_path
+
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            write_failure_log("lint", 1, "--- api (exit code 1) ---\nsrc/app.py:1:1: E1 one")
+            write_failure_log("lint", 1, "--- web (exit code 1) ---\nsrc/app.py:1:1: E1 one")
+            content = get_log_path().read_text()
+        assert "1 new, 0 still present, 1 fixed" in content
+        assert "  web/src/app.py:1:1: E1 one" in content
+        assert "  api/src/app.py: 1" in content
+
+    def test_clean_run_resets_history(self, tmp_path):
+        from lint_runner import clear_failure_log, write_failure_log, get_log_path
+
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            write_failure_log("lint", 1, "a.py:1:1: E1 one")
+            clear_failure_log()
+            write_failure_log("lint", 1, "a.py:1:1: E1 one")
+            assert "DIAGNOSTICS:" not in get_log_path().read_text()
+
+
+class TestResourceLimits:
+    """Tests for resource-capped lint execution."""
+
+    def test_parse_size(self):
+        from lint_runner import parse_size
+
+        assert parse_size("512M") == 512 * 1024
+        assert parse_size("2g") == 2 * 1024 * 1024
+        assert parse_size("1.5GB") == 1536 * 1024
+        assert parse_size("1048576") == 1024
+        assert parse_size("") is None
+        assert parse_size("lots") is None
+
+    def test_command_unchanged_without_limits(self):
+        from lint_runner import limit_command
+
+        with patch.dict(os.environ, {"CLAUDE_LINT_NICE": "0"}):
+            assert limit_command("ruff check .") == "ruff check ."
+        # Not reniced by default
+        with patch("shutil.which", return_value="/usr/bin/nice"):
+            assert limit_command("ruff check .") == "ruff check ."
+
+    def test_wraps_command_with_limits(self):
+        from lint_runner import limit_command
+
+        env = {"CLAUDE_LINT_NICE": "5", "CLAUDE_LINT_IONICE": "idle", "CLAUDE_LINT_MAX_MEMORY": "1G"}
+        with patch.dict(os.environ, env), patch("shutil.which", return_value="/usr/bin/tool"):
+            command = limit_command("ruff check . && mypy")
+        assert command == "ulimit -d 1048576 && exec nice -n 5 ionice -c 3 sh -c 'ruff check . && mypy'"
+
+    def test_skips_missing_tools(self):
+        from lint_runner import limit_command
+
+        with patch.dict(os.environ, {"CLAUDE_LINT_IONICE": "best-effort:4"}), \
+                patch("shutil.which", return_value=None):
+            assert limit_command("ruff check .") == "ruff check ."
+
+    def test_limits_apply_to_lint_processes(self, tmp_path):
+        from lint_runner import run_lint
+
+        env = {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_NICE": "7", "CLAUDE_LINT_MAX_MEMORY": "4G"}
+        with patch.dict(os.environ, env):
+            exit_code, output = run_lint("echo $(nice) $(ulimit -d) && exit 3")
+        base = os.nice(0)
+        assert exit_code == 3
+        assert output.split() == [str(min(base + 7, 19)), str(4 * 1024 * 1024)]
+
+    def test_max_parallel_caps_workers(self, tmp_path):
+        from lint_runner import run_units
+
+        marker = tmp_path / "running"
+        command = f"mkdir {marker} || exit 9; sleep 0.05; rmdir {marker}"
+        units = [(tmp_path, None)] * 3
+        with patch.dict(os.environ, {"CLAUDE_LINT_MAX_PARALLEL": "1"}):
+            results = run_units(command, units)
+        assert [exit_code for exit_code, _, _ in results] == [0, 0, 0]
+
+    def test_failure_log_reports_resource_usage(self, tmp_path):
+        from lint_runner import get_log_path, run_lint_single_flight
+
+        command = "python3 -c 'sum(range(10 ** 6)); raise SystemExit(1)'"
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path)}):
+            assert run_lint_single_flight(command)[0] == 1
+            header = get_log_path().read_text().split("=" * 80)[1]
+        resources = [line for line in header.splitlines() if line.startswith("Resources: ")]
+        assert len(resources) == 1
+        assert "peak RSS" in resources[0] and "MiB" in resources[0]
+        assert "s user" in resources[0] and "s system" in resources[0]
+
+
+class TestDeferredMode:
+    """Tests for CLAUDE_LINT_MODE=deferred."""
+
+    def wait_for_result(self, project, timeout=10):
+        result_path = project / ".claude" / "logs" / "lint-result.json"
+        deadline = time.monotonic() + timeout
+        while not result_path.exists():
+            assert time.monotonic() < deadline, "background lint did not finish"
+            time.sleep(0.02)
+
+    def setup_project(self, tmp_path, exit_code):
+        project = tmp_path / "project"
+        project.mkdir()
+        init_git_repo(project, {"a.py": "a = 1\n"})
+        counter = tmp_path / "runs"
+        env = {
+            "CLAUDE_PROJECT_DIR": str(project),
+            "CLAUDE_LINT_MODE": "deferred",
+            "CLAUDE_LINT_COMMAND": f"echo run >> {counter}; echo 'a.py:1:1: E1 bad'; exit {exit_code}",
+        }
+        return project, counter, env
+
+    def test_stop_approves_without_waiting_then_blocks(self, tmp_path):
+        from lint_runner import handle
+
+        project, counter, env = self.setup_project(tmp_path, 1)
+        with patch.dict(os.environ, env):
+            assert handle({"hook_event_name": "Stop"}) == {"decision": "approve"}
+            self.wait_for_result(project)
+            assert counter.read_text().count("run") == 1
+            assert handle({"hook_event_name": "Stop"})["decision"] == "block"
+            assert handle({"hook_event_name": "Stop"})["decision"] == "block"
+            # Already reported at Stop: the next prompt is not told again
+            assert handle({"hook_event_name": "UserPromptSubmit"}) is None
+        assert counter.read_text().count("run") == 1
+
+    def test_failure_added_to_next_prompt_once(self, tmp_path):
+        from lint_runner import handle
+
+        project, _, env = self.setup_project(tmp_path, 1)
+        with patch.dict(os.environ, env):
+            assert handle({"hook_event_name": "UserPromptSubmit"}) is None
+            self.wait_for_result(project)
+            output = handle({"hook_event_name": "UserPromptSubmit"})["hookSpecificOutput"]
+            assert output["hookEventName"] == "UserPromptSubmit"
+            assert "lint.log" in output["additionalContext"]
+            assert handle({"hook_event_name": "UserPromptSubmit"}) is None
+
+    def test_changed_tree_makes_result_stale(self, tmp_path):
+        from lint_runner import handle
+
+        project, counter, env = self.setup_project(tmp_path, 1)
+        with patch.dict(os.environ, env):
+            handle({"hook_event_name": "Stop"})
+            self.wait_for_result(project)
+            result_path = project / ".claude" / "logs" / "lint-result.json"
+            first = result_path.read_text()
+
+            (project / "a.py").write_text("a = 2\n")
+            assert handle({"hook_event_name": "Stop"}) == {"decision": "approve"}
+            deadline = time.monotonic() + 10
+            while result_path.read_text() == first:
+                assert time.monotonic() < deadline, "background lint did not rerun"
+                time.sleep(0.02)
+            assert handle({"hook_event_name": "Stop"})["decision"] == "block"
+        assert counter.read_text().count("run") == 2
+
+    def test_background_run_skips_fix(self, tmp_path):
+        from lint_runner import handle
+
+        project, _, env = self.setup_project(tmp_path, 1)
+        marker = tmp_path / "fixed"
+        env["CLAUDE_LINT_FIX_COMMAND"] = f"touch {marker}"
+        with patch.dict(os.environ, env):
+            handle({"hook_event_name": "Stop"})
+            self.wait_for_result(project)
+            assert handle({"hook_event_name": "Stop"})["decision"] == "block"
+        assert not marker.exists()
+
+    def test_transient_failure_reported_once_per_run(self, tmp_path):
+        from lint_runner import handle
+
+        project, counter, env = self.setup_project(tmp_path, 1)
+        env["CLAUDE_LINT_COMMAND"] = f"echo run >> {counter}; exit 127"
+        result_path = project / ".claude" / "logs" / "lint-result.json"
+        with patch.dict(os.environ, env):
+            assert handle({"hook_event_name": "Stop"}) == {"decision": "approve"}
+            self.wait_for_result(project)
+            first = result_path.read_text()
+            assert handle({"hook_event_name": "Stop"})["decision"] == "block"
+            # The failure said nothing about the code: lint again instead of blocking on it
+            assert handle({"hook_event_name": "Stop"}) == {"decision": "approve"}
+            deadline = time.monotonic() + 10
+            while result_path.read_text() == first:
+                assert time.monotonic() < deadline, "background lint did not rerun"
+                time.sleep(0.02)
+        assert counter.read_text().count("run") == 2
+
+    def test_passing_result_approves(self, tmp_path):
+        from lint_runner import handle
+
+        project, _, env = self.setup_project(tmp_path, 0)
+        with patch.dict(os.environ, env):
+            handle({"hook_event_name": "Stop"})
+            self.wait_for_result(project)
+            assert handle({"hook_event_name": "Stop"}) == {"decision": "approve"}
+            assert handle({"hook_event_name": "UserPromptSubmit"}) is None
+
+    def test_outside_git_lints_in_foreground(self, tmp_path):
+        from lint_runner import handle
+
+        env = {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_MODE": "deferred", "CLAUDE_LINT_COMMAND": "exit 1"}
+        with patch.dict(os.environ, env):
+            assert handle({"hook_event_name": "Stop"})["decision"] == "block"
+
+    def test_prompt_ignored_in_blocking_mode(self, tmp_path):
+        from lint_runner import handle
+
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_COMMAND": "exit 1"}):
+            assert handle({"hook_event_name": "UserPromptSubmit"}) is None
+
+
+class TestLintCache:
+    """Tests for the worktree-shared clean-file cache (CLAUDE_LINT_CACHE=1)."""
+
+    @pytest.fixture
+    def repo(self, tmp_path):
+        main = tmp_path / "main"
+        main.mkdir()
+        init_git_repo(main, {"a.py": "a = 1\n", "b.py": "b = 1\n", "pyproject.toml": "[tool.ruff]\n"})
+        subprocess.run(["git", "worktree", "add", "-q", str(tmp_path / "other")], cwd=main, check=True)
+        return main, tmp_path / "other"
+
+    def lint_command(self, log, flagged="-"):
+        # Records the files each run lints and reports a diagnostic for `flagged`
+        script = log.parent / "lint.sh"
+        script.write_text(
+            f'echo "$@" >> {log}\n'
+            f'for f in "$@"; do [ "$f" = {flagged} ] && echo "$f:1:1: E1 bad" && exit 1; done\n'
+            "exit 0\n"
+        )
+        return f"sh {script} {{files}}"
+
+    def run(self, project, command):
+        from lint_runner import run_lint_sharded
+
+        env = {"CLAUDE_PROJECT_DIR": str(project), "CLAUDE_LINT_CACHE": "1", "CLAUDE_LINT_SHARDS": "1",
+               "CLAUDE_LINT_FILES": "*.py"}
+        with patch.dict(os.environ, env):
+            return run_lint_sharded(command)
+
+    def test_clean_files_shared_across_worktrees(self, repo, tmp_path):
+        main, other = repo
+        log = tmp_path / "linted"
+        command = self.lint_command(log)
+        assert self.run(main, command)[0] == 0
+        assert self.run(other, command)[0] == 0
+        assert log.read_text().split() == ["a.py", "b.py"]
+
+        (other / "b.py").write_text("b = 2\n")
+        self.run(other, command)
+        assert log.read_text().split() == ["a.py", "b.py", "b.py"]
+        assert (main / ".git" / "lint-cache").is_dir()
+
+    def test_files_with_diagnostics_not_cached(self, repo, tmp_path):
+        main, _ = repo
+        log = tmp_path / "linted"
+        command = self.lint_command(log, flagged="b.py")
+        assert self.run(main, command)[0] == 1
+        assert self.run(main, command)[0] == 1
+        assert log.read_text().splitlines() == ["a.py b.py", "b.py"]
+
+    def test_config_change_invalidates(self, repo, tmp_path):
+        main, _ = repo
+        log = tmp_path / "linted"
+        command = self.lint_command(log)
+        self.run(main, command)
+        (main / "pyproject.toml").write_text("[tool.ruff]\nline-length = 100\n")
+        self.run(main, command)
+        assert log.read_text().splitlines() == ["a.py b.py", "a.py b.py"]
+
+    def test_disabled_by_default(self, repo, tmp_path):
+        from lint_runner import run_lint_sharded
+
+        main, _ = repo
+        log = tmp_path / "linted"
+        env = {"CLAUDE_PROJECT_DIR": str(main), "CLAUDE_LINT_SHARDS": "1", "CLAUDE_LINT_FILES": "*.py"}
+        with patch.dict(os.environ, env):
+            run_lint_sharded(self.lint_command(log))
+            run_lint_sharded(self.lint_command(log))
+        assert len(log.read_text().splitlines()) == 2
+        assert not (main / ".git" / "lint-cache").exists()
+
+    @pytest.mark.parametrize("command, words", [
+        ("ruff check {files}", ["ruff"]),
+        ("npx eslint {files}", ["npx", "eslint"]),
+        ("uv run ruff check {files}", ["uv", "run", "ruff"]),
+        ("env RUFF_CACHE_DIR=/tmp ruff check {files}", ["env", "RUFF_CACHE_DIR=/tmp", "ruff"]),
+        ("python3 -m flake8 {files}", ["python3", "-m", "flake8"]),
+    ])
+    def test_finds_linter_behind_launchers(self, command, words):
+        from lint_cache import linter_words
+
+        assert linter_words(command) == words
+
+    def test_linter_version_change_invalidates(self, repo, tmp_path):
+        from lint_cache import linter_version
+
+        main, _ = repo
+        log = tmp_path / "linted"
+        version = tmp_path / "version"
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        # The linter is only reachable through the launcher, as with npx
+        (bin_dir / "npx").write_text(f'#!/bin/sh\nexec {tmp_path}/node_modules/.bin/"$@"\n')
+        linter = tmp_path / "node_modules" / ".bin" / "fake-lint"
+        linter.parent.mkdir(parents=True)
+        linter.write_text(f'#!/bin/sh\n[ "$1" = --version ] && exec cat {version}\necho "$@" >> {log}\n')
+        for script in (bin_dir / "npx", linter):
+            script.chmod(0o755)
+        version.write_text("fake-lint 1.0\n")
+        with patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"}):
+            self.run(main, "npx fake-lint {files}")
+            linter_version.cache_clear()
+            self.run(main, "npx fake-lint {files}")
+            version.write_text("fake-lint 2.0\n")
+            linter_version.cache_clear()
+            self.run(main, "npx fake-lint {files}")
+        assert log.read_text().splitlines() == ["a.py b.py", "a.py b.py"]
+
+    def test_cross_file_checkers_not_cached(self, repo, tmp_path):
+        main, _ = repo
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        (bin_dir / "mypy").write_text(f'#!/bin/sh\necho "$@" >> {tmp_path / "linted"}\n')
+        (bin_dir / "mypy").chmod(0o755)
+        with patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"}):
+            self.run(main, "mypy {files}")
+            self.run(main, "mypy {files}")
+        assert len((tmp_path / "linted").read_text().splitlines()) == 2
+        assert not (main / ".git" / "lint-cache").exists()
+
+    def test_eviction_keeps_recently_used(self, tmp_path):
+        from lint_cache import evict
+
+        for i in range(10):
+            marker = tmp_path / f"m{i}"
+            marker.touch()
+            os.utime(marker, ns=(i * 10 ** 9, i * 10 ** 9))
+        evict(tmp_path, 5)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["m6", "m7", "m8", "m9"]
+
+
+class TestNewCode:
+    """Tests for changed-lines-only diagnostics (CLAUDE_LINT_NEW_CODE)."""
+
+    LEGACY = "".join(f"x{i} = {i}\n" for i in range(1, 21))
+
+    def lint_command(self, tmp_path):
+        # Flags every line containing "bad", like a linter with pre-existing violations would
+        script = tmp_path.parent / f"{tmp_path.name}-lint.sh"
+        script.write_text('grep -Hn bad *.py | awk -F: \'{print $1":"$2":1: E1 bad"}\' | grep . && exit 1\nexit 0\n')
+        return f"sh {script}"
+
+    def run(self, project, command, new_code="1", **env):
+        from lint_runner import run_lint_scoped
+
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(project), "CLAUDE_LINT_NEW_CODE": new_code, **env}):
+            return run_lint_scoped(command)
+
+    def test_parse_changed_lines(self):
+        from lint_diagnostics import parse_changed_lines
+
+        diff = "\n".join([
+            "diff --git a/a.py b/a.py",
+            "--- a/a.py",
+            "+++ b/a.py",
+            "@@ -3 +3 @@ def f():",
+            "-old",
+            "+new",
+            "@@ -10,0 +11,3 @@",
+            "+++ added line that looks like a header",
+            "+b",
+            "+c",
+            "@@ -20,2 +23,0 @@",
+            "-gone",
+            "-gone",
+            "diff --git a/old.py b/old.py",
+            "--- a/old.py",
+            "+++ /dev/null",
+            "@@ -1 +0,0 @@",
+            "-x",
+        ])
+        assert parse_changed_lines(diff) == {"a.py": ([3, 11, 23], [3, 13, 24])}
+
+    def test_in_changed_lines(self):
+        from lint_diagnostics import in_changed_lines, merge_ranges
+
+        index = {"a.py": merge_ranges([(10, 12), (1, 2), (3, 4), (20, 20)])}
+        assert index["a.py"] == ([1, 10, 20], [4, 12, 20])
+        assert [line for line in range(0, 25) if in_changed_lines(index, "a.py", line)] == [
+            1, 2, 3, 4, 10, 11, 12, 20,
+        ]
+        assert not in_changed_lines(index, "b.py", 1)
+
+    def test_only_changed_lines_block(self, tmp_path):
+        init_git_repo(tmp_path, {"a.py": "bad = 1\n" + self.LEGACY})
+        command = self.lint_command(tmp_path)
+        assert self.run(tmp_path, command, new_code="0")[0] == 1
+
+        exit_code, output = self.run(tmp_path, command)
+        assert exit_code == 0
+        assert "1 diagnostic(s) on unchanged lines ignored" in output
+
+        (tmp_path / "a.py").write_text("bad = 1\n" + self.LEGACY.replace("x5 = 5", "bad5 = 5"))
+        exit_code, output = self.run(tmp_path, command)
+        assert exit_code == 1
+        assert output.splitlines()[0] == "a.py:6:1: E1 bad"
+        assert "a.py:1:1" not in output
+
+    def test_untracked_files_are_new_code(self, tmp_path):
+        init_git_repo(tmp_path, {"a.py": "bad = 1\n"})
+        (tmp_path / "b.py").write_text("ok = 1\nbad = 2\n")
+        exit_code, output = self.run(tmp_path, self.lint_command(tmp_path))
+        assert exit_code == 1
+        assert "b.py:2:1: E1 bad" in output
+
+    def test_merge_base(self, tmp_path):
+        init_git_repo(tmp_path, {"a.py": "bad = 1\n" + self.LEGACY})
+        git = ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+        subprocess.run([*git, "branch", "-q", "base"], cwd=tmp_path, check=True)
+        (tmp_path / "a.py").write_text("bad = 1\n" + self.LEGACY + "bad_branch = 1\n")
+        subprocess.run([*git, "commit", "-qam", "branch work"], cwd=tmp_path, check=True)
+        command = self.lint_command(tmp_path)
+
+        assert self.run(tmp_path, command, new_code="HEAD")[0] == 0
+        exit_code, output = self.run(tmp_path, command, new_code="base")
+        assert exit_code == 1
+        assert "a.py:22:1: E1 bad" in output
+        assert "a.py:1:1" not in output
+
+    def test_unparseable_failures_still_block(self, tmp_path):
+        init_git_repo(tmp_path, {"a.py": "a = 1\n"})
+        exit_code, output = self.run(tmp_path, "echo 'linter crashed'; exit 2")
+        assert (exit_code, output.strip()) == (2, "linter crashed")
+
+    def test_subproject_paths(self, tmp_path):
+        init_git_repo(tmp_path, {"svc/pyproject.toml": "", "svc/a.py": "bad = 1\n" + self.LEGACY})
+        (tmp_path / "svc" / "a.py").write_text("bad = 1\n" + self.LEGACY + "bad_new = 1\n")
+        exit_code, output = self.run(tmp_path, self.lint_command(tmp_path), CLAUDE_LINT_SCOPE="packages")
+        assert exit_code == 1
+        assert "a.py:22:1: E1 bad" in output
+        assert "a.py:1:1" not in output
+
+    def test_outside_git_lints_everything(self, tmp_path):
+        (tmp_path / "a.py").write_text("bad = 1\n")
+        assert self.run(tmp_path, self.lint_command(tmp_path))[0] == 1
+
+    def test_part_of_result_key(self, tmp_path):
+        from lint_runner import get_result_key
+
+        init_git_repo(tmp_path, {"a.py": "a = 1\n"})
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_NEW_CODE": "1"}):
+            with_filter = get_result_key()
+        with patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(tmp_path), "CLAUDE_LINT_NEW_CODE": "0"}):
+            assert get_result_key() != with_filter
@@ -0,0 +1,96 @@
+"""Tests for the hook replay benchmark."""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../benchmarks'))
+
+from replay_hooks import PLUGINS_DIR, compare, load_hooks, main, matches, percentile, synthetic_session  # noqa: E402
+
+
+@pytest.fixture
+def hooks():
+    return load_hooks(sorted(PLUGINS_DIR.iterdir()))
+
+
+class TestLoadHooks:
+    def test_substitutes_plugin_root(self, hooks):
+        assert hooks
+        for hook in hooks:
+            assert "${CLAUDE_PLUGIN_ROOT}" not in hook["command"]
+            assert hook["plugin_root"] in hook["command"]
+
+    def test_names_each_registration(self, hooks):
+        names = {hook["name"] for hook in hooks}
+        assert "command-safety:PreToolUse:validate_command.pyz" in names
+        assert "notifications:Stop:notify_finished.pyz" in names
+
+
+class TestMatches:
+    def hook(self, event, matcher):
+        return {"event": event, "matcher": matcher}
+
+    def test_tool_matcher(self):
+        payload = {"hook_event_name": "PreToolUse", "tool_name": "Bash"}
+        assert matches(self.hook("PreToolUse", "Bash"), payload)
+        assert matches(self.hook("PreToolUse", "Edit|Bash"), payload)
+        assert not matches(self.hook("PreToolUse", "Edit"), payload)
+        assert not matches(self.hook("PostToolUse", "Bash"), payload)
+
+    def test_notification_matcher(self):
+        payload = {"hook_event_name": "Notification", "notification_type": "idle_prompt"}
+        assert not matches(self.hook("Notification", "permission_prompt"), payload)
+        assert matches(self.hook("Notification", ""), payload)
+
+    def test_wildcard_and_unmatched_events(self):
+        assert matches(self.hook("Stop", "*"), {"hook_event_name": "Stop"})
+        assert matches(self.hook("Stop", "anything"), {"hook_event_name": "Stop"})
+
+
+class TestReport:
+    def test_percentile_nearest_rank(self):
+        samples = [float(i) for i in range(1, 101)]
+        assert percentile(samples, 50) == 50.0
+        assert percentile(samples, 99) == 99.0
+        assert percentile([5.0], 90) == 5.0
+
+    def test_compare_flags_regressions(self):
+        baseline = {"hooks": {"a": {"p50_ms": 10.0}, "b": {"p50_ms": 10.0}}}
+        report = {"hooks": {"a": {"p50_ms": 11.0}, "b": {"p50_ms": 15.0}}}
+        lines, regressed = compare(report, baseline, threshold=20)
+        assert regressed
+        assert any(line.startswith("b") and "REGRESSION" in line for line in lines)
+        assert not any(line.startswith("a") and "REGRESSION" in line for line in lines)
+
+
+class TestReplay:
+    def test_replays_synthetic_session(self, tmp_path, capsys):
+        report_path = tmp_path / "report.json"
+        assert main(["--bash-events", "3", "--json", str(report_path)]) == 0
+
+        report = json.loads(report_path.read_text())
+        assert report["events"]["PreToolUse"]["count"] == 3
+        assert report["events"]["Stop"]["count"] == 1
+        assert report["total"]["count"] == len(synthetic_session(3))
+        # Every hook ran to completion against the stubs
+        assert report["exit_codes"]["command-safety:PreToolUse:validate_command.pyz"] == {"0": 3}
+        assert report["exit_codes"]["lint-runner:Stop:lint_runner.pyz"] == {"0": 1}
+        assert "cumulative hook overhead" in capsys.readouterr().out
+
+    def test_recorded_session_and_plugin_filter(self, tmp_path):
+        session = tmp_path / "session.jsonl"
+        events = [
+            {"hook_event_name": "PreToolUse", "tool_name": "Bash", "tool_input": {"command": "rm -rf /"}},
+            {"hook_event_name": "PreToolUse", "tool_name": "Read", "tool_input": {"file_path": "x"}},
+        ]
+        session.write_text("".join(json.dumps(event) + "\n" for event in events))
+        report_path = tmp_path / "report.json"
+
+        assert main(["--session", str(session), "--plugin", "command-safety", "--json", str(report_path)]) == 0
+
+        report = json.loads(report_path.read_text())
+        assert list(report["hooks"]) == ["command-safety:PreToolUse:validate_command.pyz"]
+        assert report["exit_codes"]["command-safety:PreToolUse:validate_command.pyz"] == {"2": 1}
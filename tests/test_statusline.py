@@ -0,0 +1,206 @@
+"""Tests for the statusline plugin script."""
+
+import json
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).parent.parent / "plugins" / "statusline" / "scripts" / "statusline.sh"
+
+pytestmark = pytest.mark.skipif(shutil.which("jq") is None, reason="statusline requires jq")
+
+
+def render(home, payload, path=None):
+    """Run the statusline script with payload on stdin and return its output."""
+    env = {**os.environ, "HOME": str(home), "XDG_CACHE_HOME": str(home / ".cache")}
+    if path:
+        env["PATH"] = f"{path}:{env['PATH']}"
+    result = subprocess.run(
+        ["bash", str(SCRIPT)], input=json.dumps(payload), capture_output=True, text=True, env=env
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def write_config(home, config):
+    config_file = home / ".claude" / "statusline-config.json"
+    config_file.parent.mkdir(parents=True, exist_ok=True)
+    config_file.write_text(json.dumps(config))
+    return config_file
+
+
+def call_counter(tmp_path, *tools):
+    """PATH directory with wrappers logging each invocation of tools."""
+    shim_dir = tmp_path / "shims"
+    shim_dir.mkdir(exist_ok=True)
+    for tool in tools:
+        shim = shim_dir / tool
+        shim.write_text(f'#!/bin/bash\necho {tool} >> "{shim_dir}/calls"\nexec {shutil.which(tool)} "$@"\n')
+        shim.chmod(0o755)
+    return shim_dir
+
+
+def init_repo(path, branch="topic"):
+    """Create a git repo with one empty commit on branch."""
+    path.mkdir()
+    subprocess.run(["git", "init", "-q", "-b", branch], cwd=path, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com",
+         "commit", "-q", "--allow-empty", "-m", "init"],
+        cwd=path,
+        check=True,
+    )
+
+
+def wait_for_git_cache(home):
+    """Wait for the background refresh to write the repo's git cache."""
+    cache_dir = home / ".cache" / "claude-statusline" / "git"
+    for _ in range(100):
+        caches = [
+            p for p in cache_dir.glob("*")
+            if p.suffix != ".lock" and not p.suffix[1:].isdigit()  # lock and temp files
+        ] if cache_dir.exists() else []
+        if caches:
+            return caches[0]
+        time.sleep(0.05)
+    raise AssertionError("git cache was not written")
+
+
+class TestRender:
+    """Tests for statusline rendering."""
+
+    def test_renders_directory_and_context(self, tmp_path):
+        payload = {
+            "workspace": {"current_dir": "/work/project"},
+            "context_window": {"used_percentage": 42.7, "context_window_size": 200000},
+        }
+        output = render(tmp_path, payload)
+        assert "/work/project" in output
+        assert "84k/200k" in output
+        assert "42%" in output
+
+    def test_defaults_for_missing_fields(self, tmp_path):
+        output = render(tmp_path, {})
+        assert "~" in output
+        assert "0k/200k" in output
+
+    def test_single_jq_parse_with_cached_config(self, tmp_path):
+        write_config(tmp_path, {"show_branch": False})
+        shim_dir = call_counter(tmp_path, "jq")
+        render(tmp_path, {"workspace": {"current_dir": "/work"}}, path=shim_dir)
+        (shim_dir / "calls").unlink()
+
+        render(tmp_path, {"workspace": {"current_dir": "/work"}}, path=shim_dir)
+        assert (shim_dir / "calls").read_text().split() == ["jq"]
+
+
+class TestConfig:
+    """Tests for statusline config handling."""
+
+    def test_false_values_are_respected(self, tmp_path):
+        repo = tmp_path / "repo"
+        init_repo(repo)
+        payload = {"workspace": {"current_dir": str(repo)}}
+        assert "topic" in render(tmp_path, payload)
+
+        write_config(tmp_path, {"show_branch": False})
+        assert "topic" not in render(tmp_path, payload)
+
+    def test_config_change_invalidates_cache(self, tmp_path):
+        config_file = write_config(tmp_path, {"max_session_len": 30})
+        render(tmp_path, {})
+        cache = tmp_path / ".cache" / "claude-statusline" / "config.sh"
+        assert "MAX_SESSION_LEN='30'" in cache.read_text()
+
+        config_file.write_text(json.dumps({"max_session_len": 5}))
+        mtime = cache.stat().st_mtime
+        os.utime(config_file, (mtime + 10, mtime + 10))
+        render(tmp_path, {})
+        assert "MAX_SESSION_LEN='5'" in cache.read_text()
+
+
+class TestGitCache:
+    """Tests for the cached git/PR info."""
+
+    def test_render_reads_cache_without_running_git(self, tmp_path):
+        repo = tmp_path / "repo"
+        init_repo(repo)
+        (repo / "new.txt").write_text("untracked\n")
+        payload = {"workspace": {"current_dir": str(repo)}}
+        render(tmp_path, payload)
+        wait_for_git_cache(tmp_path)
+
+        shim_dir = call_counter(tmp_path, "git")
+        output = render(tmp_path, payload, path=shim_dir)
+        assert "topic" in output
+        assert "±1" in output
+        assert not (shim_dir / "calls").exists()
+
+    def test_branch_from_subdirectory(self, tmp_path):
+        repo = tmp_path / "repo"
+        init_repo(repo, branch="feature/x")
+        (repo / "src" / "pkg").mkdir(parents=True)
+        output = render(tmp_path, {"workspace": {"current_dir": str(repo / "src" / "pkg")}})
+        assert "feature/x" in output
+
+    def test_pr_number_from_background_gh(self, tmp_path):
+        repo = tmp_path / "repo"
+        init_repo(repo)
+        shim_dir = tmp_path / "gh-shim"
+        shim_dir.mkdir()
+        (shim_dir / "gh").write_text("#!/bin/bash\necho 42\n")
+        (shim_dir / "gh").chmod(0o755)
+        payload = {"workspace": {"current_dir": str(repo)}}
+        render(tmp_path, payload, path=shim_dir)
+        wait_for_git_cache(tmp_path)
+        assert "PR #42" in render(tmp_path, payload, path=shim_dir)
+
+
+class TestSessionName:
+    """Tests for the memoized session name lookup."""
+
+    def write_index(self, home, project_dir, entries):
+        index = home / ".claude" / "projects" / project_dir.replace("/", "-") / "sessions-index.json"
+        index.parent.mkdir(parents=True, exist_ok=True)
+        index.write_text(json.dumps({"entries": entries}))
+        return index
+
+    def test_lookup_is_memoized_until_index_changes(self, tmp_path):
+        entries = [{"sessionId": f"s{i}", "summary": f"Session {i}"} for i in range(1000)]
+        index = self.write_index(tmp_path, "/work/project", entries)
+        payload = {"session_id": "s500", "workspace": {"current_dir": "/work", "project_dir": "/work/project"}}
+        assert "Session 500" in render(tmp_path, payload)
+
+        shim_dir = call_counter(tmp_path, "jq")
+        assert "Session 500" in render(tmp_path, payload, path=shim_dir)
+        assert (shim_dir / "calls").read_text().split() == ["jq"]  # stdin parse only
+
+        entries[500]["summary"] = "Renamed"
+        index.write_text(json.dumps({"entries": entries}))
+        mtime = index.stat().st_mtime + 10
+        os.utime(index, (mtime, mtime))
+        assert "Renamed" in render(tmp_path, payload)
+
+    def test_old_memos_are_pruned_on_lookup(self, tmp_path):
+        self.write_index(tmp_path, "/work/project", [{"sessionId": "s1", "summary": "One"}])
+        sessions = tmp_path / ".cache" / "claude-statusline" / "sessions"
+        sessions.mkdir(parents=True)
+        stale, recent = sessions / "gone", sessions / "recent"
+        stale.write_text("Gone\n")
+        recent.write_text("Recent\n")
+        old = time.time() - 30 * 86400
+        os.utime(stale, (old, old))
+        payload = {"session_id": "s1", "workspace": {"current_dir": "/work", "project_dir": "/work/project"}}
+        assert "One" in render(tmp_path, payload)
+        assert sorted(p.name for p in sessions.iterdir()) == ["recent", "s1"]
+
+    def test_unknown_session_shows_no_name(self, tmp_path):
+        self.write_index(tmp_path, "/work/project", [{"sessionId": "other", "summary": "Other"}])
+        payload = {"session_id": "missing", "workspace": {"current_dir": "/work", "project_dir": "/work/project"}}
+        render(tmp_path, payload)
+        assert "Other" not in render(tmp_path, payload)
+        assert "◉" not in render(tmp_path, payload)
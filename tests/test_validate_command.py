@@ -1,8 +1,12 @@
 """Tests for command-safety validate_command.py pattern matching."""
 
+import json
+from unittest.mock import patch
+
 import pytest
 
-from validate_command import check_dangerous
+import validate_command
+from validate_command import SHADOW_PATTERNS, check_dangerous, handle, match_pattern, read_shadow_report
 
 
 class TestFileDestruction:
@@ -137,3 +141,109 @@ class TestGeneralSafeCommands:
     def test_allows_common_commands(self, command):
         is_dangerous, _ = check_dangerous(command)
         assert is_dangerous is False, f"Expected '{command}' to be allowed"
+
+
+class TestShadowRules:
+    """Tests for shadow evaluation of candidate rules."""
+
+    @pytest.fixture
+    def project(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("CLAUDE_PROJECT_DIR", str(tmp_path))
+        monkeypatch.setenv("CLAUDE_SAFETY_SHADOW_SAMPLE", "1")
+        return tmp_path
+
+    def read_shadow_log(self, project):
+        path = project / ".claude" / "logs" / "command-safety-shadow.log"
+        return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+    def read_stats(self, project):
+        return json.loads((project / ".claude" / "logs" / "command-safety-shadow-stats.json").read_text())
+
+    @pytest.mark.parametrize(
+        "command, rule",
+        [
+            ("find / -name '*.log' -delete", "find_delete_root"),
+            ("chmod -R 777 /", "chmod_recursive_root"),
+            ("chown -R nobody ~", "chown_recursive_root"),
+            ("git push --force origin main", "git_force_push_main"),
+            ("git push origin master -f", "git_force_push_main"),
+        ],
+    )
+    def test_candidate_rules_match(self, command, rule):
+        matches = [p["name"] for patterns in SHADOW_PATTERNS.values() for p in patterns if match_pattern(p, command)]
+        assert matches == [rule]
+
+    @pytest.mark.parametrize(
+        "command",
+        ["find . -name '*.pyc' -delete", "chmod -R 755 ./build", "git push --force origin feature/x", "git push"],
+    )
+    def test_candidate_rules_allow(self, command):
+        assert not any(match_pattern(p, command) for patterns in SHADOW_PATTERNS.values() for p in patterns)
+
+    def test_shadow_match_never_denies(self, project):
+        assert handle({"tool_input": {"command": "chmod -R 777 /"}}) is None
+
+        (entry,) = self.read_shadow_log(project)
+        assert entry["action"] == "would_deny"
+        assert entry["command"] == "chmod -R 777 /"
+        assert entry["enforced"] is None
+        assert entry["rules"]["chmod_recursive_root"]["match"] is True
+        assert set(entry["rules"]) == {p["name"] for patterns in SHADOW_PATTERNS.values() for p in patterns}
+        assert not (project / ".claude" / "logs" / "command-safety.log").exists()
+
+    def test_non_matching_commands_only_count_cost(self, project):
+        handle({"tool_input": {"command": "ls -la"}})
+        handle({"tool_input": {"command": "git status"}})
+        assert self.read_shadow_log(project) == []
+        rules = self.read_stats(project)["rules"]
+        assert set(rules) == {p["name"] for patterns in SHADOW_PATTERNS.values() for p in patterns}
+        assert all(rule["evaluated"] == 2 and sum(rule["buckets"]) == 2 for rule in rules.values())
+
+    def test_enforced_deny_still_evaluated(self, project):
+        assert handle({"tool_input": {"command": "rm -rf /"}}) is not None
+        assert self.read_shadow_log(project) == []
+        assert self.read_stats(project)["rules"]["chmod_recursive_root"]["evaluated"] == 1
+
+    def test_costs_summarized_once_per_period(self, project, monkeypatch):
+        handle({"tool_input": {"command": "ls"}})
+        monkeypatch.setattr(validate_command, "SHADOW_SUMMARY_SECONDS", 0)
+        handle({"tool_input": {"command": "ls"}})
+        (summary,) = self.read_shadow_log(project)
+        assert summary["action"] == "summary"
+        assert summary["bounds_us"] == validate_command.SHADOW_BOUNDS_US
+        assert summary["rules"]["git_force_push_main"]["evaluated"] == 2
+        assert not (project / ".claude" / "logs" / "command-safety-shadow-stats.json").exists()
+
+    def test_log_is_rotated(self, project, monkeypatch):
+        monkeypatch.setattr(validate_command, "SHADOW_LOG_MAX_BYTES", 100)
+        for _ in range(3):
+            handle({"tool_input": {"command": "chmod -R 777 /"}})
+        logs = project / ".claude" / "logs"
+        assert len(self.read_shadow_log(project)) == 1
+        assert len((logs / "command-safety-shadow.log.1").read_text().splitlines()) == 1
+        assert read_shadow_report()["chmod_recursive_root"]["would_deny"] == 2
+
+    def test_sampling(self, project, monkeypatch):
+        monkeypatch.setenv("CLAUDE_SAFETY_SHADOW_SAMPLE", "0")
+        handle({"tool_input": {"command": "chmod -R 777 /"}})
+        assert not (project / ".claude" / "logs" / "command-safety-shadow.log").exists()
+
+    def test_small_default_sample(self, monkeypatch):
+        monkeypatch.delenv("CLAUDE_SAFETY_SHADOW_SAMPLE", raising=False)
+        assert validate_command.get_shadow_sample_rate() == 0.1
+
+    def test_broken_rule_does_not_affect_decision(self, project):
+        broken = {"broken": [{"name": "broken", "type": "regex", "pattern": "("}]}
+        with patch.dict(SHADOW_PATTERNS, broken):
+            assert handle({"tool_input": {"command": "rm -rf /"}})["hookSpecificOutput"]["permissionDecision"] == "deny"
+            assert handle({"tool_input": {"command": "ls"}}) is None
+
+    def test_report(self, project):
+        for command in ["chmod -R 777 /", "ls", "git status"]:
+            handle({"tool_input": {"command": command}})
+        report = read_shadow_report()
+        assert report["chmod_recursive_root"]["evaluated"] == 3
+        assert report["chmod_recursive_root"]["would_deny"] == 1
+        assert report["chmod_recursive_root"]["already_denied"] == 0
+        assert report["git_force_push_main"]["would_deny"] == 0
+        assert report["git_force_push_main"]["p99_us"] >= report["git_force_push_main"]["p50_us"]